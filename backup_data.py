@@ -8,14 +8,7 @@ django.setup()
 
 from django.core.management import call_command
 
-# Export với UTF-8
+# Giữ lại script cũ cho tiện, thực chất gọi lệnh `manage.py backup`
+# (mỗi model một file JSONL nén + manifest). Khôi phục bằng `manage.py restore`.
 print("Đang backup dữ liệu...")
-with open('data_backup.json', 'w', encoding='utf-8') as f:
-    call_command(
-        'dumpdata',
-        exclude=['auth.permission', 'contenttypes', 'sessions'],
-        indent=2,
-        stdout=f
-    )
-
-print("✓ Backup thành công: data_backup.json")
\ No newline at end of file
+call_command('backup', *sys.argv[1:])
@@ -5,4 +5,6 @@ set -o errexit
 pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+# Dựng sẵn trang chủ cho WhiteNoise (dùng khi PRERENDERED_HOME=True)
+python manage.py prerender_home
\ No newline at end of file
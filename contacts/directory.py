@@ -0,0 +1,109 @@
+"""
+Danh bạ liên hệ dựng sẵn
+
+Toàn bộ danh bạ (phòng ban đang hoạt động kèm người liên hệ đang hoạt động,
+số người liên hệ, đường dây khẩn cấp theo loại) được dựng bằng 3 truy vấn và
+cache nguyên khối. Danh bạ hiếm khi thay đổi nên chỉ cần xóa cache khi
+Department, ContactPerson hoặc EmergencyContact thay đổi (xem signals.py).
+
+Đường dây khẩn cấp còn được dựng sẵn thành JSON kèm ETag theo nội dung, dùng
+cho endpoint JSON và làm khóa cache cho phần HTML đã render.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q
+
+from .models import ContactPerson, Department, EmergencyContact
+
+DIRECTORY_CACHE_KEY = 'contacts:directory'
+DIRECTORY_CACHE_TIMEOUT = getattr(settings, 'CONTACTS_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def build_directory():
+    departments = list(
+        Department.objects.filter(is_active=True)
+        .annotate(contact_count=Count('contacts', filter=Q(contacts__is_active=True)))
+        .prefetch_related(Prefetch(
+            'contacts',
+            queryset=ContactPerson.objects.filter(is_active=True),
+            to_attr='active_contacts',
+        ))
+    )
+
+    # Sắp theo (loại, thứ tự hiển thị) để dùng index và nhóm liền một lượt
+    emergency_contacts = list(
+        EmergencyContact.objects.filter(is_active=True)
+        .order_by('emergency_type', 'display_order', 'name')
+    )
+    emergency_groups = group_emergency_contacts(emergency_contacts)
+    emergency_json = json.dumps({
+        'groups': [
+            {
+                'type': emergency_type,
+                'label': label,
+                'contacts': [
+                    {
+                        'id': contact.pk,
+                        'name': contact.name,
+                        'phone': contact.phone,
+                        'description': contact.description,
+                    }
+                    for contact in contacts
+                ],
+            }
+            for emergency_type, label, contacts in emergency_groups
+        ],
+    }, ensure_ascii=False)
+
+    return {
+        'departments': departments,
+        # Danh sách phẳng giữ thứ tự mặc định của model
+        'emergency_contacts': sorted(emergency_contacts, key=lambda c: (c.display_order, c.name)),
+        'emergency_groups': emergency_groups,
+        'emergency_json': emergency_json,
+        'emergency_etag': hashlib.md5(emergency_json.encode()).hexdigest(),
+    }
+
+
+def group_emergency_contacts(contacts):
+    """Nhóm các liên hệ (đã sắp theo loại) thành [(loại, tên loại, [liên hệ])] theo thứ tự EMERGENCY_TYPES"""
+    groups = {}
+    for contact in contacts:
+        groups.setdefault(contact.emergency_type, []).append(contact)
+    type_order = {value: index for index, (value, _) in enumerate(EmergencyContact.EMERGENCY_TYPES)}
+    type_labels = dict(EmergencyContact.EMERGENCY_TYPES)
+    return [
+        (emergency_type, type_labels.get(emergency_type, emergency_type), groups[emergency_type])
+        for emergency_type in sorted(groups, key=lambda t: type_order.get(t, len(type_order)))
+    ]
+
+
+def get_directory():
+    """Trả về danh bạ từ cache, dựng lại nếu chưa có"""
+    directory = cache.get(DIRECTORY_CACHE_KEY)
+    if directory is None:
+        directory = build_directory()
+        cache.set(DIRECTORY_CACHE_KEY, directory, DIRECTORY_CACHE_TIMEOUT)
+    return directory
+
+
+def invalidate_directory():
+    cache.delete(DIRECTORY_CACHE_KEY)
+
+
+def filter_departments(departments, search_query='', department_type=''):
+    """Lọc danh sách phòng ban đã cache theo từ khóa và loại"""
+    if department_type:
+        departments = [d for d in departments if d.department_type == department_type]
+    if search_query:
+        needle = search_query.casefold()
+        departments = [
+            d for d in departments
+            if needle in d.name.casefold()
+            or needle in d.description.casefold()
+            or needle in d.address.casefold()
+        ]
+    return departments
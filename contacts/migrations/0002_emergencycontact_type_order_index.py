@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emergencycontact',
+            index=models.Index(fields=['emergency_type', 'display_order'], name='contacts_em_emergen_4fed6e_idx'),
+        ),
+    ]
@@ -145,6 +145,10 @@ class EmergencyContact(models.Model):
         verbose_name = "Đường dây khẩn cấp"
         verbose_name_plural = "Các đường dây khẩn cấp"
         ordering = ['display_order', 'name']
+        indexes = [
+            # Danh sách khẩn cấp nhóm theo loại, trong mỗi loại theo thứ tự hiển thị
+            models.Index(fields=['emergency_type', 'display_order']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.phone}"
\ No newline at end of file
@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .directory import invalidate_directory
+from .models import ContactPerson, Department, EmergencyContact
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=ContactPerson)
+@receiver(post_delete, sender=ContactPerson)
+@receiver(post_save, sender=EmergencyContact)
+@receiver(post_delete, sender=EmergencyContact)
+def invalidate_directory_cache(sender, **kwargs):
+    """
+    Xóa danh bạ đã cache mỗi khi dữ liệu liên hệ thay đổi, sau khi transaction
+    commit để request khác không cache lại dữ liệu cũ
+    """
+    transaction.on_commit(invalidate_directory)
@@ -1,3 +1,104 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .models import ContactPerson, Department, EmergencyContact
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ContactDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            department = Department.objects.create(
+                name=f'Phòng {i}', address='1 Lê Lợi', phone='0281234567',
+                department_type='tu_phap' if i else 'hanh_chinh',
+            )
+            for j in range(4):
+                ContactPerson.objects.create(
+                    department=department, full_name=f'Cán bộ {i}-{j}',
+                    position='chuyen_vien', phone='0900000000', is_active=j != 3,
+                )
+        Department.objects.create(name='Phòng cũ', address='x', phone='1', is_active=False)
+        EmergencyContact.objects.create(name='Cảnh sát', emergency_type='canh_sat', phone='113')
+        EmergencyContact.objects.create(name='Cứu hỏa', emergency_type='cuu_hoa', phone='114')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_directory_is_built_once_and_cached(self):
+        url = reverse('contacts:contact_list')
+        # Phòng ban kèm số người liên hệ, prefetch người liên hệ, đường dây khẩn cấp
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['departments']), 3)
+        department = response.context['departments'][0]
+        self.assertEqual(department.contact_count, 3)
+        self.assertTrue(all(person.is_active for person in department.active_contacts))
+        self.assertContains(response, 'Và 1 người khác')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'type': 'tu_phap', 'search': 'phòng 2'})
+        self.assertEqual([d.name for d in response.context['departments']], ['Phòng 2'])
+
+    def test_changes_invalidate_directory(self):
+        url = reverse('contacts:contact_list')
+        self.client.get(url)
+
+        person = ContactPerson.objects.filter(is_active=True).first()
+        with self.captureOnCommitCallbacks() as callbacks:
+            person.is_active = False
+            person.save()
+            EmergencyContact.objects.create(name='Cấp cứu', emergency_type='y_te', phone='115')
+        # Trước khi commit, danh bạ cũ vẫn nằm trong cache
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        for callback in callbacks:
+            callback()
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['emergency_contacts']), 3)
+        self.assertEqual(sum(d.contact_count for d in response.context['departments']), 8)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EmergencyListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        EmergencyContact.objects.create(name='Cấp cứu', emergency_type='y_te', phone='115')
+        EmergencyContact.objects.create(name='Cảnh sát 2', emergency_type='canh_sat', phone='0283', display_order=2)
+        EmergencyContact.objects.create(name='Cảnh sát', emergency_type='canh_sat', phone='113', display_order=1)
+        EmergencyContact.objects.create(name='Ngưng', emergency_type='khac', phone='0', is_active=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_groups_follow_type_and_display_order(self):
+        response = self.client.get(reverse('contacts:emergency_list'))
+        groups = [
+            (emergency_type, [contact.name for contact in contacts])
+            for emergency_type, _, contacts in response.context['emergency_groups']
+        ]
+        self.assertEqual(groups, [('canh_sat', ['Cảnh sát', 'Cảnh sát 2']), ('y_te', ['Cấp cứu'])])
+        self.assertContains(response, 'Y tế cấp cứu')
+
+        # Lần sau: danh bạ và phần HTML đều lấy từ cache
+        with self.assertNumQueries(0):
+            self.client.get(reverse('contacts:emergency_list'))
+
+    def test_json_endpoint_supports_etag(self):
+        url = reverse('contacts:emergency_list_json')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([group['type'] for group in response.json()['groups']], ['canh_sat', 'y_te'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            EmergencyContact.objects.filter(name='Cấp cứu').get().delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -9,4 +9,5 @@ urlpatterns = [
     path('', views.contact_list, name='contact_list'),
     path('phong-ban/<int:pk>/', views.department_detail, name='department_detail'),
     path('khan-cap/', views.emergency_list, name='emergency_list'),
+    path('khan-cap/json/', views.emergency_list_json, name='emergency_list_json'),
 ]
\ No newline at end of file
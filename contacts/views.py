@@ -1,8 +1,14 @@
 # contacts/views.py
 
+from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
-from .models import Department, EmergencyContact
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
+from .directory import DIRECTORY_CACHE_TIMEOUT, filter_departments, get_directory
+from .models import Department
+
+# Client nên hỏi lại mỗi phút; phần lớn lần hỏi lại chỉ nhận 304
+EMERGENCY_JSON_MAX_AGE = 60
 
 
 def contact_list(request):
@@ -12,33 +18,16 @@ def contact_list(request):
     search_query = request.GET.get('search', '')
     department_type = request.GET.get('type', '')
     
-    # Query departments
-    departments = Department.objects.filter(is_active=True)
-    
-    # Tìm kiếm
-    if search_query:
-        departments = departments.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(address__icontains=search_query)
-        )
-    
-    # Filter theo loại phòng ban
-    if department_type:
-        departments = departments.filter(department_type=department_type)
-    
-    # Lấy danh sách người liên hệ cho mỗi phòng ban
-    departments = departments.prefetch_related('contacts')
-    
-    # Lấy danh sách đường dây khẩn cấp
-    emergency_contacts = EmergencyContact.objects.filter(is_active=True)
+    # Danh bạ dựng sẵn (phòng ban, người liên hệ, đường dây khẩn cấp) từ cache
+    directory = get_directory()
+    departments = filter_departments(directory['departments'], search_query, department_type)
     
     # Lấy danh sách loại phòng ban để làm filter
     department_types = Department.DEPARTMENT_TYPES
     
     context = {
         'departments': departments,
-        'emergency_contacts': emergency_contacts,
+        'emergency_contacts': directory['emergency_contacts'],
         'department_types': department_types,
         'search_query': search_query,
         'selected_type': department_type,
@@ -64,18 +53,29 @@ def department_detail(request, pk):
 def emergency_list(request):
     """Hiển thị danh sách đường dây khẩn cấp"""
     
-    emergency_contacts = EmergencyContact.objects.filter(is_active=True)
-    
-    # Group theo loại
-    grouped_contacts = {}
-    for contact in emergency_contacts:
-        type_name = contact.get_emergency_type_display()
-        if type_name not in grouped_contacts:
-            grouped_contacts[type_name] = []
-        grouped_contacts[type_name].append(contact)
+    directory = get_directory()
     
     context = {
-        'grouped_contacts': grouped_contacts,
+        # Danh sách đã nhóm theo loại: [(loại, tên loại, [liên hệ])]
+        'emergency_groups': directory['emergency_groups'],
+        # Phần HTML đã render được cache theo ETag của dữ liệu
+        'emergency_etag': directory['emergency_etag'],
+        'fragment_timeout': DIRECTORY_CACHE_TIMEOUT,
     }
     
-    return render(request, 'contacts/emergency_list.html', context)
\ No newline at end of file
+    return render(request, 'contacts/emergency_list.html', context)
+
+
+@require_GET
+def emergency_list_json(request):
+    """Đường dây khẩn cấp dạng JSON cho kiosk / ứng dụng di động, hỗ trợ ETag"""
+    
+    directory = get_directory()
+    etag = '"%s"' % directory['emergency_etag']
+    
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(directory['emergency_json'], content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=EMERGENCY_JSON_MAX_AGE)
+    return response
@@ -1,11 +1,26 @@
 # feedback/admin.py
-from django.contrib import admin
-from django.utils.html import format_html
-from .models import Category, Feedback, FeedbackImage
+from datetime import timedelta
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from services.pagination import EstimatedCountPaginator
+from . import geo
+from .models import Category, Feedback, FeedbackImage, FeedbackStatusHistory, OutboxMessage
+from .queue import LEASE_MINUTES, claim_next, is_held_by_other
+from .search import search_feedback
+from .stats import dashboard
+from .transitions import STATUS_LABELS, is_allowed, record_change, transition
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'priority_level', 'created_at']
+    list_display = ['name', 'priority_level', 'sla_hours', 'created_at']
     list_filter = ['priority_level']
     search_fields = ['name', 'description']
 
@@ -13,21 +28,50 @@ class CategoryAdmin(admin.ModelAdmin):
 class FeedbackImageInline(admin.TabularInline):
     model = FeedbackImage
     extra = 0
-    readonly_fields = ['image_preview', 'uploaded_at']
-    fields = ['image_preview', 'image', 'caption', 'uploaded_at']
+    readonly_fields = ['image_preview', 'uploaded_at', 'processed_at']
+    fields = ['image_preview', 'image', 'caption', 'uploaded_at', 'processed_at']
     
     def image_preview(self, obj):
         if obj.image:
             return format_html(
-                '<img src="{}" style="max-height: 100px; max-width: 200px;" />',
-                obj.image.url
+                '<img src="{}" style="max-height: 100px; max-width: 200px;" loading="lazy" />',
+                obj.thumbnail_small_url
             )
         return "No image"
     image_preview.short_description = 'Xem trước'
 
 
+class FeedbackStatusHistoryInline(admin.TabularInline):
+    model = FeedbackStatusHistory
+    extra = 0
+    can_delete = False
+    fields = ['from_status', 'to_status', 'changed_by', 'note', 'changed_at']
+    readonly_fields = fields
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('changed_by')
+
+
+class FeedbackAdminForm(forms.ModelForm):
+    """Sửa trạng thái từng phản ánh theo cùng quy tắc với thao tác hàng loạt"""
+    
+    def clean_status(self):
+        status = self.cleaned_data['status']
+        current = self.initial.get('status')
+        if self.instance.pk and status != current and not is_allowed(current, status):
+            raise forms.ValidationError(
+                f'Không thể chuyển từ "{STATUS_LABELS[current]}" sang "{STATUS_LABELS[status]}".'
+            )
+        return status
+
+
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
+    form = FeedbackAdminForm
+    
     list_display = [
         'tracking_code', 
         'get_display_name', 
@@ -35,25 +79,45 @@ class FeedbackAdmin(admin.ModelAdmin):
         'category',
         'priority_badge',
         'status_badge',
+        'assignee',
         'created_at'
     ]
-    list_filter = ['status', 'priority', 'category', 'is_anonymous', 'created_at']
-    search_fields = ['tracking_code', 'name', 'phone', 'title', 'content']
-    readonly_fields = ['tracking_code', 'created_at', 'updated_at', 'resolved_at']
-    inlines = [FeedbackImageInline]
+    list_filter = [
+        'status', 'priority', 'escalation_level', 'category', 'source', 'is_anonymous', 'created_at',
+        ('duplicate_of', admin.EmptyFieldListFilter),
+    ]
+    # Chỉ để hiện ô tìm kiếm; việc tìm thực hiện trong get_search_results
+    search_fields = ['tracking_code', 'phone', 'search_document']
+    search_help_text = 'Mã theo dõi, số điện thoại hoặc từ khóa (tiêu đề, nội dung, tên, địa chỉ)'
+    list_select_related = ['category', 'assignee']
+    # Bảng lớn: không đếm toàn bảng, số trang dựa trên ước tính của planner
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    raw_id_fields = ['duplicate_of', 'assignee']
+    readonly_fields = [
+        'tracking_code', 'source', 'created_at', 'updated_at', 'resolved_at', 'nearby_reports',
+        'escalation_level', 'sla_breached_at', 'lease_expires_at',
+    ]
+    inlines = [FeedbackImageInline, FeedbackStatusHistoryInline]
+    
+    # Phản ánh chưa xử lý xong trong bán kính này được coi là có thể trùng vị trí
+    NEARBY_RADIUS_M = 100
     
     fieldsets = (
         ('Thông tin tracking', {
-            'fields': ('tracking_code', 'status', 'priority')
+            'fields': ('tracking_code', 'status', 'priority', 'source')
         }),
         ('Thông tin người gửi', {
             'fields': ('name', 'is_anonymous', 'phone', 'email')
         }),
         ('Nội dung phản ánh', {
-            'fields': ('category', 'title', 'content', 'address', 'latitude', 'longitude')
+            'fields': ('category', 'title', 'content', 'address', 'latitude', 'longitude', 'nearby_reports')
         }),
         ('Xử lý', {
-            'fields': ('admin_note',)
+            'fields': (
+                'assignee', 'lease_expires_at', 'admin_note', 'duplicate_of',
+                'escalation_level', 'sla_breached_at',
+            )
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'resolved_at'),
@@ -61,6 +125,26 @@ class FeedbackAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_search_results(self, request, queryset, search_term):
+        return search_feedback(queryset, search_term), False
+    
+    def nearby_reports(self, obj):
+        if obj.latitude is None or obj.longitude is None:
+            return '-'
+        candidates = Feedback.objects.exclude(pk=obj.pk).filter(status__in=['pending', 'processing'])
+        reports = geo.nearby(candidates, obj.latitude, obj.longitude, self.NEARBY_RADIUS_M)[:10]
+        if not reports:
+            return 'Không có'
+        return format_html_join(
+            '', '<div><a href="{}">{}</a> - {} ({} m)</div>',
+            (
+                (reverse('admin:feedback_feedback_change', args=[report.pk]), report.tracking_code,
+                 report.title, round(report.distance))
+                for report in reports
+            )
+        )
+    nearby_reports.short_description = 'Phản ánh lân cận (chưa xử lý xong)'
+    
     def priority_badge(self, obj):
         colors = {
             1: '#6c757d',  # gray
@@ -89,34 +173,130 @@ class FeedbackAdmin(admin.ModelAdmin):
         )
     status_badge.short_description = 'Trạng thái'
     
-    actions = ['mark_as_processing', 'mark_as_resolved']
+    actions = ['mark_as_processing', 'mark_as_resolved', 'mark_as_rejected']
+    
+    def save_model(self, request, obj, form, change):
+        if 'assignee' in form.changed_data:
+            # Gán tay cũng giữ phản ánh như khi nhận từ hàng đợi; bỏ gán thì trả về hàng đợi
+            obj.lease_expires_at = timezone.now() + timedelta(minutes=LEASE_MINUTES) if obj.assignee else None
+        super().save_model(request, obj, form, change)
+        if change and 'status' in form.changed_data:
+            record_change(obj, form.initial['status'], user=request.user)
+    
+    def transition_selected(self, request, queryset, to_status, label):
+        selected = queryset.count()
+        updated = transition(queryset, to_status, user=request.user)
+        message = f'{updated} phản ánh đã được đánh dấu {label}.'
+        if updated < selected:
+            message += f' Bỏ qua {selected - updated} phản ánh không thể chuyển sang trạng thái này.'
+        self.message_user(request, message)
     
     def mark_as_processing(self, request, queryset):
-        updated = queryset.update(status='processing')
-        self.message_user(request, f'{updated} phản ánh đã được đánh dấu đang xử lý.')
+        self.transition_selected(request, queryset, 'processing', 'đang xử lý')
     mark_as_processing.short_description = 'Đánh dấu đang xử lý'
     
     def mark_as_resolved(self, request, queryset):
-        from django.utils import timezone
-        updated = queryset.filter(status__in=['pending', 'processing']).update(
-            status='resolved',
-            resolved_at=timezone.now()
-        )
-        self.message_user(request, f'{updated} phản ánh đã được đánh dấu đã giải quyết.')
+        self.transition_selected(request, queryset, 'resolved', 'đã giải quyết')
     mark_as_resolved.short_description = 'Đánh dấu đã giải quyết'
+    
+    def mark_as_rejected(self, request, queryset):
+        self.transition_selected(request, queryset, 'rejected', 'từ chối')
+    mark_as_rejected.short_description = 'Từ chối'
+    
+    # Khoảng thời gian chọn được trên trang thống kê (số ngày, 0 = toàn bộ)
+    STATS_RANGES = [(7, '7 ngày'), (30, '30 ngày'), (90, '90 ngày'), (365, '1 năm'), (0, 'Toàn bộ')]
+    
+    def get_urls(self):
+        urls = [
+            path('stats/', self.admin_site.admin_view(self.stats_view), name='feedback_feedback_stats'),
+            path('claim-next/', self.admin_site.admin_view(self.claim_next_view), name='feedback_feedback_claim_next'),
+        ]
+        return urls + super().get_urls()
+    
+    def claim_next_view(self, request):
+        """Nhận phản ánh đang chờ tiếp theo trong hàng đợi và mở trang xử lý"""
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        if request.method != 'POST':
+            return HttpResponseRedirect(reverse('admin:feedback_feedback_changelist'))
+        
+        feedback = claim_next(request.user)
+        if feedback is None:
+            self.message_user(request, 'Không còn phản ánh nào đang chờ xử lý.', messages.INFO)
+            return HttpResponseRedirect(reverse('admin:feedback_feedback_changelist'))
+        
+        self.message_user(
+            request,
+            f'Bạn đã nhận phản ánh {feedback.tracking_code} '
+            f'(giữ đến {timezone.localtime(feedback.lease_expires_at).strftime("%H:%M")}).',
+        )
+        return HttpResponseRedirect(reverse('admin:feedback_feedback_change', args=[feedback.pk]))
+    
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        if request.method == 'GET':
+            feedback = self.get_object(request, object_id)
+            if feedback is not None and is_held_by_other(feedback, request.user):
+                self.message_user(
+                    request,
+                    f'Phản ánh đang được {feedback.assignee} xử lý '
+                    f'(giữ đến {timezone.localtime(feedback.lease_expires_at).strftime("%H:%M")}).',
+                    messages.WARNING,
+                )
+        return super().change_view(request, object_id, form_url, extra_context)
+    
+    def stats_view(self, request):
+        """Trang thống kê, đọc từ bảng tổng hợp FeedbackDailyStat"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        
+        try:
+            days = int(request.GET.get('days', 30))
+        except ValueError:
+            days = 30
+        if days not in dict(self.STATS_RANGES):
+            days = 30
+        start_day = timezone.localdate() - timedelta(days=days - 1) if days else None
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Thống kê phản ánh',
+            'ranges': self.STATS_RANGES,
+            'selected_days': days,
+            **dashboard(start_day=start_day),
+        }
+        return TemplateResponse(request, 'admin/feedback/feedback/stats.html', context)
 
 
 @admin.register(FeedbackImage)
 class FeedbackImageAdmin(admin.ModelAdmin):
-    list_display = ['feedback', 'image_preview', 'uploaded_at']
+    list_display = ['feedback', 'image_preview', 'uploaded_at', 'processing_error']
     list_filter = ['uploaded_at']
-    readonly_fields = ['image_preview', 'uploaded_at']
+    readonly_fields = ['image_preview', 'uploaded_at', 'processing_error']
     
     def image_preview(self, obj):
         if obj.image:
             return format_html(
-                '<img src="{}" style="max-height: 100px; max-width: 200px;" />',
-                obj.image.url
+                '<img src="{}" style="max-height: 100px; max-width: 200px;" loading="lazy" />',
+                obj.thumbnail_small_url
             )
         return "No image"
-    image_preview.short_description = 'Xem trước'
\ No newline at end of file
+    image_preview.short_description = 'Xem trước'
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'dedupe_key']
+    readonly_fields = [
+        'dedupe_key', 'subject', 'body', 'from_email', 'recipients',
+        'attempts', 'last_error', 'created_at', 'sent_at',
+    ]
+    
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now())
+        self.message_user(request, f'{updated} email sẽ được gửi lại ở lượt tiếp theo.')
+    retry_now.short_description = 'Gửi lại ngay'
@@ -0,0 +1,85 @@
+"""
+Mã theo dõi phản ánh
+
+Mã gồm 16 ký tự trong bảng chữ Crockford base32 (bỏ I, L, O, U để không
+nhầm với 1, 0, V):
+
+    DDD RRRRRRRRRRRR C
+    |   |            └ ký tự kiểm tra (Luhn mod 32): bắt lỗi gõ sai một ký tự
+    |   |              và phần lớn lỗi đảo hai ký tự liền nhau
+    |   └ 12 ký tự ngẫu nhiên (60 bit): mã là thứ duy nhất bảo vệ họ tên, số
+    |     điện thoại trên trang tra cứu nên không được đoán được
+    └ số ngày kể từ CODE_EPOCH: mã trong ngày dồn về cuối B-tree của unique
+      index thay vì rải khắp index, mà không lộ giờ gửi phản ánh
+
+Mã cũ (12 ký tự hex, sinh từ uuid4) vẫn hợp lệ để tra cứu.
+"""
+import re
+import secrets
+import time
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+BASE = len(ALPHABET)
+CODE_EPOCH = 1704067200  # 2024-01-01 00:00:00 UTC
+DAY_SECONDS = 24 * 60 * 60
+DAY_LENGTH = 3
+RANDOM_LENGTH = 12
+CODE_LENGTH = DAY_LENGTH + RANDOM_LENGTH + 1
+
+_VALUES = {char: index for index, char in enumerate(ALPHABET)}
+# Ký tự dễ nhầm khi người dân gõ lại mã
+_CONFUSABLE = str.maketrans({'O': '0', 'I': '1', 'L': '1'})
+LEGACY_CODE_RE = re.compile(r'^[0-9A-F]{12}$')
+
+
+def encode_number(number, length):
+    chars = []
+    for _ in range(length):
+        number, remainder = divmod(number, BASE)
+        chars.append(ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+def check_character(body):
+    """Ký tự kiểm tra Luhn mod 32 cho phần thân mã"""
+    total = 0
+    factor = 2
+    for char in reversed(body):
+        addend = factor * _VALUES[char]
+        total += addend // BASE + addend % BASE
+        factor = 1 if factor == 2 else 2
+    return ALPHABET[(BASE - total % BASE) % BASE]
+
+
+def generate_tracking_code(now=None):
+    days = (int(now if now is not None else time.time()) - CODE_EPOCH) // DAY_SECONDS
+    body = (
+        encode_number(days, DAY_LENGTH)
+        + ''.join(secrets.choice(ALPHABET) for _ in range(RANDOM_LENGTH))
+    )
+    return body + check_character(body)
+
+
+def generate_tracking_codes(count, now=None):
+    """count mã khác nhau cho một lô (phòng khi phần ngẫu nhiên trùng nhau)"""
+    now = now if now is not None else time.time()
+    codes = set()
+    while len(codes) < count:
+        codes.add(generate_tracking_code(now))
+    return list(codes)
+
+
+def normalize_tracking_code(value):
+    """Chuẩn hóa mã người dân nhập: bỏ khoảng trắng/gạch nối, viết hoa, sửa O->0, I/L->1"""
+    return re.sub(r'[\s-]', '', value or '').upper().translate(_CONFUSABLE)
+
+
+def is_valid_tracking_code(code):
+    """Kiểm tra định dạng và ký tự kiểm tra, không cần truy vấn database"""
+    if LEGACY_CODE_RE.match(code):
+        return True
+    if len(code) != CODE_LENGTH:
+        return False
+    if any(char not in _VALUES for char in code):
+        return False
+    return check_character(code[:-1]) == code[-1]
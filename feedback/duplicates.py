@@ -0,0 +1,55 @@
+"""
+Phát hiện phản ánh gửi trùng lúc tiếp nhận
+
+Ứng viên chỉ gồm các phản ánh gốc (chưa bị đánh dấu trùng) trong
+DUPLICATE_WINDOW gần nhất, cùng số điện thoại (index phone, created_at) hoặc
+cùng vị trí (index geohash, xem geo.py). Mỗi ứng viên được so bằng chữ ký
+MinHash đã lưu sẵn nên không phải quét hay so sánh toàn văn.
+
+Chỉ phản ánh trùng cùng số điện thoại mới được gộp vào bản gốc (người gửi
+nhận lại mã theo dõi cũ). Trùng theo vị trí có thể là người khác gửi: phản
+ánh vẫn được liên kết tới bản gốc nhưng giữ mã theo dõi riêng.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import geo
+from .minhash import content_signature, similarity
+from .models import Feedback
+
+DUPLICATE_WINDOW = timedelta(hours=24)
+DUPLICATE_THRESHOLD = 0.6
+DUPLICATE_RADIUS_M = 50
+MAX_CANDIDATES = 20
+
+
+def find_duplicate(feedback, now=None):
+    """Trả phản ánh gốc mà feedback (chưa lưu) có khả năng trùng, None nếu không có"""
+    if not feedback.content_signature:
+        feedback.content_signature = content_signature(feedback.title, feedback.content)
+    if not feedback.content_signature:
+        return None
+
+    since = (now or timezone.now()) - DUPLICATE_WINDOW
+    recent = (
+        Feedback.objects.filter(created_at__gte=since, duplicate_of__isnull=True)
+        .exclude(content_signature='')
+        .only('id', 'tracking_code', 'phone', 'content_signature', 'latitude', 'longitude', 'created_at')
+    )
+
+    candidates = list(recent.filter(phone=feedback.phone).order_by('-created_at')[:MAX_CANDIDATES])
+    if feedback.latitude is not None and feedback.longitude is not None:
+        candidates += geo.nearby(recent, feedback.latitude, feedback.longitude, DUPLICATE_RADIUS_M)[:MAX_CANDIDATES]
+
+    best, best_score = None, DUPLICATE_THRESHOLD
+    for candidate in candidates:
+        score = similarity(feedback.content_signature, candidate.content_signature)
+        if score >= best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def is_resubmission(feedback, original):
+    """Phản ánh trùng do chính người gửi bản gốc gửi lại"""
+    return original is not None and original.phone == feedback.phone
@@ -1,6 +1,7 @@
 # feedback/forms.py
 from django import forms
 from .models import Feedback, FeedbackImage
+from .uploads import MAX_IMAGE_SIZE, MAX_IMAGES
 
 class FeedbackForm(forms.ModelForm):
     """Form để gửi phản ánh"""
@@ -29,6 +30,8 @@ class FeedbackForm(forms.ModelForm):
             'title',
             'content',
             'address',
+            'latitude',
+            'longitude',
         ]
         widgets = {
             'name': forms.TextInput(attrs={
@@ -68,10 +71,16 @@ class FeedbackForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Địa chỉ xảy ra sự việc (không bắt buộc)'
             }),
+            # Được điền bởi nút "Dùng vị trí hiện tại" (Geolocation API)
+            'latitude': forms.HiddenInput(),
+            'longitude': forms.HiddenInput(),
         }
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, upload_errors=None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Lỗi do FeedbackImageUploadHandler phát hiện trong lúc nhận file
+        self.upload_errors = upload_errors or []
+        
         # Đặt label và help text
         self.fields['name'].label = 'Họ và tên'
         self.fields['is_anonymous'].label = 'Gửi ẩn danh'
@@ -90,14 +99,17 @@ class FeedbackForm(forms.ModelForm):
     
     def clean_images(self):
         """Validate hình ảnh"""
+        if self.upload_errors:
+            raise forms.ValidationError(self.upload_errors)
+        
         images = self.files.getlist('images')
         
-        if len(images) > 10:
-            raise forms.ValidationError('Bạn chỉ có thể tải lên tối đa 10 hình ảnh.')
+        if len(images) > MAX_IMAGES:
+            raise forms.ValidationError(f'Bạn chỉ có thể tải lên tối đa {MAX_IMAGES} hình ảnh.')
         
         for image in images:
             # Kiểm tra kích thước file (5MB)
-            if image.size > 5 * 1024 * 1024:
+            if image.size > MAX_IMAGE_SIZE:
                 raise forms.ValidationError(f'File {image.name} quá lớn. Kích thước tối đa là 5MB.')
             
             # Kiểm tra định dạng file
@@ -115,4 +127,12 @@ class FeedbackForm(forms.ModelForm):
         if not is_anonymous and not name:
             self.add_error('name', 'Vui lòng nhập họ tên hoặc chọn gửi ẩn danh.')
         
+        # Tọa độ phải đi cùng nhau và nằm trong phạm vi hợp lệ
+        latitude = cleaned_data.get('latitude')
+        longitude = cleaned_data.get('longitude')
+        if (latitude is None) != (longitude is None):
+            cleaned_data['latitude'] = cleaned_data['longitude'] = None
+        elif latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            self.add_error('address', 'Vị trí không hợp lệ, vui lòng lấy lại vị trí.')
+        
         return cleaned_data
\ No newline at end of file
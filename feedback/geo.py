@@ -0,0 +1,168 @@
+"""
+Truy vấn vị trí phản ánh không cần PostGIS
+
+Mỗi phản ánh có tọa độ được lưu thêm geohash (GEOHASH_PRECISION ký tự, ô
+khoảng 5m). Các phản ánh ở gần nhau có chung tiền tố geohash, nên:
+- tìm quanh một điểm = vài truy vấn khoảng [tiền tố, tiền tố kế tiếp) trên
+  index geohash (ô chứa điểm và 8 ô xung quanh), rồi lọc chính xác bằng
+  khoảng cách haversine
+- tìm trong khung bản đồ = các ô phủ khung, rồi lọc theo vĩ độ/kinh độ
+- gom cụm cho bản đồ = GROUP BY tiền tố geohash
+
+Dùng truy vấn khoảng thay vì LIKE 'abc%' để index được dùng trên cả SQLite
+(LIKE không phân biệt hoa thường) và PostgreSQL (collation không phải C).
+"""
+import math
+
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import Substr
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_M = 6371000
+
+_DECODE = {char: index for index, char in enumerate(GEOHASH_ALPHABET)}
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    latitude, longitude = float(latitude), float(longitude)
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(độ cao, độ rộng) của một ô geohash, tính bằng độ"""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lng_bits
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Khoảng cách haversine giữa hai điểm (mét)"""
+    lat1, lng1, lat2, lng2 = map(math.radians, map(float, (lat1, lng1, lat2, lng2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def degrees_for(radius_m, latitude):
+    """Bán kính (mét) quy ra (độ vĩ, độ kinh) tại vĩ độ cho trước"""
+    lat_degrees = radius_m / 111320
+    lng_degrees = radius_m / (111320 * max(math.cos(math.radians(float(latitude))), 0.01))
+    return lat_degrees, lng_degrees
+
+
+def next_prefix(prefix):
+    """Tiền tố geohash kế tiếp theo thứ tự bảng chữ, None nếu là tiền tố cuối cùng"""
+    while prefix:
+        index = _DECODE[prefix[-1]]
+        if index + 1 < len(GEOHASH_ALPHABET):
+            return prefix[:-1] + GEOHASH_ALPHABET[index + 1]
+        prefix = prefix[:-1]
+    return None
+
+
+def prefix_q(prefixes):
+    """Q cho các geohash bắt đầu bằng một trong các tiền tố"""
+    condition = Q()
+    for prefix in sorted(set(prefixes)):
+        upper = next_prefix(prefix)
+        cell = Q(geohash__gte=prefix)
+        if upper:
+            cell &= Q(geohash__lt=upper)
+        condition |= cell
+    return condition
+
+
+def cells_covering(south, west, north, east, max_cells=16):
+    """Tập tiền tố geohash (càng mịn càng tốt, tối đa max_cells ô) phủ khung cho trước"""
+    best = None
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = cell_size(precision)
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        cols = math.floor(east / width) - math.floor(west / width) + 1
+        if rows * cols > max_cells:
+            break
+        best = precision
+    if best is None:
+        return {''}
+
+    height, width = cell_size(best)
+    cells = set()
+    latitude = south
+    while True:
+        longitude = west
+        while True:
+            cells.add(encode(latitude, longitude, best))
+            if longitude >= east:
+                break
+            longitude = min(longitude + width, east)
+        if latitude >= north:
+            break
+        latitude = min(latitude + height, north)
+    return cells
+
+
+def within_bbox(queryset, south, west, north, east):
+    """Phản ánh trong khung bản đồ (không xử lý khung vắt qua kinh tuyến 180)"""
+    return queryset.filter(
+        prefix_q(cells_covering(south, west, north, east)),
+        latitude__gte=south, latitude__lte=north,
+        longitude__gte=west, longitude__lte=east,
+    )
+
+
+def nearby(queryset, latitude, longitude, radius_m):
+    """
+    Phản ánh trong bán kính radius_m quanh một điểm, sắp theo khoảng cách.
+    Mỗi phần tử được gắn thêm thuộc tính distance (mét).
+    """
+    lat_degrees, lng_degrees = degrees_for(radius_m, latitude)
+    latitude, longitude = float(latitude), float(longitude)
+    candidates = within_bbox(
+        queryset,
+        latitude - lat_degrees, longitude - lng_degrees,
+        latitude + lat_degrees, longitude + lng_degrees,
+    )
+
+    results = []
+    for feedback in candidates:
+        feedback.distance = distance_m(latitude, longitude, feedback.latitude, feedback.longitude)
+        if feedback.distance <= radius_m:
+            results.append(feedback)
+    results.sort(key=lambda feedback: feedback.distance)
+    return results
+
+
+def clusters(queryset, precision, min_count=1):
+    """
+    Gom phản ánh theo ô geohash độ dài precision: [{'cell', 'count', 'latitude', 'longitude'}].
+    Bỏ các ô có ít hơn min_count phản ánh.
+    """
+    return list(
+        queryset.exclude(geohash='')
+        .annotate(cell=Substr('geohash', 1, precision))
+        .values('cell')
+        .annotate(count=Count('id'), latitude=Avg('latitude'), longitude=Avg('longitude'))
+        .filter(count__gte=min_count)
+        .order_by('-count')
+    )
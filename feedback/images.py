@@ -0,0 +1,155 @@
+"""
+Xử lý ảnh đính kèm phản ánh
+
+Sau khi transaction lưu FeedbackImage được commit, ảnh được đưa vào một
+thread pool (ngoài luồng request) để:
+- xoay ảnh theo EXIF rồi bỏ toàn bộ EXIF (vị trí GPS, thông tin máy...)
+- thu nhỏ về tối đa MAX_DIMENSION và nén lại sang WebP (hoặc JPEG)
+- tạo các ảnh thu nhỏ kích thước cố định cho trang tra cứu và admin
+
+`manage.py process_feedback_images` xử lý lại các ảnh còn sót (ví dụ khi
+server khởi động lại lúc pool đang chạy). Ảnh Pillow không đọc được được
+đánh dấu processing_error (kèm processed_at) để không chặn các ảnh sau ở
+mỗi lần chạy.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .models import FeedbackImage
+from .tracking import invalidate_tracking
+
+logger = logging.getLogger(__name__)
+
+MAX_DIMENSION = 1920
+
+# Trường ảnh thu nhỏ -> cạnh dài tối đa (px)
+THUMBNAIL_SIZES = {
+    'thumbnail_small': 200,
+    'thumbnail_medium': 480,
+}
+
+# Lỗi do chính file ảnh (hỏng, không phải ảnh, quá lớn): thử lại cũng không được
+IMAGE_ERRORS = (OSError, ValueError, SyntaxError, Image.DecompressionBombError)
+
+if features.check('webp'):
+    OUTPUT_FORMAT, OUTPUT_EXTENSION, OUTPUT_OPTIONS = 'WEBP', 'webp', {'quality': 80, 'method': 4}
+else:
+    OUTPUT_FORMAT, OUTPUT_EXTENSION, OUTPUT_OPTIONS = 'JPEG', 'jpg', {'quality': 82, 'optimize': True}
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'FEEDBACK_IMAGE_WORKERS', 2),
+            thread_name_prefix='feedback-images',
+        )
+    return _executor
+
+
+def schedule_processing(image_ids):
+    """Xử lý ảnh sau khi transaction hiện tại commit"""
+    image_ids = list(image_ids)
+    if not image_ids:
+        return
+
+    def submit():
+        if getattr(settings, 'FEEDBACK_IMAGE_ASYNC', True):
+            executor = get_executor()
+            for image_id in image_ids:
+                executor.submit(run_in_worker, image_id)
+        else:
+            for image_id in image_ids:
+                process_feedback_image(image_id)
+
+    transaction.on_commit(submit)
+
+
+def run_in_worker(image_id):
+    close_old_connections()
+    try:
+        process_feedback_image(image_id)
+    except Exception:
+        logger.exception('Không xử lý được ảnh phản ánh %s', image_id)
+    finally:
+        # Mỗi thread có kết nối database riêng
+        connections.close_all()
+
+
+def encode(image):
+    """Nén ảnh sang định dạng đầu ra, không kèm EXIF"""
+    if OUTPUT_FORMAT == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    buffer = BytesIO()
+    image.save(buffer, OUTPUT_FORMAT, **OUTPUT_OPTIONS)
+    return buffer.getvalue()
+
+
+def resized(image, max_dimension):
+    copy = image.copy()
+    copy.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    return copy
+
+
+def process_feedback_image(image_id):
+    """Chuẩn hóa ảnh gốc và tạo ảnh thu nhỏ cho một FeedbackImage"""
+    try:
+        feedback_image = FeedbackImage.objects.get(pk=image_id, processed_at__isnull=True)
+    except FeedbackImage.DoesNotExist:
+        return
+
+    try:
+        convert(feedback_image)
+    except IMAGE_ERRORS as e:
+        logger.warning('Ảnh phản ánh %s bị hỏng, bỏ qua: %s', image_id, e)
+        FeedbackImage.objects.filter(pk=image_id).update(
+            processed_at=timezone.now(),
+            processing_error=str(e)[:255],
+        )
+
+
+def convert(feedback_image):
+    original_name = feedback_image.image.name
+    with feedback_image.image.open('rb') as f:
+        with Image.open(f) as source:
+            source = ImageOps.exif_transpose(source)
+            source.load()
+
+    base = os.path.splitext(os.path.basename(original_name))[0]
+    storage = feedback_image.image.storage
+
+    # Ảnh gốc: thu nhỏ về MAX_DIMENSION và nén lại
+    main = resized(source, MAX_DIMENSION)
+    feedback_image.image.save(f'{base}.{OUTPUT_EXTENSION}', ContentFile(encode(main)), save=False)
+
+    for field_name, size in THUMBNAIL_SIZES.items():
+        getattr(feedback_image, field_name).save(
+            f'{base}_{size}.{OUTPUT_EXTENSION}',
+            ContentFile(encode(resized(main, size))),
+            save=False,
+        )
+
+    # update() thay vì save() để không ghi đè các thay đổi khác trên dòng này
+    FeedbackImage.objects.filter(pk=feedback_image.pk).update(
+        image=feedback_image.image.name,
+        processed_at=timezone.now(),
+        **{field_name: getattr(feedback_image, field_name).name for field_name in THUMBNAIL_SIZES},
+    )
+
+    # update() không phát signal: tự xóa bản tra cứu đang trỏ tới ảnh gốc
+    invalidate_tracking(feedback_image.feedback.tracking_code)
+
+    if original_name != feedback_image.image.name:
+        storage.delete(original_name)
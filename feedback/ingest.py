@@ -0,0 +1,236 @@
+"""
+Tiếp nhận phản ánh theo lô từ các kênh đối tác (tổng đài, Zalo)
+
+Đầu vào là JSONL: mỗi dòng một object với các khóa title, content, phone
+(bắt buộc) và name, email, category (tên danh mục), priority, address,
+latitude, longitude (tùy chọn).
+
+Mỗi lô (tối đa BATCH_SIZE dòng hợp lệ) chỉ tốn vài truy vấn:
+- danh mục được đọc một lần vào bộ nhớ, tra theo tên đã bỏ dấu
+- mã theo dõi được sinh cho cả lô, kiểm tra trùng bằng một truy vấn IN
+- các phản ánh được ghi bằng một bulk_create
+- admin nhận một email tổng hợp cho cả lô thay vì mỗi phản ánh một email
+
+bulk_create không gọi save() và không phát signal, nên các trường tính toán
+được tính trước (Feedback.compute_derived_fields) và cache tra cứu được xóa
+sau khi commit. Phản ánh từ đối tác không qua bước phát hiện gửi trùng.
+"""
+import json
+import secrets
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from services.search import fold_diacritics
+
+from .codes import generate_tracking_codes
+from .models import Category, Feedback
+from .outbox import enqueue_email
+from .tracking import invalidate_tracking_many
+
+BATCH_SIZE = 1000
+# Số dòng / dung lượng tối đa của một request tới endpoint; lô lớn hơn dùng
+# lệnh ingest_feedback. Endpoint đọc body theo từng dòng nên giới hạn này thay
+# cho DATA_UPLOAD_MAX_MEMORY_SIZE (2,5MB, không đủ cho 5000 dòng)
+MAX_REQUEST_LINES = 5000
+MAX_REQUEST_BYTES = 20 * 1024 * 1024
+# Số mã theo dõi liệt kê trong email tổng hợp
+DIGEST_MAX_CODES = 50
+
+REQUIRED_FIELDS = ['title', 'content', 'phone']
+TEXT_FIELDS = ['title', 'content', 'phone', 'name', 'address']
+PRIORITIES = dict(Feedback.PRIORITY_CHOICES)
+
+
+def source_for_token(token):
+    """Kênh ứng với token trong FEEDBACK_INGEST_TOKENS, None nếu token không hợp lệ"""
+    sources = dict(Feedback.SOURCE_CHOICES)
+    for item in getattr(settings, 'FEEDBACK_INGEST_TOKENS', '').split(','):
+        source, _, expected = item.strip().partition(':')
+        if source in sources and expected and token and secrets.compare_digest(token, expected):
+            return source
+    return None
+
+
+def category_lookup():
+    """{tên danh mục đã bỏ dấu: Category}"""
+    return {fold_diacritics(category.name).strip(): category for category in Category.objects.all()}
+
+
+def parse_coordinate(value, limit):
+    coordinate = Decimal(str(value)).quantize(Decimal('0.000001'))
+    if not -limit <= coordinate <= limit:
+        raise InvalidOperation
+    return coordinate
+
+
+def parse_record(data, categories, source):
+    """Trả (Feedback chưa lưu, None) hoặc (None, {trường: lỗi})"""
+    if not isinstance(data, dict):
+        return None, {'__all__': 'Mỗi dòng phải là một JSON object.'}
+
+    errors = {}
+    values = {}
+    for field in TEXT_FIELDS:
+        value = data.get(field)
+        value = '' if value is None else str(value).strip()
+        max_length = Feedback._meta.get_field(field).max_length
+        if field in REQUIRED_FIELDS and not value:
+            errors[field] = 'Trường này là bắt buộc.'
+        elif max_length and len(value) > max_length:
+            errors[field] = f'Tối đa {max_length} ký tự.'
+        values[field] = value
+
+    email = str(data.get('email') or '').strip() or None
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors['email'] = 'Email không hợp lệ.'
+
+    category = None
+    if data.get('category'):
+        category = categories.get(fold_diacritics(str(data['category'])).strip())
+        if category is None:
+            errors['category'] = f'Không có danh mục "{data["category"]}".'
+
+    priority = data.get('priority', 2)
+    if type(priority) is not int or priority not in PRIORITIES:
+        errors['priority'] = 'Mức độ ưu tiên phải là 1, 2, 3 hoặc 4.'
+
+    latitude = longitude = None
+    if data.get('latitude') is not None and data.get('longitude') is not None:
+        try:
+            latitude = parse_coordinate(data['latitude'], 90)
+            longitude = parse_coordinate(data['longitude'], 180)
+        except (InvalidOperation, ValueError):
+            errors['latitude'] = 'Tọa độ không hợp lệ.'
+
+    if errors:
+        return None, errors
+
+    feedback = Feedback(
+        name=values['name'] or 'Ẩn danh',
+        is_anonymous=not values['name'],
+        phone=values['phone'],
+        email=email,
+        category=category,
+        priority=priority,
+        title=values['title'],
+        content=values['content'],
+        address=values['address'],
+        latitude=latitude,
+        longitude=longitude,
+        source=source,
+    )
+    feedback.compute_derived_fields()
+    return feedback, None
+
+
+def parse_lines(lines, categories, source):
+    """Duyệt các dòng JSONL, trả lần lượt (số dòng, Feedback hoặc None, lỗi)"""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            # json.loads nhận cả bytes UTF-8; UnicodeDecodeError là một ValueError
+            data = json.loads(line)
+        except ValueError:
+            yield number, None, {'__all__': 'Dòng không phải JSON hợp lệ.'}
+            continue
+        feedback, errors = parse_record(data, categories, source)
+        yield number, feedback, errors
+
+
+def insert_batch(feedbacks, attempts=Feedback.TRACKING_CODE_ATTEMPTS):
+    """Gán mã theo dõi và ghi cả lô bằng một bulk_create"""
+    for attempt in range(attempts):
+        codes = generate_tracking_codes(len(feedbacks))
+        taken = set(Feedback.objects.filter(tracking_code__in=codes).values_list('tracking_code', flat=True))
+        if taken:
+            continue
+        for feedback, code in zip(feedbacks, codes):
+            feedback.tracking_code = code
+        try:
+            with transaction.atomic():
+                Feedback.objects.bulk_create(feedbacks)
+        except IntegrityError:
+            # Request khác vừa dùng một trong các mã này
+            if attempt == attempts - 1:
+                raise
+            continue
+        transaction.on_commit(lambda: invalidate_tracking_many(codes))
+        return feedbacks
+    raise IntegrityError('Không sinh được mã theo dõi không trùng cho lô phản ánh')
+
+
+def send_digest(feedbacks, source):
+    """Một email tổng hợp cho admin về cả lô phản ánh vừa tiếp nhận"""
+    source_label = dict(Feedback.SOURCE_CHOICES).get(source, source)
+    by_priority = Counter(feedback.get_priority_display() for feedback in feedbacks)
+    by_category = Counter(feedback.category.name if feedback.category else 'Không xác định' for feedback in feedbacks)
+    listed = sorted(feedbacks, key=lambda feedback: -feedback.priority)[:DIGEST_MAX_CODES]
+
+    lines = [
+        f'Đã tiếp nhận {len(feedbacks)} phản ánh từ kênh {source_label} '
+        f'lúc {timezone.localtime().strftime("%d/%m/%Y %H:%M")}.',
+        '',
+        'Theo mức độ:',
+        *(f'  {label}: {count}' for label, count in by_priority.most_common()),
+        '',
+        'Theo danh mục:',
+        *(f'  {name}: {count}' for name, count in by_category.most_common()),
+        '',
+        'Phản ánh (ưu tiên cao trước):',
+        *(f'  {feedback.tracking_code} - {feedback.get_priority_display()} - {feedback.title}' for feedback in listed),
+    ]
+    if len(feedbacks) > len(listed):
+        lines.append(f'  ... và {len(feedbacks) - len(listed)} phản ánh khác')
+    lines += ['', '---', 'Vui lòng đăng nhập vào hệ thống để xem chi tiết và xử lý.']
+
+    enqueue_email(
+        subject=f'[Phản ánh mới] {len(feedbacks)} phản ánh từ {source_label}',
+        body='\n'.join(lines),
+        recipients=getattr(settings, 'ADMIN_EMAILS', []),
+    )
+
+
+def ingest_lines(lines, source, batch_size=BATCH_SIZE):
+    """
+    Tiếp nhận các dòng JSONL theo lô batch_size. Mỗi lô một transaction và
+    một email tổng hợp. Trả danh sách kết quả theo thứ tự dòng:
+    {'line', 'tracking_code'} hoặc {'line', 'errors'}.
+    """
+    categories = category_lookup()
+    results = []
+    pending = []
+
+    def flush():
+        # Admin được thông báo qua email tổng hợp của lô, không qua bản tổng hợp định kỳ
+        notified_at = timezone.now()
+        for _, feedback in pending:
+            feedback.admin_notified_at = notified_at
+        with transaction.atomic():
+            insert_batch([feedback for _, feedback in pending])
+            send_digest([feedback for _, feedback in pending], source)
+        for number, feedback in pending:
+            results.append({'line': number, 'tracking_code': feedback.tracking_code})
+        pending.clear()
+
+    for number, feedback, errors in parse_lines(lines, categories, source):
+        if errors:
+            results.append({'line': number, 'errors': errors})
+            continue
+        pending.append((number, feedback))
+        if len(pending) >= batch_size:
+            flush()
+    if pending:
+        flush()
+
+    results.sort(key=lambda result: result['line'])
+    return results
@@ -0,0 +1,18 @@
+"""
+Nâng mức cảnh báo các phản ánh quá thời hạn xử lý (xem feedback/sla.py)
+
+    python manage.py check_feedback_sla
+
+Nên chạy mỗi phút (cron). Chỉ đọc các phản ánh còn mở qua partial index.
+"""
+from django.core.management.base import BaseCommand
+
+from feedback.sla import escalate
+
+
+class Command(BaseCommand):
+    help = 'Đánh dấu và nâng mức các phản ánh quá thời hạn xử lý'
+
+    def handle(self, *args, **options):
+        escalated = escalate()
+        self.stdout.write(self.style.SUCCESS(f'Đã nâng mức {len(escalated)} phản ánh quá hạn.'))
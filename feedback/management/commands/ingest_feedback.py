@@ -0,0 +1,50 @@
+"""
+Nhập phản ánh theo lô từ file JSONL của kênh đối tác (xem feedback/ingest.py)
+
+    python manage.py ingest_feedback hotline-2025-01-01.jsonl --source hotline
+    cat zalo.jsonl | python manage.py ingest_feedback - --source zalo --batch-size 2000
+
+Mỗi lô một transaction và một email tổng hợp cho admin. Dòng lỗi được ghi ra
+stderr kèm số dòng, các dòng hợp lệ vẫn được nhập.
+"""
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback.ingest import BATCH_SIZE, ingest_lines
+from feedback.models import Feedback
+
+
+class Command(BaseCommand):
+    help = 'Nhập phản ánh từ file JSONL (mỗi dòng một phản ánh)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Đường dẫn file JSONL, "-" để đọc từ stdin')
+        parser.add_argument(
+            '--source',
+            required=True,
+            choices=[value for value, _ in Feedback.SOURCE_CHOICES],
+            help='Kênh tiếp nhận',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Số phản ánh mỗi lô')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size phải lớn hơn 0')
+
+        if options['path'] == '-':
+            results = ingest_lines(sys.stdin.buffer, options['source'], options['batch_size'])
+        else:
+            try:
+                with open(options['path'], 'rb') as lines:
+                    results = ingest_lines(lines, options['source'], options['batch_size'])
+            except OSError as e:
+                raise CommandError(f'Không đọc được file: {e}')
+
+        failed = [result for result in results if 'errors' in result]
+        for result in failed:
+            self.stderr.write(f"Dòng {result['line']}: {json.dumps(result['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã nhập {len(results) - len(failed)} phản ánh, {len(failed)} dòng lỗi.'
+        ))
@@ -0,0 +1,43 @@
+"""
+Xử lý các ảnh phản ánh chưa được nén / tạo ảnh thu nhỏ
+
+    python manage.py process_feedback_images
+    python manage.py process_feedback_images --workers 4
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from feedback.images import logger, process_feedback_image, run_in_worker
+from feedback.models import FeedbackImage
+
+
+class Command(BaseCommand):
+    help = 'Nén ảnh và tạo ảnh thu nhỏ cho các FeedbackImage chưa được xử lý'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Số luồng xử lý song song')
+        parser.add_argument('--limit', type=int, help='Số ảnh tối đa xử lý trong lần chạy này')
+
+    def handle(self, *args, **options):
+        pending = FeedbackImage.objects.filter(processed_at__isnull=True).order_by('pk')
+        image_ids = list(pending.values_list('pk', flat=True)[:options['limit']])
+
+        workers = options['workers']
+        if connection.vendor == 'sqlite':
+            # SQLite chỉ cho một tiến trình ghi tại một thời điểm
+            workers = 1
+
+        if workers == 1:
+            for image_id in image_ids:
+                # Như run_in_worker: lỗi của một ảnh không dừng cả lần chạy
+                try:
+                    process_feedback_image(image_id)
+                except Exception:
+                    logger.exception('Không xử lý được ảnh phản ánh %s', image_id)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(run_in_worker, image_ids))
+
+        self.stdout.write(self.style.SUCCESS(f'Đã xử lý {len(image_ids)} ảnh.'))
@@ -0,0 +1,47 @@
+"""
+Cập nhật bảng tổng hợp thống kê phản ánh (FeedbackDailyStat)
+
+    python manage.py rollup_feedback_stats                    # các ngày thay đổi từ lần chạy trước
+    python manage.py rollup_feedback_stats --since 2025-01-01 # tính lại từ một ngày
+    python manage.py rollup_feedback_stats --full             # dựng lại toàn bộ
+
+Nên chạy định kỳ (cron, vài phút một lần). Phản ánh bị xóa không làm thay
+đổi updated_at; chạy --full định kỳ (ví dụ hằng tuần) để loại chúng khỏi
+thống kê.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from feedback.models import FeedbackDailyStat
+from feedback.stats import all_days, changed_days, last_rollup_at, rollup
+
+
+class Command(BaseCommand):
+    help = 'Cập nhật bảng tổng hợp thống kê phản ánh theo ngày'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Xóa và dựng lại toàn bộ bảng tổng hợp')
+        parser.add_argument('--since', help='Tính lại mọi ngày từ ngày này (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        # Mốc thời gian lấy trước khi đọc dữ liệu: thay đổi xảy ra trong lúc
+        # chạy sẽ được lần chạy sau tính lại
+        started = timezone.now()
+        last = last_rollup_at()
+
+        if options['full'] or last is None:
+            FeedbackDailyStat.objects.all().delete()
+            days = all_days()
+        elif options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since phải có dạng YYYY-MM-DD')
+            days = [day for day in all_days() if day >= since]
+        else:
+            days = changed_days(last)
+
+        day_count, rows = rollup(days, computed_at=started)
+        self.stdout.write(self.style.SUCCESS(f'Đã tổng hợp {day_count} ngày ({rows} dòng).'))
@@ -0,0 +1,47 @@
+"""
+Worker gửi email trong outbox
+
+    python manage.py run_outbox            # chạy liên tục
+    python manage.py run_outbox --once     # gửi các email đến hạn rồi thoát (dùng cho cron)
+
+Mỗi vòng, worker cũng xếp bản tổng hợp phản ánh mới cho admin nếu đến hạn
+(xem feedback/notifications.py); chỉ nên chạy một worker.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from feedback.notifications import send_due_digests
+from feedback.outbox import MAX_ATTEMPTS, process_batch
+
+
+class Command(BaseCommand):
+    help = 'Gửi các email đang chờ trong outbox theo lô'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Gửi hết email đến hạn rồi thoát')
+        parser.add_argument('--batch-size', type=int, default=50, help='Số email mỗi lô')
+        parser.add_argument('--interval', type=float, default=5, help='Số giây nghỉ khi hàng đợi trống')
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help='Số lần thử tối đa mỗi email')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            close_old_connections()
+            digested = send_due_digests()
+            if digested:
+                self.stdout.write(f'Đã tổng hợp {digested} phản ánh mới')
+            sent, failed = process_batch(options['batch_size'], options['max_attempts'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Đã gửi {sent}, lỗi {failed}')
+
+            if sent + failed < options['batch_size']:
+                # Hàng đợi đã hết email đến hạn
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Tổng cộng: đã gửi {total_sent}, lỗi {total_failed}'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feedback',
+            name='feedback_fe_status_35d074_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['status', '-created_at'], name='feedback_fe_status_212662_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['category', 'status'], name='feedback_fe_categor_4662a3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['priority', 'status'], name='feedback_fe_priorit_5ea4a2_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:09
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0002_feedback_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dedupe_key', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('subject', models.CharField(max_length=255, verbose_name='Tiêu đề')),
+                ('body', models.TextField(verbose_name='Nội dung')),
+                ('from_email', models.CharField(blank=True, max_length=255, verbose_name='Người gửi')),
+                ('recipients', models.JSONField(default=list, verbose_name='Người nhận')),
+                ('status', models.CharField(choices=[('pending', 'Chờ gửi'), ('sent', 'Đã gửi'), ('failed', 'Gửi thất bại')], default='pending', max_length=20, verbose_name='Trạng thái')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Số lần thử')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Lần thử tiếp theo')),
+                ('last_error', models.TextField(blank=True, verbose_name='Lỗi gần nhất')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Ngày gửi')),
+            ],
+            options={
+                'verbose_name': 'Email chờ gửi',
+                'verbose_name_plural': 'Hàng đợi email',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='feedback_ou_status_2aeda2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0003_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbackimage',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Thời gian xử lý'),
+        ),
+        migrations.AddField(
+            model_name='feedbackimage',
+            name='thumbnail_medium',
+            field=models.ImageField(blank=True, editable=False, upload_to='feedback_images/thumbs/%Y/%m/%d/', verbose_name='Ảnh xem trước'),
+        ),
+        migrations.AddField(
+            model_name='feedbackimage',
+            name='thumbnail_small',
+            field=models.ImageField(blank=True, editable=False, upload_to='feedback_images/thumbs/%Y/%m/%d/', verbose_name='Ảnh thu nhỏ'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0004_feedbackimage_thumbnails'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feedback',
+            name='feedback_fe_trackin_c4b222_idx',
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0005_remove_redundant_tracking_code_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Ngày gửi')),
+                ('status', models.CharField(choices=[('pending', 'Đang chờ xử lý'), ('processing', 'Đang xử lý'), ('resolved', 'Đã giải quyết'), ('rejected', 'Từ chối')], max_length=20, verbose_name='Trạng thái')),
+                ('priority', models.IntegerField(choices=[(1, 'Thấp'), (2, 'Trung bình'), (3, 'Cao'), (4, 'Khẩn cấp')], verbose_name='Mức độ ưu tiên')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Số phản ánh')),
+                ('resolved_count', models.PositiveIntegerField(default=0, verbose_name='Số phản ánh đã giải quyết')),
+                ('avg_resolution_seconds', models.FloatField(blank=True, null=True, verbose_name='Thời gian giải quyết TB (giây)')),
+                ('p90_resolution_seconds', models.FloatField(blank=True, null=True, verbose_name='Thời gian giải quyết P90 (giây)')),
+                ('computed_at', models.DateTimeField(verbose_name='Thời điểm tổng hợp')),
+            ],
+            options={
+                'verbose_name': 'Thống kê phản ánh theo ngày',
+                'verbose_name_plural': 'Thống kê phản ánh theo ngày',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['updated_at'], name='feedback_fe_updated_6135da_idx'),
+        ),
+        migrations.AddField(
+            model_name='feedbackdailystat',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='feedback.category', verbose_name='Danh mục'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackdailystat',
+            index=models.Index(fields=['day'], name='feedback_fe_day_4b43da_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+from feedback.geo import encode
+
+
+def backfill_geohash(apps, schema_editor):
+    Feedback = apps.get_model('feedback', 'Feedback')
+    located = Feedback.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    batch = []
+    for feedback in located.only('latitude', 'longitude').iterator(chunk_size=500):
+        feedback.geohash = encode(feedback.latitude, feedback.longitude)
+        batch.append(feedback)
+        if len(batch) >= 500:
+            Feedback.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Feedback.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0006_feedbackdailystat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, verbose_name='Geohash'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['geohash'], name='feedback_fe_geohash_880e79_idx'),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from feedback.minhash import content_signature
+
+
+def backfill_content_signature(apps, schema_editor):
+    Feedback = apps.get_model('feedback', 'Feedback')
+    batch = []
+    for feedback in Feedback.objects.only('title', 'content').iterator(chunk_size=500):
+        feedback.content_signature = content_signature(feedback.title, feedback.content)
+        batch.append(feedback)
+        if len(batch) >= 500:
+            Feedback.objects.bulk_update(batch, ['content_signature'])
+            batch = []
+    if batch:
+        Feedback.objects.bulk_update(batch, ['content_signature'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0007_feedback_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='content_signature',
+            field=models.CharField(blank=True, editable=False, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='feedback.feedback', verbose_name='Trùng với phản ánh'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['phone', 'created_at'], name='feedback_fe_phone_f4ff70_idx'),
+        ),
+        migrations.RunPython(backfill_content_signature, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+from feedback.search import SEARCH_INDEX_NAME, build_search_document
+from services.search import SEARCH_CONFIG
+
+
+def backfill_search_document(apps, schema_editor):
+    Feedback = apps.get_model('feedback', 'Feedback')
+    batch = []
+    for feedback in Feedback.objects.only('title', 'content', 'name', 'address').iterator(chunk_size=500):
+        feedback.search_document = build_search_document(feedback)
+        batch.append(feedback)
+        if len(batch) >= 500:
+            Feedback.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Feedback.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    Feedback = apps.get_model('feedback', 'Feedback')
+    schema_editor.add_index(Feedback, GinIndex(
+        SearchVector('search_document', config=SEARCH_CONFIG),
+        name=SEARCH_INDEX_NAME,
+    ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {SEARCH_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0008_feedback_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False, verbose_name='Chỉ mục tìm kiếm'),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
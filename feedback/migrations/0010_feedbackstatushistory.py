@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0009_feedback_search_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('pending', 'Đang chờ xử lý'), ('processing', 'Đang xử lý'), ('resolved', 'Đã giải quyết'), ('rejected', 'Từ chối')], max_length=20, verbose_name='Từ trạng thái')),
+                ('to_status', models.CharField(choices=[('pending', 'Đang chờ xử lý'), ('processing', 'Đang xử lý'), ('resolved', 'Đã giải quyết'), ('rejected', 'Từ chối')], max_length=20, verbose_name='Sang trạng thái')),
+                ('note', models.CharField(blank=True, max_length=500, verbose_name='Ghi chú')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Thời điểm')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Người thực hiện')),
+                ('feedback', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='feedback.feedback', verbose_name='Phản ánh')),
+            ],
+            options={
+                'verbose_name': 'Lịch sử trạng thái',
+                'verbose_name_plural': 'Lịch sử trạng thái',
+                'ordering': ['changed_at'],
+                'indexes': [models.Index(fields=['feedback', 'changed_at'], name='feedback_fe_feedbac_d5c839_idx')],
+            },
+        ),
+    ]
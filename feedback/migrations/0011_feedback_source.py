@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0010_feedbackstatushistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='source',
+            field=models.CharField(choices=[('web', 'Cổng thông tin'), ('hotline', 'Tổng đài'), ('zalo', 'Zalo')], default='web', max_length=20, verbose_name='Kênh tiếp nhận'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:29
+
+from django.db import migrations, models
+
+
+def mark_existing_notified(apps, schema_editor):
+    # Phản ánh cũ đã được thông báo từng cái khi gửi; không đưa vào bản tổng hợp đầu tiên
+    Feedback = apps.get_model('feedback', 'Feedback')
+    Feedback.objects.update(admin_notified_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0011_feedback_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='admin_notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Đã thông báo admin'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['admin_notified_at', 'priority'], name='feedback_fe_admin_n_b68812_idx'),
+        ),
+        migrations.RunPython(mark_existing_notified, migrations.RunPython.noop),
+    ]
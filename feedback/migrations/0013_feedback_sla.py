@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0012_feedback_admin_notified_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='sla_hours',
+            field=models.PositiveIntegerField(default=72, verbose_name='Thời hạn xử lý (giờ)'),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='escalation_level',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Trong hạn'), (1, 'Quá hạn'), (2, 'Quá hạn nghiêm trọng')], default=0, editable=False, verbose_name='Mức cảnh báo thời hạn'),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='sla_breached_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Quá hạn lúc'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'processing'])), fields=['status', 'created_at'], name='feedback_open_created_idx'),
+        ),
+    ]
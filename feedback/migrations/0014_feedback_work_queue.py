@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0013_feedback_sla'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='assignee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_feedback', to=settings.AUTH_USER_MODEL, verbose_name='Cán bộ xử lý'),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Giữ đến'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-priority', 'created_at'], name='feedback_queue_idx'),
+        ),
+    ]
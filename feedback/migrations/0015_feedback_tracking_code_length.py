@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0014_feedback_work_queue'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='feedback',
+            name='tracking_code',
+            field=models.CharField(editable=False, max_length=16, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0015_feedback_tracking_code_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbackimage',
+            name='processing_error',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Lỗi xử lý'),
+        ),
+    ]
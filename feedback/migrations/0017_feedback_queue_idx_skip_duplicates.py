@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0016_feedbackimage_processing_error'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feedback',
+            name='feedback_queue_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('duplicate_of__isnull', True), ('status', 'pending')), fields=['-priority', 'created_at'], name='feedback_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+"""
+Chữ ký MinHash cho nội dung phản ánh
+
+Tiêu đề + nội dung được bỏ dấu, tách từ rồi cắt thành các cặp từ liền nhau
+(shingle). Chữ ký gồm NUM_HASHES giá trị nhỏ nhất của các shingle sau
+NUM_HASHES hàm băm khác nhau, mỗi giá trị giữ 16 bit thấp, lưu thành chuỗi
+hex 128 ký tự. Tỷ lệ vị trí trùng nhau giữa hai chữ ký xấp xỉ độ tương đồng
+Jaccard giữa hai tập shingle.
+"""
+import hashlib
+import random
+
+from services.search import tokenize
+
+NUM_HASHES = 32
+SHINGLE_SIZE = 2
+SIGNATURE_LENGTH = NUM_HASHES * 4
+
+_PRIME = (1 << 61) - 1
+# Tham số cố định để chữ ký ổn định giữa các tiến trình và các lần triển khai
+_rng = random.Random(20240101)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+
+
+def shingles(text):
+    words = tokenize(text)
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def content_signature(*texts):
+    """Chữ ký MinHash (chuỗi hex) cho các đoạn văn bản, rỗng nếu không có từ nào"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for shingle in shingles(' '.join(text or '' for text in texts))
+    ]
+    if not hashes:
+        return ''
+    return ''.join(
+        '%04x' % (min((a * h + b) % _PRIME for h in hashes) & 0xFFFF)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(first, second):
+    """Độ tương đồng ước lượng (0..1) giữa hai chữ ký"""
+    if not first or not second or len(first) != len(second):
+        return 0.0
+    matches = sum(first[i:i + 4] == second[i:i + 4] for i in range(0, len(first), 4))
+    return matches / NUM_HASHES
@@ -1,7 +1,11 @@
 # feedback/models.py
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
-import uuid
+from .codes import generate_tracking_code
+from . import geo
+from .minhash import content_signature
+from .search import build_search_document
 
 class Category(models.Model):
     """Danh mục phản ánh"""
@@ -17,6 +21,8 @@ class Category(models.Model):
         ],
         verbose_name="Mức độ ưu tiên"
     )
+    # Thời hạn xử lý phản ánh thuộc danh mục (xem feedback/sla.py)
+    sla_hours = models.PositiveIntegerField(default=72, verbose_name="Thời hạn xử lý (giờ)")
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -44,8 +50,20 @@ class Feedback(models.Model):
         (4, 'Khẩn cấp'),
     ]
     
+    ESCALATION_CHOICES = [
+        (0, 'Trong hạn'),
+        (1, 'Quá hạn'),
+        (2, 'Quá hạn nghiêm trọng'),
+    ]
+    
+    SOURCE_CHOICES = [
+        ('web', 'Cổng thông tin'),
+        ('hotline', 'Tổng đài'),
+        ('zalo', 'Zalo'),
+    ]
+    
     # Mã tracking duy nhất
-    tracking_code = models.CharField(max_length=12, unique=True, editable=False)
+    tracking_code = models.CharField(max_length=16, unique=True, editable=False)
     
     # Thông tin người phản ánh
     name = models.CharField(
@@ -73,6 +91,14 @@ class Feedback(models.Model):
     title = models.CharField(max_length=200, verbose_name="Tiêu đề")
     content = models.TextField(verbose_name="Nội dung phản ánh")
     
+    # Kênh tiếp nhận (phản ánh từ tổng đài, Zalo được chuyển sang qua feedback/ingest.py)
+    source = models.CharField(
+        max_length=20,
+        choices=SOURCE_CHOICES,
+        default='web',
+        verbose_name="Kênh tiếp nhận"
+    )
+    
     # Trạng thái
     status = models.CharField(
         max_length=20,
@@ -97,6 +123,21 @@ class Feedback(models.Model):
         blank=True,
         verbose_name="Kinh độ"
     )
+    # Geohash của (latitude, longitude), tính trong save(); dùng cho truy vấn lân cận
+    geohash = models.CharField(max_length=12, blank=True, editable=False, verbose_name="Geohash")
+    
+    # Chữ ký MinHash của tiêu đề + nội dung, tính trong save(); dùng để phát hiện gửi trùng
+    content_signature = models.CharField(max_length=128, blank=True, editable=False)
+    # Văn bản đã bỏ dấu dùng cho tìm kiếm trong admin (xem feedback/search.py)
+    search_document = models.TextField(blank=True, editable=False, verbose_name="Chỉ mục tìm kiếm")
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+        verbose_name="Trùng với phản ánh"
+    )
     
     # Phản hồi từ admin
     admin_note = models.TextField(blank=True, verbose_name="Ghi chú của admin")
@@ -105,6 +146,27 @@ class Feedback(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày gửi")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Cập nhật lần cuối")
     resolved_at = models.DateTimeField(null=True, blank=True, verbose_name="Ngày giải quyết")
+    # Cán bộ đang nhận xử lý (hàng đợi "nhận phản ánh tiếp theo", xem feedback/queue.py)
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='assigned_feedback',
+        verbose_name="Cán bộ xử lý"
+    )
+    lease_expires_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Giữ đến")
+    
+    # Theo dõi thời hạn xử lý, do lệnh check_feedback_sla cập nhật
+    escalation_level = models.PositiveSmallIntegerField(
+        choices=ESCALATION_CHOICES,
+        default=0,
+        editable=False,
+        verbose_name="Mức cảnh báo thời hạn"
+    )
+    sla_breached_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Quá hạn lúc")
+    # Thời điểm admin được thông báo (ngay hoặc qua bản tổng hợp, xem feedback/notifications.py)
+    admin_notified_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Đã thông báo admin")
     
     class Meta:
         verbose_name = "Phản ánh"
@@ -112,27 +174,95 @@ class Feedback(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
-            models.Index(fields=['tracking_code']),
-            models.Index(fields=['status']),
+            # Khớp các tổ hợp lọc thực tế của feedback_list
+            models.Index(fields=['status', '-created_at']),
+            models.Index(fields=['category', 'status']),
+            models.Index(fields=['priority', 'status']),
+            # rollup_feedback_stats tìm các phản ánh thay đổi từ lần chạy trước
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['geohash']),
+            # Tìm phản ánh gần đây của cùng người gửi khi kiểm tra gửi trùng
+            models.Index(fields=['phone', 'created_at']),
+            # Bản tổng hợp thông báo tìm các phản ánh chưa thông báo theo mức độ
+            models.Index(fields=['admin_notified_at', 'priority']),
+            # Lệnh check_feedback_sla chỉ quét các phản ánh chưa xử lý xong
+            models.Index(
+                fields=['status', 'created_at'],
+                condition=models.Q(status__in=['pending', 'processing']),
+                name='feedback_open_created_idx',
+            ),
+            # Hàng đợi xử lý: phản ánh đang chờ theo mức độ giảm dần rồi cũ trước
+            models.Index(
+                fields=['-priority', 'created_at'],
+                condition=models.Q(status='pending', duplicate_of__isnull=True),
+                name='feedback_queue_idx',
+            ),
         ]
     
+    # Số lần sinh lại mã khi trùng (hai phản ánh cùng ngày trùng 60 bit ngẫu nhiên, gần như không xảy ra)
+    TRACKING_CODE_ATTEMPTS = 5
+    
+    # Trường tính trong save() -> các trường nguồn
+    DERIVED_FIELDS = {
+        'geohash': ('latitude', 'longitude'),
+        'content_signature': ('title', 'content'),
+        'search_document': ('title', 'content', 'name', 'address', 'is_anonymous'),
+    }
+    
     def save(self, *args, **kwargs):
-        if not self.tracking_code:
-            self.tracking_code = self.generate_tracking_code()
+        self.compute_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # Các trường tính từ trường khác được lưu cùng trường nguồn
+            derived = {
+                derived_field
+                for derived_field, sources in self.DERIVED_FIELDS.items()
+                if set(sources) & set(update_fields)
+            }
+            kwargs['update_fields'] = {*update_fields, *derived}
+        
+        if self.tracking_code:
+            super().save(*args, **kwargs)
+            return
         
+        for attempt in range(self.TRACKING_CODE_ATTEMPTS):
+            self.tracking_code = self.generate_tracking_code()
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                collided = Feedback.objects.filter(tracking_code=self.tracking_code).exists()
+                self.tracking_code = ''
+                if not collided or attempt == self.TRACKING_CODE_ATTEMPTS - 1:
+                    raise
+    
+    def compute_derived_fields(self):
+        """Các trường tính từ trường khác; gọi thủ công trước bulk_create"""
         # Tự động set tên là "Ẩn danh" nếu checkbox được chọn
         if self.is_anonymous:
             self.name = "Ẩn danh"
         
+        # Phản ánh mới: mức độ không thấp hơn mức ưu tiên của danh mục
+        if self._state.adding and self.category is not None:
+            self.priority = max(self.priority, self.category.priority_level)
+        
         # Tự động cập nhật resolved_at khi status = resolved
         if self.status == 'resolved' and not self.resolved_at:
             self.resolved_at = timezone.now()
         
-        super().save(*args, **kwargs)
+        self.geohash = self.compute_geohash()
+        self.content_signature = content_signature(self.title, self.content)
+        self.search_document = build_search_document(self)
+    
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return ''
+        return geo.encode(self.latitude, self.longitude)
     
     def generate_tracking_code(self):
-        """Tạo mã tracking duy nhất"""
-        return uuid.uuid4().hex[:12].upper()
+        """Tạo mã tracking theo thời gian + ngẫu nhiên + ký tự kiểm tra (xem feedback/codes.py)"""
+        return generate_tracking_code()
     
     def get_display_name(self):
         """Trả về tên hiển thị"""
@@ -142,6 +272,39 @@ class Feedback(models.Model):
         return f"{self.tracking_code} - {self.title[:50]}"
 
 
+class FeedbackStatusHistory(models.Model):
+    """Lịch sử chuyển trạng thái của phản ánh (xem feedback/transitions.py)"""
+    feedback = models.ForeignKey(
+        Feedback,
+        on_delete=models.CASCADE,
+        related_name='status_history',
+        verbose_name="Phản ánh"
+    )
+    from_status = models.CharField(max_length=20, choices=Feedback.STATUS_CHOICES, verbose_name="Từ trạng thái")
+    to_status = models.CharField(max_length=20, choices=Feedback.STATUS_CHOICES, verbose_name="Sang trạng thái")
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Người thực hiện"
+    )
+    note = models.CharField(max_length=500, blank=True, verbose_name="Ghi chú")
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name="Thời điểm")
+    
+    class Meta:
+        verbose_name = "Lịch sử trạng thái"
+        verbose_name_plural = "Lịch sử trạng thái"
+        ordering = ['changed_at']
+        indexes = [
+            models.Index(fields=['feedback', 'changed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.feedback_id}: {self.from_status} -> {self.to_status}"
+
+
 class FeedbackImage(models.Model):
     """Model cho hình ảnh đính kèm"""
     feedback = models.ForeignKey(
@@ -154,8 +317,24 @@ class FeedbackImage(models.Model):
         upload_to='feedback_images/%Y/%m/%d/',
         verbose_name="Hình ảnh"
     )
+    # Ảnh thu nhỏ do feedback.images tạo ra sau khi tải lên
+    thumbnail_small = models.ImageField(
+        upload_to='feedback_images/thumbs/%Y/%m/%d/',
+        blank=True,
+        editable=False,
+        verbose_name="Ảnh thu nhỏ"
+    )
+    thumbnail_medium = models.ImageField(
+        upload_to='feedback_images/thumbs/%Y/%m/%d/',
+        blank=True,
+        editable=False,
+        verbose_name="Ảnh xem trước"
+    )
     caption = models.CharField(max_length=200, blank=True, verbose_name="Chú thích")
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name="Thời gian tải lên")
+    processed_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Thời gian xử lý")
+    # Ảnh hỏng không xử lý được: vẫn có processed_at để không bị thử lại mãi
+    processing_error = models.CharField(max_length=255, blank=True, editable=False, verbose_name="Lỗi xử lý")
     
     class Meta:
         verbose_name = "Hình ảnh"
@@ -163,4 +342,90 @@ class FeedbackImage(models.Model):
         ordering = ['uploaded_at']
     
     def __str__(self):
-        return f"Image for {self.feedback.tracking_code}"
\ No newline at end of file
+        return f"Image for {self.feedback.tracking_code}"
+    
+    @property
+    def thumbnail_small_url(self):
+        """URL ảnh thu nhỏ, dùng ảnh gốc nếu chưa xử lý xong"""
+        return (self.thumbnail_small or self.image).url
+    
+    @property
+    def thumbnail_medium_url(self):
+        """URL ảnh xem trước, dùng ảnh gốc nếu chưa xử lý xong"""
+        return (self.thumbnail_medium or self.image).url
+
+class OutboxMessage(models.Model):
+    """Email chờ gửi, được ghi cùng transaction với dữ liệu và gửi bởi worker run_outbox"""
+    STATUS_CHOICES = [
+        ('pending', 'Chờ gửi'),
+        ('sent', 'Đã gửi'),
+        ('failed', 'Gửi thất bại'),
+    ]
+    
+    # Khóa chống trùng: cùng một sự kiện chỉ tạo một email
+    dedupe_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    subject = models.CharField(max_length=255, verbose_name="Tiêu đề")
+    body = models.TextField(verbose_name="Nội dung")
+    from_email = models.CharField(max_length=255, blank=True, verbose_name="Người gửi")
+    recipients = models.JSONField(default=list, verbose_name="Người nhận")
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name="Trạng thái"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Số lần thử")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Lần thử tiếp theo")
+    last_error = models.TextField(blank=True, verbose_name="Lỗi gần nhất")
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Ngày gửi")
+    
+    class Meta:
+        verbose_name = "Email chờ gửi"
+        verbose_name_plural = "Hàng đợi email"
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+
+
+class FeedbackDailyStat(models.Model):
+    """
+    Bảng tổng hợp theo ngày gửi × danh mục × trạng thái × mức độ, do lệnh
+    rollup_feedback_stats cập nhật. Trang thống kê chỉ đọc bảng này.
+    """
+    day = models.DateField(verbose_name="Ngày gửi")
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Danh mục"
+    )
+    status = models.CharField(max_length=20, choices=Feedback.STATUS_CHOICES, verbose_name="Trạng thái")
+    priority = models.IntegerField(choices=Feedback.PRIORITY_CHOICES, verbose_name="Mức độ ưu tiên")
+    
+    count = models.PositiveIntegerField(default=0, verbose_name="Số phản ánh")
+    # Thời gian giải quyết (resolved_at - created_at) của các phản ánh đã có resolved_at
+    resolved_count = models.PositiveIntegerField(default=0, verbose_name="Số phản ánh đã giải quyết")
+    avg_resolution_seconds = models.FloatField(null=True, blank=True, verbose_name="Thời gian giải quyết TB (giây)")
+    p90_resolution_seconds = models.FloatField(null=True, blank=True, verbose_name="Thời gian giải quyết P90 (giây)")
+    
+    computed_at = models.DateTimeField(verbose_name="Thời điểm tổng hợp")
+    
+    class Meta:
+        verbose_name = "Thống kê phản ánh theo ngày"
+        verbose_name_plural = "Thống kê phản ánh theo ngày"
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.get_status_display()} - {self.count}"
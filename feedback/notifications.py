@@ -0,0 +1,169 @@
+"""
+Thông báo phản ánh mới cho admin theo mức độ ưu tiên
+
+- Mức độ có chu kỳ 0 (mặc định: Khẩn cấp) được gửi ngay khi tiếp nhận
+- Các mức còn lại chờ bản tổng hợp: khi phản ánh cũ nhất chưa thông báo của
+  một mức đã chờ đủ chu kỳ của mức đó, mọi phản ánh đang chờ của các mức đến
+  hạn được gộp vào một email
+
+Phản ánh đã được thông báo có admin_notified_at. Bản tổng hợp do worker
+run_outbox gọi send_due_digests() mỗi vòng; khóa trong cache (cache.add)
+ngăn nhiều worker cùng lập một bản tổng hợp.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import Feedback
+from .outbox import enqueue_email
+
+# Mức độ ưu tiên -> số phút gom thành bản tổng hợp (0 = gửi ngay)
+DEFAULT_POLICY = {4: 0, 3: 10, 2: 30, 1: 60}
+# Số phản ánh liệt kê chi tiết trong một bản tổng hợp
+DIGEST_MAX_ROWS = 100
+UPDATE_CHUNK_SIZE = 500
+DIGEST_LOCK_KEY = 'feedback:digest-lock'
+DIGEST_LOCK_TIMEOUT = 300
+
+
+def get_policy():
+    return {**DEFAULT_POLICY, **getattr(settings, 'FEEDBACK_NOTIFY_POLICY', {})}
+
+
+def is_immediate(priority):
+    return get_policy().get(priority, 0) == 0
+
+
+def admin_recipients():
+    return getattr(settings, 'ADMIN_EMAILS', [])
+
+
+def send_notification_to_admin(feedback, image_count=0):
+    """
+    Gọi trong transaction của submit_feedback ngay sau khi lưu phản ánh.
+    Phản ánh khẩn cấp được xếp email vào outbox ngay; các mức khác chờ bản
+    tổng hợp. image_count do view truyền vào để không phải đếm lại ảnh.
+    """
+    if not is_immediate(feedback.priority):
+        return None
+
+    subject = f'[Phản ánh mới] {feedback.get_priority_display()} - {feedback.title}'
+
+    message = f"""
+Có phản ánh mới từ hệ thống:
+
+Mã theo dõi: {feedback.tracking_code}
+Người gửi: {feedback.get_display_name()}
+Số điện thoại: {feedback.phone}
+Email: {feedback.email or 'Không có'}
+
+Danh mục: {feedback.category.name if feedback.category else 'Không xác định'}
+Mức độ: {feedback.get_priority_display()}
+
+Tiêu đề: {feedback.title}
+Nội dung:
+{feedback.content}
+
+Địa chỉ: {feedback.address or 'Không có'}
+
+Số hình ảnh đính kèm: {image_count}
+
+Thời gian: {timezone.localtime(feedback.created_at).strftime('%d/%m/%Y %H:%M')}
+
+---
+Vui lòng đăng nhập vào hệ thống để xem chi tiết và xử lý.
+    """
+
+    Feedback.objects.filter(pk=feedback.pk).update(admin_notified_at=timezone.now())
+    return enqueue_email(
+        subject=subject,
+        body=message,
+        recipients=admin_recipients(),
+        dedupe_key=f'feedback-new:{feedback.tracking_code}',
+    )
+
+
+def pending_feedback():
+    """Phản ánh (không phải bản trùng) chưa được thông báo cho admin"""
+    return Feedback.objects.filter(admin_notified_at__isnull=True, duplicate_of__isnull=True)
+
+
+def due_priorities(now):
+    """Các mức độ có phản ánh chờ lâu nhất đã vượt chu kỳ tổng hợp"""
+    policy = get_policy()
+    waiting = pending_feedback().order_by().values('priority').annotate(count=Count('id'), oldest=Min('created_at'))
+    return [
+        row['priority'] for row in waiting
+        if now - row['oldest'] >= timedelta(minutes=policy.get(row['priority'], 0))
+    ]
+
+
+def render_digest(rows, now):
+    """(tiêu đề, nội dung) của bản tổng hợp từ các dòng đã sắp theo mức độ giảm dần"""
+    priority_labels = dict(Feedback.PRIORITY_CHOICES)
+    by_priority = {}
+    for row in rows:
+        by_priority[row['priority']] = by_priority.get(row['priority'], 0) + 1
+
+    lines = [
+        f'Tổng hợp {len(rows)} phản ánh mới tính đến {timezone.localtime(now).strftime("%d/%m/%Y %H:%M")}.',
+        '',
+        *(f'  {priority_labels.get(priority, priority)}: {count}' for priority, count in by_priority.items()),
+        '',
+    ]
+    for row in rows[:DIGEST_MAX_ROWS]:
+        lines.append(
+            f"{row['tracking_code']} | {priority_labels.get(row['priority'], row['priority'])} | "
+            f"{row['category__name'] or 'Không xác định'} | {row['title']} | "
+            f"{row['image_count']} ảnh | {timezone.localtime(row['created_at']).strftime('%d/%m %H:%M')}"
+        )
+    if len(rows) > DIGEST_MAX_ROWS:
+        lines.append(f'... và {len(rows) - DIGEST_MAX_ROWS} phản ánh khác')
+    lines += ['', '---', 'Vui lòng đăng nhập vào hệ thống để xem chi tiết và xử lý.']
+
+    subject = f'[Tổng hợp phản ánh] {len(rows)} phản ánh mới'
+    return subject, '\n'.join(lines)
+
+
+def send_due_digests(now=None):
+    """Xếp một email tổng hợp vào outbox nếu có mức độ đến hạn. Trả số phản ánh đã tổng hợp."""
+    if not cache.add(DIGEST_LOCK_KEY, 1, DIGEST_LOCK_TIMEOUT):
+        # Worker khác đang lập bản tổng hợp
+        return 0
+    try:
+        return _send_due_digests(now or timezone.now())
+    finally:
+        cache.delete(DIGEST_LOCK_KEY)
+
+
+def _send_due_digests(now):
+    priorities = due_priorities(now)
+    if not priorities:
+        return 0
+
+    # Một truy vấn: phản ánh đang chờ kèm tên danh mục và số ảnh
+    rows = list(
+        pending_feedback().filter(priority__in=priorities, created_at__lte=now)
+        .values('pk', 'tracking_code', 'title', 'priority', 'category__name', 'created_at')
+        .annotate(image_count=Count('images'))
+        .order_by('-priority', 'created_at')
+    )
+    if not rows:
+        return 0
+
+    subject, body = render_digest(rows, now)
+    pks = [row['pk'] for row in rows]
+    with transaction.atomic():
+        enqueue_email(
+            subject=subject,
+            body=body,
+            recipients=admin_recipients(),
+            dedupe_key=f'feedback-digest:{now.isoformat()}',
+        )
+        for start in range(0, len(pks), UPDATE_CHUNK_SIZE):
+            Feedback.objects.filter(pk__in=pks[start:start + UPDATE_CHUNK_SIZE]).update(admin_notified_at=now)
+    return len(rows)
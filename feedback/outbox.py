@@ -0,0 +1,134 @@
+"""
+Outbox cho email thông báo
+
+Request chỉ ghi một OutboxMessage trong cùng transaction với dữ liệu; worker
+`manage.py run_outbox` lấy các email đến hạn theo lô, gửi qua một kết nối
+SMTP dùng chung và thử lại với backoff tăng dần khi lỗi.
+
+Mỗi lô được "thuê" (lease) bằng cách đẩy next_attempt_at về tương lai trước
+khi gửi; nếu worker chết giữa chừng, email sẽ được gửi lại khi hết hạn thuê
+(at-least-once). Nhiều worker chạy song song không lấy trùng email:
+- PostgreSQL: SELECT ... FOR UPDATE SKIP LOCKED rồi UPDATE trong cùng
+  transaction
+- backend không có SKIP LOCKED (SQLite): mỗi email được nhận bằng UPDATE có
+  điều kiện next_attempt_at chưa đổi (compare-and-set), email worker khác
+  vừa nhận bị bỏ qua (như feedback/queue.py)
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+LEASE_SECONDS = 300
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 6 * 60 * 60
+MAX_ATTEMPTS = 8
+
+
+def enqueue_email(subject, body, recipients, dedupe_key=None, from_email=None):
+    """
+    Ghi email vào outbox. Gọi bên trong transaction của request để email chỉ
+    tồn tại khi dữ liệu đã được commit. Trả None nếu dedupe_key đã tồn tại.
+    """
+    if not recipients:
+        return None
+    try:
+        with transaction.atomic():
+            return OutboxMessage.objects.create(
+                dedupe_key=dedupe_key,
+                subject=subject[:255],
+                body=body,
+                from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+                recipients=list(recipients),
+            )
+    except IntegrityError:
+        return None
+
+
+def backoff_delay(attempts):
+    """Thời gian chờ trước lần thử tiếp theo: 30s, 60s, 120s... tối đa 6 giờ"""
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def claim_batch(batch_size):
+    """Lấy các email đến hạn và đặt lease để worker khác không lấy trùng"""
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=LEASE_SECONDS)
+    with transaction.atomic():
+        due = OutboxMessage.objects.filter(status='pending', next_attempt_at__lte=now)
+        if connection.features.has_select_for_update_skip_locked:
+            messages = list(due.select_for_update(skip_locked=True).order_by('next_attempt_at')[:batch_size])
+            if messages:
+                OutboxMessage.objects.filter(pk__in=[m.pk for m in messages]).update(next_attempt_at=lease_until)
+            return messages
+
+        claimed = []
+        for message in due.order_by('next_attempt_at')[:batch_size]:
+            # Chỉ nhận được nếu chưa worker nào đổi next_attempt_at kể từ lúc đọc
+            if OutboxMessage.objects.filter(
+                pk=message.pk, status='pending', next_attempt_at=message.next_attempt_at,
+            ).update(next_attempt_at=lease_until):
+                claimed.append(message)
+    return claimed
+
+
+def process_batch(batch_size=50, max_attempts=MAX_ATTEMPTS):
+    """Gửi một lô email đến hạn qua một kết nối SMTP. Trả về (đã gửi, lỗi)."""
+    messages = claim_batch(batch_size)
+    if not messages:
+        return 0, 0
+
+    sent = failed = 0
+    mail_connection = get_connection()
+    try:
+        mail_connection.open()
+    except Exception as e:
+        # Không mở được kết nối: trả cả lô về hàng đợi với backoff
+        for message in messages:
+            mark_failed(message, e, max_attempts)
+        return 0, len(messages)
+
+    try:
+        for message in messages:
+            email = EmailMessage(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=message.recipients,
+                connection=mail_connection,
+            )
+            try:
+                email.send(fail_silently=False)
+            except Exception as e:
+                mark_failed(message, e, max_attempts)
+                failed += 1
+            else:
+                mark_sent(message)
+                sent += 1
+    finally:
+        mail_connection.close()
+
+    return sent, failed
+
+
+def mark_sent(message):
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        status='sent',
+        sent_at=timezone.now(),
+        attempts=message.attempts + 1,
+        last_error='',
+    )
+
+
+def mark_failed(message, error, max_attempts):
+    attempts = message.attempts + 1
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        status='failed' if attempts >= max_attempts else 'pending',
+        attempts=attempts,
+        next_attempt_at=timezone.now() + backoff_delay(attempts),
+        last_error=str(error)[:2000],
+    )
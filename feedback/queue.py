@@ -0,0 +1,76 @@
+"""
+Hàng đợi xử lý phản ánh cho cán bộ
+
+"Nhận phản ánh tiếp theo" trả phản ánh đang chờ có mức độ cao nhất, cũ nhất
+mà chưa ai giữ (hoặc đã hết hạn giữ), rồi gán cho cán bộ kèm thời hạn giữ
+LEASE_MINUTES. Hết hạn mà phản ánh vẫn đang chờ thì người khác nhận được.
+
+- PostgreSQL: SELECT ... FOR UPDATE SKIP LOCKED, nhiều cán bộ nhận cùng lúc
+  không chờ nhau và không nhận trùng
+- SQLite (không có SKIP LOCKED): UPDATE có điều kiện "chưa ai giữ" làm
+  compare-and-set; nếu người khác vừa nhận thì thử dòng kế tiếp
+
+Thứ tự (-priority, created_at) khớp partial index feedback_queue_idx.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Feedback
+
+LEASE_MINUTES = 30
+CLAIM_ATTEMPTS = 5
+QUEUE_ORDERING = ('-priority', 'created_at', 'pk')
+
+
+def unleased(now):
+    return Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now)
+
+
+def claimable(now):
+    """Phản ánh đang chờ, chưa ai giữ hoặc đã hết hạn giữ; bỏ qua bản trùng đã liên kết tới bản gốc"""
+    return Feedback.objects.filter(unleased(now), status='pending', duplicate_of__isnull=True)
+
+
+def claim_next(user, now=None, lease_minutes=LEASE_MINUTES):
+    """Gán phản ánh tiếp theo trong hàng đợi cho user; None nếu hàng đợi trống"""
+    now = now or timezone.now()
+    lease_expires_at = now + timedelta(minutes=lease_minutes)
+
+    for _ in range(CLAIM_ATTEMPTS):
+        with transaction.atomic():
+            candidates = claimable(now).order_by(*QUEUE_ORDERING)
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            feedback = candidates.first()
+            if feedback is None:
+                return None
+
+            claimed = Feedback.objects.filter(unleased(now), pk=feedback.pk, status='pending').update(
+                assignee=user,
+                lease_expires_at=lease_expires_at,
+            )
+        if claimed:
+            feedback.assignee = user
+            feedback.lease_expires_at = lease_expires_at
+            return feedback
+        # Cán bộ khác vừa nhận dòng này (chỉ xảy ra khi không có SKIP LOCKED)
+    return None
+
+
+def is_held_by_other(feedback, user, now=None):
+    """Phản ánh đang được cán bộ khác giữ (còn hạn)"""
+    now = now or timezone.now()
+    return (
+        feedback.assignee_id is not None
+        and feedback.assignee_id != user.pk
+        and feedback.lease_expires_at is not None
+        and feedback.lease_expires_at > now
+    )
+
+
+def release(feedback, user):
+    """Trả phản ánh về hàng đợi; chỉ người đang giữ mới trả được"""
+    return Feedback.objects.filter(pk=feedback.pk, assignee=user).update(assignee=None, lease_expires_at=None)
@@ -0,0 +1,63 @@
+"""
+Tìm kiếm phản ánh trong admin
+
+Tìm bằng icontains trên nhiều cột (mặc định của admin) phải quét toàn bảng.
+Thay vào đó, từ khóa được chuyển tới cột có index phù hợp:
+- mã theo dõi -> unique index tracking_code
+- số điện thoại -> index (phone, created_at)
+- từ khóa khác -> search_document (tiêu đề, nội dung, tên, địa chỉ đã bỏ
+  dấu, xem services/search.py); trên PostgreSQL dùng GIN index
+  to_tsvector('simple', search_document), backend khác dùng icontains
+"""
+import re
+
+from django.db import connections
+
+from services.search import SEARCH_CONFIG, fold_diacritics, tokenize
+
+from .codes import is_valid_tracking_code, normalize_tracking_code
+
+SEARCH_FIELDS = ['title', 'content', 'name', 'address']
+SEARCH_INDEX_NAME = 'feedback_search_gin'
+
+PHONE_RE = re.compile(r'^\+?[\d\s.-]{8,20}$')
+
+
+def build_search_document(feedback):
+    """Ghép các trường tìm kiếm của một phản ánh thành văn bản đã bỏ dấu"""
+    parts = [getattr(feedback, field, '') or '' for field in SEARCH_FIELDS]
+    return fold_diacritics(' '.join(part for part in parts if part))
+
+
+def search_feedback(queryset, query):
+    query = query.strip()
+    if not query:
+        return queryset
+
+    code = normalize_tracking_code(query)
+    if is_valid_tracking_code(code):
+        return queryset.filter(tracking_code=code)
+
+    if PHONE_RE.match(query):
+        # Số được lưu như người dân nhập: thử cả dạng gốc và dạng chỉ còn chữ số
+        return queryset.filter(phone__in={query, re.sub(r'[^\d+]', '', query)})
+
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        # Import tại chỗ để môi trường không có psycopg vẫn chạy được
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        return queryset.annotate(
+            search_vector=SearchVector('search_document', config=SEARCH_CONFIG)
+        ).filter(search_vector=SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            config=SEARCH_CONFIG,
+            search_type='raw',
+        ))
+
+    for term in terms:
+        queryset = queryset.filter(search_document__icontains=term)
+    return queryset
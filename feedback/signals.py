@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .images import schedule_processing
+from .models import Feedback, FeedbackImage
+from .tracking import invalidate_tracking
+
+
+@receiver(post_save, sender=FeedbackImage)
+def process_uploaded_image(sender, instance, created, raw=False, **kwargs):
+    """Nén ảnh và tạo ảnh thu nhỏ sau khi ảnh mới được lưu (từ form hoặc admin)"""
+    if created and not raw:
+        schedule_processing([instance.pk])
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def invalidate_feedback_tracking(sender, instance, **kwargs):
+    """
+    Xóa bản tra cứu đã cache (cả kết quả "không tìm thấy") của phản ánh sau
+    khi transaction commit, để lượt tra cứu xen giữa không cache lại bản cũ
+    """
+    code = instance.tracking_code
+    transaction.on_commit(lambda: invalidate_tracking(code))
+
+
+@receiver(post_save, sender=FeedbackImage)
+@receiver(post_delete, sender=FeedbackImage)
+def invalidate_image_tracking(sender, instance, **kwargs):
+    code = instance.feedback.tracking_code
+    transaction.on_commit(lambda: invalidate_tracking(code))
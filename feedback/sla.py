@@ -0,0 +1,111 @@
+"""
+Theo dõi thời hạn xử lý (SLA) phản ánh
+
+Mỗi danh mục có thời hạn sla_hours (phản ánh không có danh mục dùng
+DEFAULT_SLA_HOURS). Lệnh `manage.py check_feedback_sla` (chạy mỗi phút) nâng
+mức cảnh báo của các phản ánh còn mở đã quá hạn:
+- mức 1 khi đã chờ quá 1 lần thời hạn: mức độ ít nhất là Cao
+- mức 2 khi đã chờ quá 2 lần thời hạn: mức độ Khẩn cấp
+
+Với mỗi danh mục, mốc thời gian là hằng số nên truy vấn là một khoảng
+created_at trên partial index (status, created_at) chỉ chứa phản ánh
+pending/processing; không quét phản ánh đã đóng. Mỗi lần chạy gửi tối đa một
+email liệt kê các phản ánh vừa bị nâng mức.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Category, Feedback
+from .outbox import enqueue_email
+from .tracking import invalidate_tracking_many
+
+OPEN_STATUSES = ['pending', 'processing']
+DEFAULT_SLA_HOURS = getattr(settings, 'FEEDBACK_DEFAULT_SLA_HOURS', 72)
+
+# Mức cảnh báo -> (bội số thời hạn, mức độ ưu tiên tối thiểu)
+ESCALATION_LEVELS = {
+    1: (1, 3),
+    2: (2, 4),
+}
+
+
+def sla_deadline(feedback):
+    """Hạn xử lý của một phản ánh"""
+    hours = feedback.category.sla_hours if feedback.category else DEFAULT_SLA_HOURS
+    return feedback.created_at + timedelta(hours=hours)
+
+
+def sla_targets():
+    """[(category_id hoặc None, số giờ)] cho mọi danh mục và phản ánh không có danh mục"""
+    targets = list(Category.objects.values_list('id', 'sla_hours'))
+    targets.append((None, DEFAULT_SLA_HOURS))
+    return targets
+
+
+def overdue(category_id, cutoff, level):
+    """Phản ánh còn mở của danh mục, gửi trước cutoff và chưa đạt mức cảnh báo level"""
+    queryset = Feedback.objects.filter(
+        status__in=OPEN_STATUSES,
+        created_at__lt=cutoff,
+        escalation_level__lt=level,
+        # Bản trùng được xử lý cùng bản gốc, chỉ bản gốc bị tính quá hạn
+        duplicate_of__isnull=True,
+    ).order_by()
+    if category_id is None:
+        return queryset.filter(category__isnull=True)
+    return queryset.filter(category_id=category_id)
+
+
+def escalate(now=None):
+    """Nâng mức cảnh báo các phản ánh quá hạn; trả [(mức, dict phản ánh)]"""
+    now = now or timezone.now()
+    targets = sla_targets()
+    escalated = []
+
+    with transaction.atomic():
+        # Mức cao trước: phản ánh quá 2 lần thời hạn được nâng thẳng lên mức 2
+        for level, (multiple, min_priority) in sorted(ESCALATION_LEVELS.items(), reverse=True):
+            for category_id, hours in targets:
+                cutoff = now - timedelta(hours=hours * multiple)
+                rows = list(
+                    overdue(category_id, cutoff, level)
+                    .values('pk', 'tracking_code', 'title', 'created_at')
+                )
+                if not rows:
+                    continue
+                Feedback.objects.filter(pk__in=[row['pk'] for row in rows]).update(
+                    escalation_level=level,
+                    sla_breached_at=Coalesce('sla_breached_at', Value(now)),
+                    priority=Greatest('priority', Value(min_priority)),
+                    updated_at=now,
+                )
+                escalated.extend((level, row) for row in rows)
+
+        if escalated:
+            send_escalation_email(escalated, now)
+            codes = [row['tracking_code'] for _, row in escalated]
+            transaction.on_commit(lambda: invalidate_tracking_many(codes))
+    return escalated
+
+
+def send_escalation_email(escalated, now):
+    labels = dict(Feedback.ESCALATION_CHOICES)
+    lines = [f'{len(escalated)} phản ánh vừa quá hạn xử lý ({timezone.localtime(now).strftime("%d/%m/%Y %H:%M")}):', '']
+    for level, row in sorted(escalated, key=lambda item: (-item[0], item[1]['created_at'])):
+        lines.append(
+            f"{row['tracking_code']} | {labels[level]} | {row['title']} | "
+            f"gửi lúc {timezone.localtime(row['created_at']).strftime('%d/%m/%Y %H:%M')}"
+        )
+    lines += ['', '---', 'Vui lòng đăng nhập vào hệ thống để xem chi tiết và xử lý.']
+
+    enqueue_email(
+        subject=f'[Quá hạn xử lý] {len(escalated)} phản ánh',
+        body='\n'.join(lines),
+        recipients=getattr(settings, 'ADMIN_EMAILS', []),
+        dedupe_key=f'feedback-sla:{now.isoformat()}',
+    )
@@ -0,0 +1,157 @@
+"""
+Thống kê phản ánh từ bảng tổng hợp FeedbackDailyStat
+
+`manage.py rollup_feedback_stats` tính lại các ngày có phản ánh thay đổi kể từ
+lần chạy trước (theo updated_at); trang thống kê trong admin chỉ cộng dồn
+các dòng tổng hợp nên không phụ thuộc vào số năm dữ liệu trong Feedback.
+
+Ngày được tính theo múi giờ TIME_ZONE. P90 của nhiều ngày là trung bình
+P90 từng ngày có trọng số theo số phản ánh đã giải quyết (ước tính).
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Feedback, FeedbackDailyStat
+
+# Số ngày tối đa tính trong một lượt (giới hạn bộ nhớ khi tính P90)
+WINDOW_DAYS = 31
+BACKLOG_STATUSES = ('pending', 'processing')
+# Số ngày gần nhất hiển thị trong bảng theo ngày
+BY_DAY_LIMIT = 90
+
+
+def percentile(sorted_values, fraction):
+    """Percentile theo nearest-rank trên danh sách đã sắp xếp"""
+    return sorted_values[max(0, math.ceil(len(sorted_values) * fraction) - 1)]
+
+
+def day_bounds(first_day, last_day):
+    """Khoảng [đầu ngày first_day, đầu ngày sau last_day) theo giờ địa phương"""
+    start = timezone.make_aware(datetime.combine(first_day, time.min))
+    end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min))
+    return start, end
+
+
+def windows(days):
+    """Chia các ngày (đã sắp xếp) thành các đoạn liên tiếp dài tối đa WINDOW_DAYS"""
+    window = []
+    for day in days:
+        if window and (day - window[-1] != timedelta(days=1) or len(window) == WINDOW_DAYS):
+            yield window
+            window = []
+        window.append(day)
+    if window:
+        yield window
+
+
+def rollup_window(days, computed_at):
+    """Tính lại và ghi đè các dòng tổng hợp của một đoạn ngày liên tiếp"""
+    start, end = day_bounds(days[0], days[-1])
+    # Phản ánh đã liên kết tới bản gốc không phải việc mới nên không được đếm
+    feedbacks = Feedback.objects.filter(
+        created_at__gte=start, created_at__lt=end, duplicate_of__isnull=True,
+    ).annotate(
+        day=TruncDate('created_at')
+    )
+
+    counts = feedbacks.values('day', 'category_id', 'status', 'priority').annotate(count=Count('id'))
+
+    durations = defaultdict(list)
+    resolved = feedbacks.filter(status='resolved', resolved_at__isnull=False).values_list(
+        'day', 'category_id', 'status', 'priority', 'created_at', 'resolved_at'
+    )
+    for day, category_id, status, priority, created_at, resolved_at in resolved.iterator(chunk_size=5000):
+        durations[day, category_id, status, priority].append((resolved_at - created_at).total_seconds())
+
+    rows = []
+    for group in counts.order_by():
+        key = (group['day'], group['category_id'], group['status'], group['priority'])
+        values = sorted(durations.get(key, ()))
+        rows.append(FeedbackDailyStat(
+            day=group['day'],
+            category_id=group['category_id'],
+            status=group['status'],
+            priority=group['priority'],
+            count=group['count'],
+            resolved_count=len(values),
+            avg_resolution_seconds=sum(values) / len(values) if values else None,
+            p90_resolution_seconds=percentile(values, 0.9) if values else None,
+            computed_at=computed_at,
+        ))
+
+    with transaction.atomic():
+        FeedbackDailyStat.objects.filter(day__gte=days[0], day__lte=days[-1]).delete()
+        FeedbackDailyStat.objects.bulk_create(rows)
+    return len(rows)
+
+
+def changed_days(since):
+    """Các ngày gửi có phản ánh được tạo/cập nhật từ thời điểm since"""
+    return list(Feedback.objects.filter(updated_at__gte=since).dates('created_at', 'day'))
+
+
+def all_days():
+    return list(Feedback.objects.dates('created_at', 'day'))
+
+
+def rollup(days, computed_at=None):
+    """Tính lại các ngày cho trước; trả về (số ngày, số dòng tổng hợp)"""
+    computed_at = computed_at or timezone.now()
+    days = sorted(set(days))
+    rows = sum(rollup_window(window, computed_at) for window in windows(days))
+    return len(days), rows
+
+
+def last_rollup_at():
+    return FeedbackDailyStat.objects.aggregate(last=Max('computed_at'))['last']
+
+
+def summarize(stats, group_by=None):
+    """Cộng dồn các dòng tổng hợp, theo group_by nếu có"""
+    aggregates = {
+        'total': Sum('count'),
+        'backlog': Sum('count', filter=Q(status__in=BACKLOG_STATUSES)),
+        'resolved': Sum('resolved_count'),
+        'avg_weighted': Sum(F('avg_resolution_seconds') * F('resolved_count')),
+        'p90_weighted': Sum(F('p90_resolution_seconds') * F('resolved_count')),
+    }
+    if group_by:
+        rows = list(stats.values(*group_by).annotate(**aggregates).order_by(*group_by))
+    else:
+        rows = [stats.aggregate(**aggregates)]
+
+    for row in rows:
+        resolved = row['resolved'] or 0
+        row['total'] = row['total'] or 0
+        row['backlog'] = row['backlog'] or 0
+        row['avg_hours'] = row['avg_weighted'] / resolved / 3600 if resolved else None
+        row['p90_hours'] = row['p90_weighted'] / resolved / 3600 if resolved else None
+    return rows
+
+
+def dashboard(start_day=None, end_day=None):
+    """Số liệu cho trang thống kê trong khoảng ngày [start_day, end_day]"""
+    stats = FeedbackDailyStat.objects.all()
+    if start_day:
+        stats = stats.filter(day__gte=start_day)
+    if end_day:
+        stats = stats.filter(day__lte=end_day)
+
+    priority_labels = dict(Feedback.PRIORITY_CHOICES)
+    by_priority = summarize(stats, ['priority'])
+    for row in by_priority:
+        row['label'] = priority_labels.get(row['priority'], row['priority'])
+
+    return {
+        'totals': summarize(stats)[0],
+        'by_category': summarize(stats, ['category__name']),
+        'by_priority': by_priority,
+        'by_day': list(stats.values('day').annotate(total=Sum('count')).order_by('-day')[:BY_DAY_LIMIT]),
+        'last_rollup_at': last_rollup_at(),
+    }
@@ -1,3 +1,939 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO, StringIO
+from smtplib import SMTPException
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings, skipIfDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from . import geo
+from .codes import check_character, generate_tracking_code, generate_tracking_codes, is_valid_tracking_code, normalize_tracking_code
+from .images import MAX_DIMENSION, OUTPUT_FORMAT
+from .ingest import MAX_REQUEST_LINES
+from .minhash import content_signature, similarity
+from .notifications import send_due_digests
+from .outbox import claim_batch, enqueue_email
+from .queue import claim_next
+from .models import (
+    Category, Feedback, FeedbackDailyStat, FeedbackImage, FeedbackStatusHistory, OutboxMessage,
+)
+from .search import build_search_document
+from .sla import escalate
+from .tracking import TRACKING_BURST, get_tracking_snapshot
+from .transitions import transition
+from .uploads import MAX_IMAGE_SIZE, MAX_IMAGES
+from .views import MAP_MAX_PRECISION
+
+
+def create_feedback(**kwargs):
+    data = {
+        'name': 'Nguyễn Văn A',
+        'phone': '0987654321',
+        'title': 'Đường bị ngập',
+        'content': 'Đường Lê Lợi bị ngập sau mưa.',
+    }
+    data.update(kwargs)
+    return Feedback.objects.create(**data)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FeedbackListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Hạ tầng')
+        for i in range(30):
+            create_feedback(
+                title=f'Phản ánh {i}',
+                category=cls.category if i % 2 else None,
+                status='pending' if i % 3 else 'resolved',
+                priority=(i % 4) + 1,
+            )
+
+    def test_list_paginates_in_fixed_queries(self):
+        # Trang dữ liệu, GROUP BY đếm theo trạng thái/mức độ, danh mục cho bộ lọc
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('feedback_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['feedbacks']), 20)
+        self.assertEqual(response.context['total_feedbacks'], 30)
+        # Trang công khai không để lộ mã theo dõi
+        for tracking_code in Feedback.objects.values_list('tracking_code', flat=True):
+            self.assertNotContains(response, tracking_code)
+
+        cursor = response.context['page_obj'].next_cursor
+        response = self.client.get(reverse('feedback_list'), {'cursor': cursor})
+        self.assertEqual(len(response.context['feedbacks']), 10)
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_filters_and_facet_counts(self):
+        response = self.client.get(reverse('feedback_list'), {
+            'category': self.category.pk,
+            'status': 'pending',
+        })
+        expected = Feedback.objects.filter(category=self.category, status='pending')
+        self.assertEqual(response.context['total_feedbacks'], expected.count())
+        self.assertEqual(
+            {feedback.pk for feedback in response.context['feedbacks']},
+            set(expected.values_list('pk', flat=True)),
+        )
+        status_counts = {value: count for value, _, count in response.context['status_counts']}
+        self.assertEqual(
+            status_counts['resolved'],
+            Feedback.objects.filter(category=self.category, status='resolved').count(),
+        )
+
+    def test_invalid_filters_are_ignored(self):
+        response = self.client.get(reverse('feedback_list'), {'status': 'khong-co', 'priority': 'x'})
+        self.assertEqual(response.context['total_feedbacks'], 30)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ADMIN_EMAILS=['admin@example.com'])
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Hạ tầng')
+
+    def submit(self, **overrides):
+        data = {
+            'name': 'Nguyễn Văn A',
+            'phone': '0987654321',
+            'category': self.category.pk,
+            'priority': 4,
+            'title': 'Đường bị ngập',
+            'content': 'Đường Lê Lợi bị ngập sau mưa.',
+        }
+        data.update(overrides)
+        return self.client.post(reverse('submit_feedback'), data)
+
+    def run_outbox(self):
+        call_command('run_outbox', '--once', stdout=StringIO())
+
+    def test_submit_enqueues_instead_of_sending(self):
+        response = self.submit()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.recipients, ['admin@example.com'])
+        self.assertIn(Feedback.objects.get().tracking_code, message.body)
+
+        self.run_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'sent')
+
+        # Chạy lại không gửi trùng
+        self.run_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        self.submit()
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=SMTPException('timeout'),
+        ):
+            self.run_outbox()
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, 'pending')
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+        self.assertIn('timeout', message.last_error)
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.run_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+
+    @skipIfDBFeature('has_select_for_update_skip_locked')
+    def test_message_claimed_by_another_worker_is_skipped(self):
+        # Không có SKIP LOCKED: mỗi email được nhận bằng compare-and-set
+        first = enqueue_email('Một', 'Nội dung', ['a@example.com'])
+        second = enqueue_email('Hai', 'Nội dung', ['b@example.com'])
+        now = timezone.now()
+        OutboxMessage.objects.filter(pk=first.pk).update(next_attempt_at=now - timedelta(seconds=2))
+        OutboxMessage.objects.filter(pk=second.pk).update(next_attempt_at=now - timedelta(seconds=1))
+        real_filter = OutboxMessage.objects.filter
+
+        def racing_filter(*args, **kwargs):
+            if kwargs.get('pk') == first.pk:
+                # Worker khác nhận email này giữa lúc đọc và lúc đặt lease
+                real_filter(pk=first.pk).update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(OutboxMessage.objects, 'filter', racing_filter):
+            claimed = claim_batch(10)
+        self.assertEqual([message.pk for message in claimed], [second.pk])
+
+
+def make_jpeg(size=(3000, 2000)):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: xoay 90 độ
+    exif[0x010F] = 'Camera'
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(FEEDBACK_IMAGE_ASYNC=False)
+class FeedbackImageProcessingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.feedback = create_feedback()
+
+    def test_upload_is_resized_stripped_and_thumbnailed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback_image = FeedbackImage.objects.create(feedback=self.feedback, image=make_jpeg())
+
+        feedback_image.refresh_from_db()
+        self.assertIsNotNone(feedback_image.processed_at)
+        with Image.open(feedback_image.image.path) as processed:
+            self.assertEqual(processed.format, OUTPUT_FORMAT)
+            # Đã xoay theo EXIF và thu nhỏ về cạnh dài tối đa
+            self.assertEqual(processed.size, (MAX_DIMENSION * 2 // 3, MAX_DIMENSION))
+            self.assertFalse(processed.getexif())
+        with Image.open(feedback_image.thumbnail_small.path) as thumbnail:
+            self.assertLessEqual(max(thumbnail.size), 200)
+        self.assertTrue(feedback_image.thumbnail_medium)
+        self.assertNotEqual(feedback_image.thumbnail_medium_url, feedback_image.image.url)
+
+    def test_sweeper_processes_pending_images(self):
+        feedback_image = FeedbackImage.objects.create(feedback=self.feedback, image=make_jpeg((800, 600)))
+        self.assertIsNone(feedback_image.processed_at)
+        self.assertEqual(feedback_image.thumbnail_small_url, feedback_image.image.url)
+
+        call_command('process_feedback_images', stdout=StringIO())
+
+        feedback_image.refresh_from_db()
+        self.assertIsNotNone(feedback_image.processed_at)
+        self.assertTrue(feedback_image.thumbnail_small)
+    
+    def test_broken_image_is_marked_and_does_not_block_the_sweeper(self):
+        broken = FeedbackImage.objects.create(
+            feedback=self.feedback, image=SimpleUploadedFile('broken.jpg', b'\xff\xd8\xff' + b'0' * 100)
+        )
+        valid = FeedbackImage.objects.create(feedback=self.feedback, image=make_jpeg((800, 600)))
+
+        with self.assertLogs('feedback.images', 'WARNING'):
+            call_command('process_feedback_images', stdout=StringIO())
+
+        broken.refresh_from_db()
+        valid.refresh_from_db()
+        self.assertIsNotNone(broken.processed_at)
+        self.assertTrue(broken.processing_error)
+        self.assertTrue(valid.thumbnail_small)
+        self.assertFalse(FeedbackImage.objects.filter(processed_at__isnull=True).exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEEDBACK_IMAGE_ASYNC=False)
+class FeedbackUploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.category = Category.objects.create(name='Hạ tầng')
+
+    def submit(self, images):
+        return self.client.post(reverse('submit_feedback'), {
+            'name': 'Nguyễn Văn A',
+            'phone': '0987654321',
+            'category': self.category.pk,
+            'priority': 2,
+            'title': 'Đèn đường hỏng',
+            'content': 'Đèn đường trước nhà số 5 không sáng.',
+            'images': images,
+        })
+
+    def stored_files(self):
+        return [name for _, _, names in os.walk(self.media_root) for name in names]
+
+    def test_image_is_written_once_with_sniffed_extension(self):
+        upload = make_jpeg((400, 300))
+        upload.name = 'photo.png'
+        upload.content_type = 'image/png'
+        response = self.submit([upload])
+
+        self.assertEqual(response.status_code, 302)
+        feedback_image = FeedbackImage.objects.get()
+        # Đuôi file theo magic bytes (JPEG), không theo tên/content_type gửi lên
+        self.assertTrue(feedback_image.image.name.startswith('feedback_images/'))
+        self.assertTrue(feedback_image.image.name.endswith('.jpg'))
+        self.assertEqual(feedback_image.image.size, upload.size)
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_content_type_is_not_trusted(self):
+        fake = SimpleUploadedFile('photo.jpg', b'<?php echo 1; ?>' * 10, content_type='image/jpeg')
+        response = self.submit([fake])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'không phải là hình ảnh hợp lệ')
+        self.assertFalse(Feedback.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_limits_are_enforced_while_streaming(self):
+        too_large = SimpleUploadedFile(
+            'big.jpg', b'\xff\xd8\xff' + b'0' * MAX_IMAGE_SIZE, content_type='image/jpeg'
+        )
+        response = self.submit([make_jpeg((10, 10)), too_large])
+        self.assertContains(response, 'quá lớn')
+
+        response = self.submit([make_jpeg((10, 10)) for _ in range(MAX_IMAGES + 1)])
+        self.assertContains(response, f'tối đa {MAX_IMAGES} hình ảnh')
+
+        self.assertFalse(Feedback.objects.exists())
+        # Các file hợp lệ đã ghi trước khi gặp lỗi cũng bị xóa
+        self.assertEqual(self.stored_files(), [])
+    
+    def test_files_are_removed_when_csrf_check_fails(self):
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.get(reverse('submit_feedback'))
+        self.assertIn(settings.CSRF_COOKIE_NAME, self.client.cookies)
+
+        response = self.submit([make_jpeg((10, 10))])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Feedback.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TrackingLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.feedback = create_feedback()
+
+    def test_snapshot_is_cached_until_feedback_changes(self):
+        url = reverse('track_feedback')
+        # Phản ánh kèm danh mục, hình ảnh
+        with self.assertNumQueries(2):
+            self.client.get(url, {'tracking_code': self.feedback.tracking_code.lower()})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'tracking_code': self.feedback.tracking_code})
+        self.assertEqual(response.context['feedback'], self.feedback)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.feedback.status = 'processing'
+            self.feedback.save()
+        # Chưa commit: bản đã cache chưa bị xóa
+        response = self.client.get(reverse('track_status'), {'tracking_code': self.feedback.tracking_code})
+        self.assertEqual(response.json()['status'], 'pending')
+        for callback in callbacks:
+            callback()
+        response = self.client.get(reverse('track_status'), {'tracking_code': self.feedback.tracking_code})
+        self.assertEqual(response.json()['status'], 'processing')
+
+    def test_unknown_codes_are_cached_or_rejected_without_queries(self):
+        url = reverse('track_status')
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'tracking_code': 'not-a-code'})
+        self.assertEqual(response.status_code, 404)
+
+        with self.assertNumQueries(1):
+            self.client.get(url, {'tracking_code': 'ABCDEF123456'})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'tracking_code': 'ABCDEF123456'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_lookups_are_rate_limited_per_ip(self):
+        for _ in range(TRACKING_BURST):
+            self.client.get(reverse('track_status'), {'tracking_code': 'ABCDEF123456'})
+
+        response = self.client.get(reverse('track_feedback'), {'tracking_code': self.feedback.tracking_code})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+        response = self.client.get(
+            reverse('track_status'), {'tracking_code': self.feedback.tracking_code}, REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, 200)
+    
+    def test_client_ip_behind_trusted_proxy(self):
+        url = reverse('track_status')
+        # Mặc định X-Forwarded-For bị bỏ qua: mọi request qua proxy chung một bucket
+        for index in range(TRACKING_BURST):
+            self.client.get(url, {'tracking_code': 'ABCDEF123456'}, HTTP_X_FORWARDED_FOR=f'203.0.113.{index}')
+        response = self.client.get(url, {'tracking_code': 'ABCDEF123456'}, HTTP_X_FORWARDED_FOR='203.0.113.99')
+        self.assertEqual(response.status_code, 429)
+
+        cache.clear()
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            for _ in range(TRACKING_BURST):
+                self.client.get(url, {'tracking_code': 'ABCDEF123456'}, HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.1')
+            # Địa chỉ client tự thêm bên trái không đổi được bucket
+            response = self.client.get(
+                url, {'tracking_code': 'ABCDEF123456'}, HTTP_X_FORWARDED_FOR='5.6.7.8, 203.0.113.1'
+            )
+            self.assertEqual(response.status_code, 429)
+            response = self.client.get(url, {'tracking_code': 'ABCDEF123456'}, HTTP_X_FORWARDED_FOR='203.0.113.2')
+            self.assertEqual(response.status_code, 404)
+
+
+class TrackingCodeTests(TestCase):
+    def test_codes_are_time_ordered_and_self_checking(self):
+        earlier = generate_tracking_code(now=1760000000)
+        later = generate_tracking_code(now=1760000000 + 24 * 60 * 60)
+        self.assertLess(earlier, later)
+        self.assertTrue(is_valid_tracking_code(later))
+        # Cùng ngày thì chỉ khác nhau ở 12 ký tự ngẫu nhiên; không lộ giờ gửi
+        same_day = generate_tracking_code(now=1760000000 + 60)
+        self.assertEqual(len(later), 16)
+        self.assertEqual(same_day[:3], earlier[:3])
+        self.assertNotEqual(same_day, earlier)
+
+        # Gõ sai một ký tự hoặc đảo hai ký tự liền nhau đều bị phát hiện
+        typo = later[:3] + ('0' if later[3] != '0' else '1') + later[4:]
+        swapped = later[:7] + later[8] + later[7] + later[9:]
+        self.assertFalse(is_valid_tracking_code(typo))
+        if swapped != later:
+            self.assertFalse(is_valid_tracking_code(swapped))
+
+        # Mã cũ dạng hex vẫn tra cứu được; chuỗi 12 ký tự base32 khác thì không
+        self.assertTrue(is_valid_tracking_code('A1B2C3D4E5F6'))
+        self.assertFalse(is_valid_tracking_code('1NAXW01T8D1' + check_character('1NAXW01T8D1')))
+        # Ký tự dễ nhầm được sửa khi chuẩn hóa
+        self.assertEqual(normalize_tracking_code(' 1nax-w01t-8d14-xyz5 '), '1NAXW01T8D14XYZ5')
+        self.assertEqual(normalize_tracking_code('1NAXWOIT8D14XYZ5'), '1NAXW01T8D14XYZ5')
+
+    def test_collisions_are_retried(self):
+        existing = create_feedback()
+        codes = iter([existing.tracking_code, generate_tracking_code()])
+        with mock.patch.object(Feedback, 'generate_tracking_code', lambda self: next(codes)):
+            feedback = create_feedback()
+        self.assertNotEqual(feedback.tracking_code, existing.tracking_code)
+        self.assertTrue(is_valid_tracking_code(feedback.tracking_code))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FeedbackStatsTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Môi trường')
+        # Mọi phản ánh cùng một ngày (theo giờ địa phương)
+        created = timezone.localtime().replace(hour=0, minute=1)
+        for hours in (1, 2, 3, 4, 10):
+            feedback = create_feedback(category=self.category, priority=3)
+            Feedback.objects.filter(pk=feedback.pk).update(
+                status='resolved', created_at=created, resolved_at=created + timedelta(hours=hours),
+            )
+        feedback = create_feedback(category=self.category, priority=3)
+        Feedback.objects.filter(pk=feedback.pk).update(created_at=created)
+
+    def test_rollup_is_incremental_and_feeds_admin_page(self):
+        call_command('rollup_feedback_stats', stdout=StringIO())
+        resolved = FeedbackDailyStat.objects.filter(status='resolved').get()
+        self.assertEqual(resolved.count, 5)
+        self.assertAlmostEqual(resolved.avg_resolution_seconds, 4 * 3600)
+        self.assertAlmostEqual(resolved.p90_resolution_seconds, 10 * 3600)
+
+        # Lần chạy sau chỉ tính lại các ngày có thay đổi
+        feedback = Feedback.objects.filter(status='pending').get()
+        feedback.status = 'processing'
+        feedback.save()
+        out = StringIO()
+        call_command('rollup_feedback_stats', stdout=out)
+        self.assertIn('1 ngày', out.getvalue())
+        self.assertTrue(FeedbackDailyStat.objects.filter(status='processing', count=1).exists())
+        self.assertFalse(FeedbackDailyStat.objects.filter(status='pending').exists())
+
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        # Trang thống kê không đọc bảng Feedback
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:feedback_feedback_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('"feedback_feedback"' in query['sql'] for query in queries))
+        self.assertEqual(response.context['totals']['total'], 6)
+        self.assertEqual(response.context['totals']['backlog'], 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NearbyFeedbackTests(TestCase):
+    # Hồ Hoàn Kiếm; 0.0001 độ vĩ ~ 11m
+    CENTER = (Decimal('21.028800'), Decimal('105.852000'))
+
+    @classmethod
+    def setUpTestData(cls):
+        lat, lng = cls.CENTER
+        for offset in ('0.000300', '0.000700', '0.005000'):
+            create_feedback(title=f'Ổ gà {offset}', latitude=lat + Decimal(offset), longitude=lng)
+        create_feedback(title='Không có vị trí')
+
+    def test_geohash_is_computed_on_save(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744), 'u4pruydqq')
+        feedback = Feedback.objects.exclude(geohash='').first()
+        self.assertEqual(feedback.geohash, geo.encode(feedback.latitude, feedback.longitude))
+        self.assertEqual(Feedback.objects.filter(geohash='').count(), 1)
+
+    def test_nearby_uses_geohash_ranges_and_exact_distance(self):
+        with CaptureQueriesContext(connection) as queries:
+            reports = geo.nearby(Feedback.objects.all(), *self.CENTER, radius_m=100)
+        self.assertEqual([r.title for r in reports], ['Ổ gà 0.000300', 'Ổ gà 0.000700'])
+        self.assertAlmostEqual(reports[0].distance, 33, delta=1)
+        self.assertIn('"geohash" >=', queries[0]['sql'])
+
+    def test_map_clusters_and_location_capture(self):
+        lat, lng = self.CENTER
+        create_feedback(title='Ổ gà tâm', latitude=lat, longitude=lng)
+        for delta in (Decimal('0.01'), Decimal('0.001')):
+            response = self.client.get(reverse('feedback_map'), {
+                'bbox': f'{lat - delta},{lng - delta},{lat + delta},{lng + delta}',
+            })
+            # Ô không mịn hơn MAP_MAX_PRECISION dù phóng to; ô có 1 phản ánh (0.005) bị ẩn
+            self.assertEqual(
+                [(cluster['geohash'], cluster['count']) for cluster in response.json()['clusters']],
+                [(geo.encode(lat, lng, MAP_MAX_PRECISION), 3)],
+            )
+        self.assertEqual(self.client.get(reverse('feedback_map'), {'bbox': 'x'}).status_code, 400)
+
+        category = Category.objects.create(name='Giao thông')
+        self.client.post(reverse('submit_feedback'), {
+            'name': 'Trần B', 'phone': '0912345678', 'category': category.pk, 'priority': 2,
+            'title': 'Ổ gà mới', 'content': 'Ổ gà giữa đường', 'latitude': '21.028900', 'longitude': '105.852000',
+        })
+        feedback = Feedback.objects.get(title='Ổ gà mới')
+        self.assertEqual(feedback.geohash, geo.encode(feedback.latitude, feedback.longitude))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ADMIN_EMAILS=['admin@example.com'])
+class DuplicateDetectionTests(TestCase):
+    CONTENT = 'Đèn đường trước số 12 Nguyễn Trãi bị hỏng ba ngày nay, buổi tối rất tối và nguy hiểm.'
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Chiếu sáng')
+
+    def submit(self, **data):
+        payload = {
+            'name': 'Lê C', 'phone': '0901112223', 'category': self.category.pk, 'priority': 4,
+            'title': 'Đèn đường hỏng', 'content': self.CONTENT,
+        }
+        payload.update(data)
+        return self.client.post(reverse('submit_feedback'), payload)
+
+    def test_signature_estimates_similarity(self):
+        original = content_signature('Đèn đường hỏng', self.CONTENT)
+        self.assertEqual(len(original), 128)
+        resubmitted = content_signature('Den duong hong', self.CONTENT.replace('ba ngày', '3 ngày'))
+        unrelated = content_signature('Rác thải', 'Rác tồn đọng ở chợ Bến Thành chưa được thu gom.')
+        self.assertGreater(similarity(original, resubmitted), 0.6)
+        self.assertLess(similarity(original, unrelated), 0.2)
+
+    def test_resubmission_is_linked_without_new_work(self):
+        self.submit()
+        original = Feedback.objects.get()
+
+        response = self.submit(content=self.CONTENT + ' Mong được xử lý sớm.')
+        self.assertRedirects(
+            response, reverse('feedback_success', args=[original.tracking_code]), fetch_redirect_response=False
+        )
+        duplicate = Feedback.objects.exclude(pk=original.pk).get()
+        self.assertEqual(duplicate.duplicate_of, original)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+        # Cùng người gửi nhưng nội dung khác: phản ánh mới
+        self.submit(title='Cây đổ', content='Cây đổ chắn ngang đường Hai Bà Trưng sau cơn bão.')
+        self.assertIsNone(Feedback.objects.get(title='Cây đổ').duplicate_of)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+    
+    def test_linked_duplicate_creates_no_new_work(self):
+        self.submit()
+        self.submit()
+        original = Feedback.objects.get(duplicate_of__isnull=True)
+        self.assertEqual(Feedback.objects.filter(duplicate_of=original).count(), 1)
+
+        officer = User.objects.create_superuser('canbo', 'canbo@example.com', 'password')
+        self.assertEqual(claim_next(officer), original)
+        self.assertIsNone(claim_next(officer))
+
+        Feedback.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.assertEqual([row['pk'] for _, row in escalate()], [original.pk])
+        call_command('rollup_feedback_stats', stdout=StringIO())
+        self.assertEqual(sum(FeedbackDailyStat.objects.values_list('count', flat=True)), 1)
+    
+    def test_nearby_report_from_another_citizen_keeps_its_own_code(self):
+        location = {'latitude': '21.028800', 'longitude': '105.852000'}
+        self.submit(**location)
+        original = Feedback.objects.get()
+
+        response = self.submit(name='Phạm D', phone='0933444555', **location)
+        feedback = Feedback.objects.exclude(pk=original.pk).get()
+        self.assertEqual(feedback.duplicate_of, original)
+        self.assertNotEqual(feedback.tracking_code, original.tracking_code)
+        self.assertRedirects(
+            response, reverse('feedback_success', args=[feedback.tracking_code]), fetch_redirect_response=False
+        )
+        response = self.client.get(response['Location'])
+        self.assertContains(response, '0933444555')
+        self.assertNotContains(response, original.phone)
+    
+    def test_success_page_is_only_shown_to_the_submitting_session(self):
+        response = self.submit()
+        feedback = Feedback.objects.get()
+        self.assertContains(self.client.get(response['Location']), feedback.phone)
+
+        other = Client()
+        response = other.get(reverse('feedback_success', args=[feedback.tracking_code]))
+        self.assertRedirects(
+            response,
+            f"{reverse('track_feedback')}?tracking_code={feedback.tracking_code}",
+            fetch_redirect_response=False,
+        )
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FeedbackAdminChangelistTests(TestCase):
+    # Đủ lớn để COUNT/quét toàn bảng hay truy vấn theo từng dòng lộ ra trong thời gian
+    ROWS = 20000
+    
+    @classmethod
+    def setUpTestData(cls):
+        categories = [Category.objects.create(name=f'Danh mục {index}') for index in range(5)]
+        feedbacks = []
+        codes = generate_tracking_codes(cls.ROWS)
+        for index in range(cls.ROWS):
+            feedback = Feedback(
+                tracking_code=codes[index],
+                name='Nguyễn Văn A',
+                phone=f'09{index:08d}',
+                title=f'Phản ánh số {index}',
+                content='Đèn đường hỏng' if index % 1000 == 0 else 'Rác tồn đọng chưa thu gom',
+                category=categories[index % len(categories)],
+            )
+            feedback.search_document = build_search_document(feedback)
+            feedbacks.append(feedback)
+        Feedback.objects.bulk_create(feedbacks, batch_size=1000)
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+    
+    def get_changelist(self, **params):
+        self.client.force_login(self.admin)
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:feedback_feedback_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.perf_counter() - started, 2)
+        return response, queries
+    
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        response, queries = self.get_changelist()
+        self.assertEqual(response.context['cl'].result_count, self.ROWS)
+        # Danh mục lấy bằng JOIN, không truy vấn theo từng dòng
+        self.assertLess(len(queries), 15)
+        self.assertFalse(any('"feedback_category"."id" =' in query['sql'] for query in queries))
+    
+    def test_search_is_routed_by_term(self):
+        feedback = Feedback.objects.get(phone='0900000123')
+        response, _ = self.get_changelist(q=feedback.tracking_code.lower())
+        self.assertEqual(list(response.context['cl'].result_list), [feedback])
+        response, _ = self.get_changelist(q='0900 000 123')
+        self.assertEqual(list(response.context['cl'].result_list), [feedback])
+        # Từ khóa không dấu khớp nội dung có dấu
+        response, _ = self.get_changelist(q='den duong')
+        self.assertEqual(response.context['cl'].result_count, self.ROWS // 1000)
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class StatusTransitionTests(TestCase):
+    ROWS = 5000
+    
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+    
+    def test_only_valid_transitions_are_applied_and_recorded(self):
+        pending = create_feedback(email='dan@example.com')
+        processing = create_feedback(status='processing')
+        resolved = create_feedback(status='resolved')
+        get_tracking_snapshot(pending.tracking_code)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            updated = transition(Feedback.objects.all(), 'rejected', user=self.admin)
+        self.assertEqual(updated, 2)
+        self.assertEqual(
+            set(FeedbackStatusHistory.objects.values_list('feedback_id', 'from_status', 'to_status', 'changed_by')),
+            {(pending.pk, 'pending', 'rejected', self.admin.pk), (processing.pk, 'processing', 'rejected', self.admin.pk)},
+        )
+        resolved.refresh_from_db()
+        self.assertEqual(resolved.status, 'resolved')
+        # Bản tra cứu đã cache được làm mới, người dân có email được báo qua outbox
+        self.assertEqual(get_tracking_snapshot(pending.tracking_code).status, 'rejected')
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.recipients, ['dan@example.com'])
+        self.assertIn(pending.tracking_code, message.subject)
+        
+        with self.assertRaises(ValueError):
+            transition(Feedback.objects.all(), 'pending')
+    
+    def test_admin_action_handles_thousands_of_rows_in_batches(self):
+        codes = generate_tracking_codes(self.ROWS)
+        Feedback.objects.bulk_create([
+            Feedback(
+                tracking_code=codes[index],
+                phone='0987654321',
+                title=f'Phản ánh số {index}',
+                content='Rác tồn đọng chưa thu gom',
+                email='dan@example.com' if index % 2 else None,
+            )
+            for index in range(self.ROWS)
+        ], batch_size=1000)
+        self.client.force_login(self.admin)
+        
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('admin:feedback_feedback_changelist'), {
+                'action': 'mark_as_resolved',
+                'select_across': '1',
+                'index': '0',
+                '_selected_action': [Feedback.objects.values_list('pk', flat=True)[0]],
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertLess(time.perf_counter() - started, 5)
+        # Số truy vấn theo lô, không theo dòng (SQLite tách INSERT theo giới hạn tham số)
+        self.assertLess(len(queries), self.ROWS // 50)
+        self.assertEqual(Feedback.objects.filter(status='resolved', resolved_at__isnull=False).count(), self.ROWS)
+        self.assertEqual(FeedbackStatusHistory.objects.count(), self.ROWS)
+        self.assertEqual(OutboxMessage.objects.count(), self.ROWS // 2)
+    
+    def test_status_edit_in_admin_is_recorded(self):
+        feedback = create_feedback(category=Category.objects.create(name='Giao thông'))
+        self.client.force_login(self.admin)
+        url = reverse('admin:feedback_feedback_change', args=[feedback.pk])
+        form = self.client.get(url).context['adminform'].form
+        data = {name: value for name, value in form.initial.items() if value is not None}
+        data.update({
+            'status': 'processing',
+            'images-TOTAL_FORMS': 0, 'images-INITIAL_FORMS': 0,
+            'status_history-TOTAL_FORMS': 0, 'status_history-INITIAL_FORMS': 0,
+        })
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        history = FeedbackStatusHistory.objects.get()
+        self.assertEqual((history.from_status, history.to_status), ('pending', 'processing'))
+
+        # Các chuyển đổi không hợp lệ bị form từ chối như thao tác hàng loạt
+        Feedback.objects.filter(pk=feedback.pk).update(status='resolved')
+        data['status'] = 'pending'
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('status', response.context['adminform'].form.errors)
+        feedback.refresh_from_db()
+        self.assertEqual(feedback.status, 'resolved')
+        self.assertEqual(FeedbackStatusHistory.objects.count(), 1)
+
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    ADMIN_EMAILS=['admin@example.com'],
+    FEEDBACK_INGEST_TOKENS='hotline:secret-hotline,zalo:secret-zalo',
+)
+class FeedbackIngestTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Môi trường')
+    
+    def record(self, index, **kwargs):
+        data = {
+            'title': f'Rác tồn đọng {index}',
+            'content': 'Rác tồn đọng chưa thu gom.',
+            'phone': f'09{index:08d}',
+            'category': 'moi truong',
+        }
+        data.update(kwargs)
+        return json.dumps(data, ensure_ascii=False)
+    
+    def post(self, body, token='secret-hotline'):
+        return self.client.post(
+            reverse('ingest_feedback'), body, content_type='application/x-ndjson',
+            HTTP_AUTHORIZATION=f'Bearer {token}',
+        )
+    
+    def test_batch_is_inserted_with_one_digest(self):
+        lines = [self.record(index) for index in range(300)]
+        lines.insert(1, self.record(999, phone='', category='Không tồn tại'))
+        lines.insert(2, 'not json')
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('\n'.join(lines).encode())
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual((payload['created'], payload['failed']), (300, 2))
+        self.assertEqual(set(payload['results'][1]['errors']), {'phone', 'category'})
+        self.assertLess(len(queries), 20)
+        
+        feedback = Feedback.objects.get(tracking_code=payload['results'][0]['tracking_code'])
+        self.assertEqual((feedback.category, feedback.source), (self.category, 'hotline'))
+        self.assertTrue(feedback.is_anonymous)
+        self.assertTrue(feedback.content_signature and feedback.search_document)
+        self.assertTrue(is_valid_tracking_code(feedback.tracking_code))
+        
+        digest = OutboxMessage.objects.get()
+        self.assertIn('300 phản ánh', digest.subject)
+    
+    def test_batches_over_the_default_upload_limit_are_accepted(self):
+        # Dòng dài: tổng body vượt DATA_UPLOAD_MAX_MEMORY_SIZE (2,5MB) mặc định
+        content = 'Rác tồn đọng chưa thu gom. ' * 100
+        body = '\n'.join(self.record(index, content=content) for index in range(1000)).encode()
+        self.assertGreater(len(body), 2621440)
+        
+        response = self.post(body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1000)
+        
+        response = self.post('\n'.join(['{}'] * (MAX_REQUEST_LINES + 1)).encode())
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()['error'], 'too_many_lines')
+        with mock.patch('feedback.views.MAX_REQUEST_BYTES', 1000):
+            response = self.post(body)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()['error'], 'too_large')
+    
+    def test_invalid_token_is_rejected(self):
+        self.assertEqual(self.post(self.record(1), token='wrong').status_code, 401)
+        self.assertFalse(Feedback.objects.exists())
+    
+    def test_command_reads_jsonl_in_batches(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as jsonl:
+            jsonl.write('\n'.join(self.record(index) for index in range(25)))
+        self.addCleanup(os.remove, jsonl.name)
+        
+        out, err = StringIO(), StringIO()
+        call_command('ingest_feedback', jsonl.name, source='zalo', batch_size=10, stdout=out, stderr=err)
+        self.assertIn('Đã nhập 25', out.getvalue())
+        self.assertEqual(Feedback.objects.filter(source='zalo').count(), 25)
+        self.assertEqual(OutboxMessage.objects.count(), 3)
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ADMIN_EMAILS=['admin@example.com'])
+class AdminNotificationTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Hạ tầng')
+    
+    def submit(self, priority):
+        return self.client.post(reverse('submit_feedback'), {
+            'name': 'Nguyễn Văn A', 'phone': '0987654321', 'category': self.category.pk,
+            'priority': priority, 'title': f'Phản ánh mức {priority}', 'content': f'Nội dung mức độ {priority}.',
+        })
+    
+    def test_urgent_is_immediate_and_the_rest_is_digested(self):
+        self.submit(4)
+        urgent = OutboxMessage.objects.get()
+        self.assertIn('Khẩn cấp', urgent.subject)
+        self.assertIn('Số hình ảnh đính kèm: 0', urgent.body)
+        
+        for index in range(5):
+            create_feedback(priority=3, title=f'Cao {index}', phone=f'09000000{index:02d}')
+        create_feedback(priority=2, title='Trung bình', phone='0911111111')
+        now = timezone.now()
+        self.assertEqual(send_due_digests(now), 0)
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(send_due_digests(now + timedelta(minutes=11)), 5)
+        self.assertLess(len(queries), 10)
+        digest = OutboxMessage.objects.latest('pk')
+        self.assertIn('5 phản ánh', digest.subject)
+        self.assertNotIn('Trung bình |', digest.body)
+        
+        self.assertEqual(send_due_digests(now + timedelta(minutes=31)), 1)
+        self.assertEqual(send_due_digests(now + timedelta(minutes=120)), 0)
+        self.assertEqual(OutboxMessage.objects.count(), 3)
+
+
+
+@override_settings(ADMIN_EMAILS=['admin@example.com'])
+class SlaTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Cấp nước', priority_level=3, sla_hours=2)
+    
+    def create_aged(self, hours, **kwargs):
+        feedback = create_feedback(**kwargs)
+        Feedback.objects.filter(pk=feedback.pk).update(created_at=timezone.now() - timedelta(hours=hours))
+        return feedback
+    
+    def test_priority_is_derived_from_category(self):
+        self.assertEqual(create_feedback(category=self.category, priority=1).priority, 3)
+        self.assertEqual(create_feedback(priority=1).priority, 1)
+    
+    def test_overdue_open_items_are_escalated_once(self):
+        fresh = self.create_aged(1, category=self.category)
+        late = self.create_aged(3, category=self.category)
+        very_late = self.create_aged(5, category=self.category)
+        closed = self.create_aged(5, category=self.category, status='resolved')
+        uncategorized = self.create_aged(100)
+        
+        with CaptureQueriesContext(connection) as queries:
+            escalated = escalate()
+        self.assertEqual(
+            {(level, row['pk']) for level, row in escalated},
+            {(1, late.pk), (2, very_late.pk), (1, uncategorized.pk)},
+        )
+        # Mọi truy vấn quét Feedback đều giới hạn trong các phản ánh còn mở
+        scans = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'FROM "feedback_feedback"' in q['sql']]
+        self.assertTrue(scans)
+        self.assertTrue(all('"status" IN' in sql for sql in scans))
+        
+        levels = dict(Feedback.objects.values_list('pk', 'escalation_level'))
+        self.assertEqual((levels[fresh.pk], levels[closed.pk]), (0, 0))
+        very_late.refresh_from_db()
+        self.assertEqual(very_late.priority, 4)
+        self.assertIsNotNone(very_late.sla_breached_at)
+        self.assertIn('3 phản ánh', OutboxMessage.objects.get().subject)
+        
+        self.assertEqual(escalate(), [])
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class WorkQueueTests(TestCase):
+    def setUp(self):
+        self.officers = [
+            User.objects.create_superuser(f'canbo{index}', f'canbo{index}@example.com', 'password')
+            for index in range(3)
+        ]
+        self.normal_old = create_feedback(priority=2, phone='0900000001')
+        self.urgent_old = create_feedback(priority=4, phone='0900000002')
+        self.urgent_new = create_feedback(priority=4, phone='0900000003')
+        create_feedback(priority=4, status='processing', phone='0900000004')
+        for hours, feedback in enumerate([self.urgent_new, self.urgent_old, self.normal_old]):
+            Feedback.objects.filter(pk=feedback.pk).update(created_at=timezone.now() - timedelta(hours=hours + 1))
+    
+    def test_claims_follow_priority_then_age_without_duplicates(self):
+        first, second, third = self.officers
+        self.assertEqual(claim_next(first), self.urgent_old)
+        self.assertEqual(claim_next(second), self.urgent_new)
+        self.assertEqual(claim_next(first), self.normal_old)
+        self.assertIsNone(claim_next(third))
+        self.assertEqual(Feedback.objects.get(pk=self.urgent_old.pk).assignee, first)
+        
+        # Hết hạn giữ mà vẫn đang chờ: người khác nhận được
+        later = timezone.now() + timedelta(minutes=31)
+        self.assertEqual(claim_next(third, now=later), self.urgent_old)
+    
+    def test_admin_claim_button_and_warning(self):
+        first, second, _ = self.officers
+        self.client.force_login(first)
+        response = self.client.post(reverse('admin:feedback_feedback_claim_next'))
+        self.assertRedirects(response, reverse('admin:feedback_feedback_change', args=[self.urgent_old.pk]))
+        
+        self.client.force_login(second)
+        response = self.client.get(reverse('admin:feedback_feedback_change', args=[self.urgent_old.pk]))
+        self.assertContains(response, 'đang được canbo0 xử lý')
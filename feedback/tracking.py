@@ -0,0 +1,111 @@
+"""
+Tra cứu phản ánh theo mã theo dõi
+
+- Mã sai định dạng hoặc sai ký tự kiểm tra bị loại ngay, không chạm tới
+  cache hay database (xem codes.py)
+- Phản ánh tìm thấy được cache nguyên bản (kèm danh mục và hình ảnh) cho tới
+  khi phản ánh hoặc hình ảnh của nó thay đổi (xem signals.py)
+- Mã không tồn tại được cache ngắn hạn để việc dò mã không dội xuống database
+- Mỗi IP có một token bucket trong cache: tối đa TRACKING_BURST lần tra cứu
+  liên tiếp, sau đó hồi lại TRACKING_RATE_PER_MINUTE lần mỗi phút
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .codes import is_valid_tracking_code
+from .models import Feedback
+
+TRACKING_CACHE_TIMEOUT = getattr(settings, 'FEEDBACK_TRACKING_CACHE_TIMEOUT', 60 * 60)
+NEGATIVE_CACHE_TIMEOUT = 60
+TRACKING_BURST = getattr(settings, 'FEEDBACK_TRACKING_BURST', 10)
+TRACKING_RATE_PER_MINUTE = getattr(settings, 'FEEDBACK_TRACKING_RATE_PER_MINUTE', 12)
+
+# Giá trị cache cho mã không tồn tại (phân biệt với "chưa có trong cache")
+NOT_FOUND = 'not-found'
+
+
+def tracking_cache_key(code):
+    return f'feedback:track:{code}'
+
+
+def get_tracking_snapshot(code):
+    """Trả Feedback (kèm category, images) theo mã, None nếu không tồn tại"""
+    if not is_valid_tracking_code(code):
+        return None
+
+    key = tracking_cache_key(code)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        try:
+            snapshot = (
+                Feedback.objects.select_related('category')
+                .prefetch_related('images')
+                .get(tracking_code=code)
+            )
+        except Feedback.DoesNotExist:
+            cache.set(key, NOT_FOUND, NEGATIVE_CACHE_TIMEOUT)
+            return None
+        cache.set(key, snapshot, TRACKING_CACHE_TIMEOUT)
+    elif snapshot == NOT_FOUND:
+        return None
+    return snapshot
+
+
+def invalidate_tracking(code):
+    cache.delete(tracking_cache_key(code))
+
+
+def invalidate_tracking_many(codes):
+    cache.delete_many([tracking_cache_key(code) for code in codes])
+
+
+def status_payload(feedback):
+    """Thông tin trạng thái gọn cho endpoint JSON (không kèm thông tin cá nhân)"""
+    return {
+        'tracking_code': feedback.tracking_code,
+        'status': feedback.status,
+        'status_display': feedback.get_status_display(),
+        'priority': feedback.priority,
+        'priority_display': feedback.get_priority_display(),
+        'created_at': feedback.created_at.isoformat(),
+        'updated_at': feedback.updated_at.isoformat(),
+        'resolved_at': feedback.resolved_at.isoformat() if feedback.resolved_at else None,
+    }
+
+
+def get_client_ip(request):
+    """
+    IP người dân. Mặc định chỉ tin REMOTE_ADDR vì X-Forwarded-For do client tự
+    đặt được. Chạy sau reverse proxy thì đặt TRUSTED_PROXY_COUNT = số proxy:
+    IP được lấy từ X-Forwarded-For, đếm từ phải sang (các địa chỉ do proxy
+    của mình thêm vào), bỏ qua phần client tự thêm ở bên trái.
+    """
+    proxy_count = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if proxy_count:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxy_count:
+            return forwarded[-proxy_count]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def take_token(request, burst=None, rate_per_minute=None):
+    """
+    Lấy một token khỏi bucket của IP. Trả 0 nếu được phép, ngược lại trả số
+    giây cần chờ. Đọc-ghi không nguyên tử: vài request đồng thời có thể vượt
+    nhẹ giới hạn, đổi lại chỉ tốn một lần get/set cache.
+    """
+    burst = burst or TRACKING_BURST
+    rate = (rate_per_minute or TRACKING_RATE_PER_MINUTE) / 60
+    key = f'feedback:track-rate:{get_client_ip(request)}'
+    now = time.time()
+
+    tokens, updated = cache.get(key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens < 1:
+        cache.set(key, (tokens, now), int(burst / rate) + 1)
+        return int((1 - tokens) / rate) + 1
+
+    cache.set(key, (tokens - 1, now), int(burst / rate) + 1)
+    return 0
@@ -0,0 +1,125 @@
+"""
+Chuyển trạng thái phản ánh hàng loạt
+
+Thay cho queryset.update() (không để lại lịch sử, không báo người dân) và
+cho việc save() từng dòng (chậm), mỗi lô BATCH_SIZE phản ánh chỉ tốn:
+- một UPDATE cho các dòng đang ở trạng thái được phép chuyển
+- một bulk_create FeedbackStatusHistory
+- một bulk_create OutboxMessage báo người dân có email; email được worker
+  run_outbox gửi sau (xem outbox.py), không chờ SMTP trong request
+
+Các dòng được khóa (SELECT ... FOR UPDATE) trong transaction nên hai admin
+thao tác cùng lúc không ghi lịch sử sai trạng thái nguồn.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Feedback, FeedbackStatusHistory, OutboxMessage
+from .tracking import invalidate_tracking_many
+
+# Trạng thái nguồn -> các trạng thái đích hợp lệ
+ALLOWED_TRANSITIONS = {
+    'pending': {'processing', 'resolved', 'rejected'},
+    'processing': {'resolved', 'rejected'},
+}
+BATCH_SIZE = 1000
+
+STATUS_LABELS = dict(Feedback.STATUS_CHOICES)
+
+
+def is_allowed(from_status, to_status):
+    return to_status in ALLOWED_TRANSITIONS.get(from_status, ())
+
+
+def source_statuses(to_status):
+    """Các trạng thái được phép chuyển sang to_status"""
+    return [status for status, targets in ALLOWED_TRANSITIONS.items() if to_status in targets]
+
+
+def status_notification(feedback, to_status, now, from_email):
+    """Email báo người dân phản ánh đã đổi trạng thái; None nếu không có email"""
+    if not feedback['email']:
+        return None
+    label = STATUS_LABELS[to_status]
+    return OutboxMessage(
+        dedupe_key=f'feedback-status:{feedback["tracking_code"]}:{to_status}',
+        subject=f'[Phản ánh {feedback["tracking_code"]}] {label}',
+        body=(
+            f'Phản ánh "{feedback["title"]}" (mã theo dõi {feedback["tracking_code"]}) '
+            f'đã chuyển sang trạng thái: {label}.\n\n'
+            f'Thời gian: {timezone.localtime(now).strftime("%d/%m/%Y %H:%M")}\n\n'
+            'Bạn có thể tra cứu chi tiết bằng mã theo dõi trên cổng thông tin.'
+        ),
+        from_email=from_email,
+        recipients=[feedback['email']],
+        next_attempt_at=now,
+    )
+
+
+def transition(queryset, to_status, user=None, note=''):
+    """
+    Chuyển các phản ánh trong queryset sang to_status. Dòng không ở trạng
+    thái nguồn hợp lệ được bỏ qua. Trả về số phản ánh đã chuyển.
+    """
+    sources = source_statuses(to_status)
+    if not sources:
+        raise ValueError(f'Không có trạng thái nào chuyển được sang {to_status!r}')
+
+    now = timezone.now()
+    changes = {'status': to_status, 'updated_at': now}
+    if to_status == 'resolved':
+        changes['resolved_at'] = now
+    from_email = settings.DEFAULT_FROM_EMAIL
+    changed_by_id = user.pk if user is not None else None
+
+    count = 0
+    codes = []
+    with transaction.atomic():
+        rows = list(
+            queryset.filter(status__in=sources)
+            .select_for_update()
+            .order_by('pk')
+            .values('pk', 'tracking_code', 'status', 'title', 'email')
+        )
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            Feedback.objects.filter(pk__in=[row['pk'] for row in batch]).update(**changes)
+            FeedbackStatusHistory.objects.bulk_create([
+                FeedbackStatusHistory(
+                    feedback_id=row['pk'],
+                    from_status=row['status'],
+                    to_status=to_status,
+                    changed_by_id=changed_by_id,
+                    note=note,
+                    changed_at=now,
+                )
+                for row in batch
+            ])
+            messages = [status_notification(row, to_status, now, from_email) for row in batch]
+            # Trùng dedupe_key (đã báo trạng thái này trước đó) thì bỏ qua
+            OutboxMessage.objects.bulk_create([m for m in messages if m], ignore_conflicts=True)
+            codes.extend(row['tracking_code'] for row in batch)
+            count += len(batch)
+
+        transaction.on_commit(lambda: invalidate_tracking_many(codes))
+    return count
+
+
+def record_change(feedback, from_status, user=None, note=''):
+    """Ghi lịch sử và báo người dân khi trạng thái được sửa trên từng phản ánh"""
+    now = timezone.now()
+    FeedbackStatusHistory.objects.create(
+        feedback=feedback,
+        from_status=from_status,
+        to_status=feedback.status,
+        changed_by=user,
+        note=note,
+        changed_at=now,
+    )
+    message = status_notification(
+        {'tracking_code': feedback.tracking_code, 'title': feedback.title, 'email': feedback.email},
+        feedback.status, now, settings.DEFAULT_FROM_EMAIL,
+    )
+    if message:
+        OutboxMessage.objects.bulk_create([message], ignore_conflicts=True)
@@ -0,0 +1,178 @@
+"""
+Upload handler cho form gửi phản ánh
+
+Thay vì để Django đệm toàn bộ file vào bộ nhớ / file tạm rồi mới kiểm tra
+trong form, handler kiểm tra ngay khi dữ liệu đang được nhận:
+- Content-Length của cả request vượt giới hạn: dừng trước khi đọc file nào
+- quá MAX_IMAGES file hoặc một file vượt MAX_IMAGE_SIZE: dừng đọc ngay
+- loại ảnh được xác định bằng magic bytes ở đầu file, không tin content_type
+  do trình duyệt gửi lên
+
+File hợp lệ được ghi thẳng vào vị trí cuối cùng trong MEDIA_ROOT (tên file
+theo upload_to của FeedbackImage.image, đuôi theo loại ảnh thật), nên khi lưu
+FeedbackImage chỉ cần gán tên file, không sao chép lại lần nữa.
+"""
+import os
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+
+from .models import FeedbackImage
+
+MAX_IMAGES = 10
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+# Dung lượng dành cho các trường văn bản của form
+MAX_FORM_OVERHEAD = 256 * 1024
+MAX_REQUEST_SIZE = MAX_IMAGES * MAX_IMAGE_SIZE + MAX_FORM_OVERHEAD
+
+# Số byte đầu file cần để nhận diện loại ảnh
+SNIFF_BYTES = 12
+
+
+def sniff_image_type(head):
+    """Trả (content_type, đuôi file) theo magic bytes, None nếu không phải ảnh hỗ trợ"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg', 'jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png', 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif', 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp', 'webp'
+    return None
+
+
+class StoredUploadedFile(UploadedFile):
+    """File đã được ghi vào storage trong lúc upload; stored_name là tên trong storage"""
+
+    def __init__(self, stored_name, storage, name, content_type, size, charset=None):
+        super().__init__(None, name, content_type, size, charset)
+        self.stored_name = stored_name
+        self.storage = storage
+
+    def open(self, mode='rb'):
+        self.file = self.storage.open(self.stored_name, mode)
+        return self
+
+
+class FeedbackImageUploadHandler(FileUploadHandler):
+    """
+    Nhận các file của trường `images`, ghi thẳng vào storage của
+    FeedbackImage.image. Lỗi được ghi vào `errors` để form hiển thị;
+    khi có lỗi, mọi file đã ghi trong request này bị xóa.
+
+    Storage cần là FileSystemStorage (dùng storage.path()).
+    """
+    field_name = 'images'
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.errors = []
+        self.stored = []
+        self.count = 0
+        self.request_too_large = False
+        self.image_field = FeedbackImage._meta.get_field('image')
+        self.storage = self.image_field.storage
+        self.destination = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Chỉ đánh dấu: các trường văn bản đứng trước file (csrf token...) vẫn được đọc
+        self.request_too_large = content_length > MAX_REQUEST_SIZE
+        return None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        if self.request_too_large:
+            self.reject('Tổng dung lượng tải lên quá lớn.')
+        if field_name != self.field_name:
+            raise SkipFile()
+
+        self.count += 1
+        if self.count > MAX_IMAGES:
+            self.reject(f'Bạn chỉ có thể tải lên tối đa {MAX_IMAGES} hình ảnh.')
+        if self.content_length and self.content_length > MAX_IMAGE_SIZE:
+            self.reject_too_large()
+
+        self.head = b''
+        self.size = 0
+        self.destination = None
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > MAX_IMAGE_SIZE:
+            self.reject_too_large()
+
+        if self.destination is None:
+            # Gom đủ vài byte đầu để nhận diện loại ảnh rồi mới mở file đích
+            self.head += raw_data
+            if len(self.head) < SNIFF_BYTES:
+                return None
+            raw_data = self.open_destination()
+        self.destination.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.destination is None:
+            # File nhỏ hơn SNIFF_BYTES
+            head = self.open_destination()
+            self.destination.write(head)
+        self.destination.close()
+        self.destination = None
+        return StoredUploadedFile(
+            stored_name=self.stored[-1],
+            storage=self.storage,
+            name=self.file_name,
+            content_type=self.image_type,
+            size=file_size,
+            charset=self.charset,
+        )
+
+    def upload_interrupted(self):
+        # Request bị cắt giữa chừng: bỏ file đang ghi dở
+        if self.destination is not None:
+            self.destination.close()
+            self.destination = None
+            self.storage.delete(self.stored.pop())
+
+    def open_destination(self):
+        """Nhận diện loại ảnh, mở file đích trong storage; trả phần dữ liệu đã gom"""
+        image_type = sniff_image_type(self.head)
+        if image_type is None:
+            self.reject(f'File {self.file_name} không phải là hình ảnh hợp lệ.')
+        self.image_type, extension = image_type
+
+        base = os.path.splitext(self.file_name)[0] or 'image'
+        name = self.image_field.generate_filename(None, f'{base}.{extension}')
+        while True:
+            name = self.storage.get_available_name(name)
+            path = self.storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                self.destination = open(path, 'xb')
+                break
+            except FileExistsError:
+                # Request khác vừa lấy tên này
+                continue
+        if self.storage.file_permissions_mode is not None:
+            os.chmod(path, self.storage.file_permissions_mode)
+        self.stored.append(name)
+
+        head, self.head = self.head, b''
+        return head
+
+    def reject_too_large(self):
+        self.reject(f'File {self.file_name} quá lớn. Kích thước tối đa là {MAX_IMAGE_SIZE // (1024 * 1024)}MB.')
+
+    def reject(self, message):
+        """Dừng đọc request ngay (không đọc nốt phần còn lại) và xóa các file đã ghi"""
+        self.errors.append(message)
+        self.discard()
+        raise StopUpload(connection_reset=True)
+
+    def discard(self):
+        if self.destination is not None:
+            self.destination.close()
+            self.destination = None
+        for name in self.stored:
+            self.storage.delete(name)
+        self.stored = []
@@ -6,5 +6,8 @@ urlpatterns = [
     path('', views.submit_feedback, name='submit_feedback'),
     path('success/<str:tracking_code>/', views.feedback_success, name='feedback_success'),
     path('track/', views.track_feedback, name='track_feedback'),
+    path('track/status/', views.track_status, name='track_status'),
     path('list/', views.feedback_list, name='feedback_list'),
+    path('map/', views.feedback_map, name='feedback_map'),
+    path('ingest/', views.ingest_feedback, name='ingest_feedback'),
 ]
\ No newline at end of file
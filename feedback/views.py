@@ -1,33 +1,86 @@
 # feedback/views.py
+from itertools import islice
+from urllib.parse import urlencode
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.core.mail import send_mail
-from django.conf import settings
 from django.db import transaction
+from django.db.models import Count
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_POST
+from services.pagination import InvalidCursor, KeysetPaginator
 from .models import Feedback, FeedbackImage, Category
 from .forms import FeedbackForm
+from . import geo
+from .codes import normalize_tracking_code
+from .duplicates import find_duplicate, is_resubmission
+from .ingest import MAX_REQUEST_BYTES, MAX_REQUEST_LINES, ingest_lines, source_for_token
+from .notifications import send_notification_to_admin
+from .tracking import get_tracking_snapshot, status_payload, take_token
+from .uploads import FeedbackImageUploadHandler
+
+FEEDBACK_LIST_PAGE_SIZE = 20
+# Mã theo dõi vừa gửi được ghi trong session; chỉ session đó xem được trang thành công
+SUBMITTED_CODES_SESSION_KEY = 'feedback_submitted_codes'
+SUBMITTED_CODES_LIMIT = 10
+# Bản đồ công khai: ô cụm không mịn hơn ~1,2km x 0,6km và có ít nhất
+# MAP_MIN_CLUSTER_SIZE phản ánh, để không lộ vị trí (nhà) của từng người gửi
+MAP_MAX_PRECISION = 6
+MAP_MIN_CLUSTER_SIZE = 3
 
+@csrf_exempt
 def submit_feedback(request):
     """View để gửi phản ánh"""
+    # Upload handler phải được gắn trước khi request.POST được đọc lần đầu
+    # (CsrfViewMiddleware cũng đọc POST), nên CSRF được kiểm tra ở view bên trong
+    upload_handler = FeedbackImageUploadHandler(request)
+    request.upload_handlers = [upload_handler]
+    response = None
+    try:
+        response = _submit_feedback(request, upload_handler)
+    finally:
+        # File đã được ghi trong lúc đọc body; chỉ giữ lại khi phản ánh đã lưu
+        # (chuyển hướng tới trang thành công), kể cả khi CSRF trả về 403
+        if response is None or response.status_code != 302:
+            upload_handler.discard()
+    return response
+
+
+@csrf_protect
+def _submit_feedback(request, upload_handler):
     if request.method == 'POST':
-        form = FeedbackForm(request.POST, request.FILES)
+        form = FeedbackForm(request.POST, request.FILES, upload_errors=upload_handler.errors)
         
         if form.is_valid():
             try:
                 with transaction.atomic():
-                    # Lưu feedback
-                    feedback = form.save()
+                    # Lưu feedback; nếu trùng với phản ánh gần đây thì chỉ liên kết tới bản gốc
+                    feedback = form.save(commit=False)
+                    original = find_duplicate(feedback)
+                    feedback.duplicate_of = original
+                    feedback.save()
                     
-                    # Lưu hình ảnh
+                    # Lưu hình ảnh: file đã nằm sẵn trong storage, chỉ cần gán tên
                     images = request.FILES.getlist('images')
                     for image in images:
                         FeedbackImage.objects.create(
                             feedback=feedback,
-                            image=image
+                            image=image.stored_name
                         )
                     
-                    # Gửi email thông báo cho admin
-                    send_notification_to_admin(feedback)
+                    if is_resubmission(feedback, original):
+                        messages.success(
+                            request,
+                            f'Phản ánh này trùng với phản ánh bạn đã gửi trước đó và đã được gộp vào. '
+                            f'Mã theo dõi: <strong>{original.tracking_code}</strong>.'
+                        )
+                        remember_submission(request, original.tracking_code)
+                        return redirect('feedback_success', tracking_code=original.tracking_code)
+                    
+                    # Khẩn cấp: xếp email cho admin vào outbox ngay; mức khác chờ bản tổng hợp
+                    send_notification_to_admin(feedback, image_count=len(images))
                     
                     # Hiển thị thông báo thành công
                     messages.success(
@@ -37,11 +90,14 @@ def submit_feedback(request):
                         f'Vui lòng lưu lại mã này để tra cứu.'
                     )
                     
+                    remember_submission(request, feedback.tracking_code)
                     return redirect('feedback_success', tracking_code=feedback.tracking_code)
             
             except Exception as e:
+                upload_handler.discard()
                 messages.error(request, f'Có lỗi xảy ra: {str(e)}')
         else:
+            upload_handler.discard()
             messages.error(request, 'Vui lòng kiểm tra lại thông tin đã nhập.')
     else:
         form = FeedbackForm()
@@ -52,8 +108,19 @@ def submit_feedback(request):
     })
 
 
+def remember_submission(request, tracking_code):
+    codes = request.session.get(SUBMITTED_CODES_SESSION_KEY, [])
+    request.session[SUBMITTED_CODES_SESSION_KEY] = [*codes, tracking_code][-SUBMITTED_CODES_LIMIT:]
+
+
 def feedback_success(request, tracking_code):
-    """Trang thông báo gửi thành công"""
+    """
+    Trang thông báo gửi thành công (có họ tên, số điện thoại người gửi).
+    Chỉ hiện cho session vừa gửi phản ánh; mã khác được chuyển sang trang tra
+    cứu, nơi có giới hạn số lần tra cứu, để không dùng trang này dò mã.
+    """
+    if tracking_code not in request.session.get(SUBMITTED_CODES_SESSION_KEY, []):
+        return redirect(f"{reverse('track_feedback')}?{urlencode({'tracking_code': tracking_code})}")
     feedback = get_object_or_404(Feedback, tracking_code=tracking_code)
     return render(request, 'feedback/success.html', {
         'feedback': feedback
@@ -62,91 +129,191 @@ def feedback_success(request, tracking_code):
 
 def track_feedback(request):
     """Tra cứu phản ánh theo mã tracking"""
-    tracking_code = request.GET.get('tracking_code', '').strip().upper()
+    tracking_code = normalize_tracking_code(request.GET.get('tracking_code'))
     feedback = None
+    retry_after = 0
     
     if tracking_code:
-        try:
-            feedback = Feedback.objects.prefetch_related('images').get(
-                tracking_code=tracking_code
-            )
-        except Feedback.DoesNotExist:
-            messages.error(request, 'Không tìm thấy phản ánh với mã này.')
+        retry_after = take_token(request)
+        if retry_after:
+            messages.error(request, f'Bạn tra cứu quá nhiều lần. Vui lòng thử lại sau {retry_after} giây.')
+        else:
+            # Bản đã cache (kèm danh mục, hình ảnh); mã không tồn tại cũng được cache ngắn hạn
+            feedback = get_tracking_snapshot(tracking_code)
+            if feedback is None:
+                messages.error(request, 'Không tìm thấy phản ánh với mã này.')
     
-    return render(request, 'feedback/track.html', {
+    response = render(request, 'feedback/track.html', {
         'feedback': feedback,
         'tracking_code': tracking_code
-    })
-
+    }, status=429 if retry_after else 200)
+    if retry_after:
+        response['Retry-After'] = retry_after
+    return response
 
-def send_notification_to_admin(feedback):
-    """Gửi email thông báo cho admin"""
-    try:
-        subject = f'[Phản ánh mới] {feedback.get_priority_display()} - {feedback.title}'
-        
-        message = f"""
-Có phản ánh mới từ hệ thống:
 
-Mã theo dõi: {feedback.tracking_code}
-Người gửi: {feedback.get_display_name()}
-Số điện thoại: {feedback.phone}
-Email: {feedback.email or 'Không có'}
+def track_status(request):
+    """Trạng thái phản ánh dạng JSON để người dân hỏi lại định kỳ"""
+    retry_after = take_token(request)
+    if retry_after:
+        response = JsonResponse({'error': 'rate_limited'}, status=429)
+        response['Retry-After'] = retry_after
+        return response
+    
+    feedback = get_tracking_snapshot(normalize_tracking_code(request.GET.get('tracking_code')))
+    if feedback is None:
+        return JsonResponse({'error': 'not_found'}, status=404)
+    return JsonResponse(status_payload(feedback))
 
-Danh mục: {feedback.category.name if feedback.category else 'Không xác định'}
-Mức độ: {feedback.get_priority_display()}
 
-Tiêu đề: {feedback.title}
-Nội dung:
-{feedback.content}
+def feedback_list(request):
+    """
+    Danh sách phản ánh công khai, phân trang keyset. Không hiện mã theo dõi:
+    mã là thứ duy nhất bảo vệ thông tin người gửi trên trang tra cứu.
+    """
+    filters = parse_list_filters(request.GET)
+    
+    feedbacks = Feedback.objects.select_related('category').only(
+        'title', 'status', 'priority', 'created_at', 'category__name'
+    )
+    if filters['category']:
+        feedbacks = feedbacks.filter(category_id=filters['category'])
+    if filters['status']:
+        feedbacks = feedbacks.filter(status=filters['status'])
+    if filters['priority']:
+        feedbacks = feedbacks.filter(priority=filters['priority'])
+    
+    try:
+        page = KeysetPaginator(feedbacks, FEEDBACK_LIST_PAGE_SIZE).page(request.GET.get('cursor', ''))
+    except InvalidCursor:
+        raise Http404('Cursor không hợp lệ.')
+    
+    # Giữ các tham số lọc cho phân trang
+    query_params = request.GET.copy()
+    query_params.pop('cursor', None)
+    
+    return render(request, 'feedback/list.html', {
+        'page_obj': page,
+        'feedbacks': page.object_list,
+        'query_string': query_params.urlencode(),
+        'filters': filters,
+        'categories': Category.objects.only('id', 'name'),
+        'status_choices': Feedback.STATUS_CHOICES,
+        'priority_choices': Feedback.PRIORITY_CHOICES,
+        **get_facet_counts(filters),
+    })
 
-Địa chỉ: {feedback.address or 'Không có'}
 
-Số hình ảnh đính kèm: {feedback.images.count()}
+def parse_list_filters(params):
+    """Đọc và kiểm tra các tham số lọc; giá trị không hợp lệ bị bỏ qua"""
+    status = params.get('status', '')
+    statuses = dict(Feedback.STATUS_CHOICES)
+    priorities = dict(Feedback.PRIORITY_CHOICES)
+    
+    def as_int(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    
+    priority = as_int(params.get('priority'))
+    return {
+        'category': as_int(params.get('category')),
+        'status': status if status in statuses else '',
+        'priority': priority if priority in priorities else None,
+    }
 
-Thời gian: {feedback.created_at.strftime('%d/%m/%Y %H:%M')}
 
----
-Vui lòng đăng nhập vào hệ thống để xem chi tiết và xử lý.
-        """
-        
-        # Lấy danh sách email admin từ settings
-        admin_emails = getattr(settings, 'ADMIN_EMAILS', [])
-        
-        if admin_emails:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=admin_emails,
-                fail_silently=False,
-            )
-    except Exception as e:
-        # Log lỗi nhưng không raise exception để không ảnh hưởng đến việc gửi form
-        print(f"Error sending email: {e}")
+def get_facet_counts(filters):
+    """
+    Đếm số phản ánh theo trạng thái và mức độ bằng một truy vấn GROUP BY.
+    Số theo trạng thái tôn trọng bộ lọc mức độ và ngược lại.
+    """
+    rows = Feedback.objects.all()
+    if filters['category']:
+        rows = rows.filter(category_id=filters['category'])
+    rows = rows.order_by().values('status', 'priority').annotate(total=Count('id'))
+    
+    status_counts = {value: 0 for value, _ in Feedback.STATUS_CHOICES}
+    priority_counts = {value: 0 for value, _ in Feedback.PRIORITY_CHOICES}
+    total = 0
+    for row in rows:
+        status_matches = not filters['status'] or row['status'] == filters['status']
+        priority_matches = not filters['priority'] or row['priority'] == filters['priority']
+        if priority_matches and row['status'] in status_counts:
+            status_counts[row['status']] += row['total']
+        if status_matches and row['priority'] in priority_counts:
+            priority_counts[row['priority']] += row['total']
+        if status_matches and priority_matches:
+            total += row['total']
+    
+    return {
+        'total_feedbacks': total,
+        'status_counts': [
+            (value, label, status_counts[value]) for value, label in Feedback.STATUS_CHOICES
+        ],
+        'priority_counts': [
+            (value, label, priority_counts[value]) for value, label in Feedback.PRIORITY_CHOICES
+        ],
+    }
 
 
-def feedback_list(request):
-    """Danh sách tất cả phản ánh (cho admin hoặc công khai)"""
-    feedbacks = Feedback.objects.select_related('category').prefetch_related('images')
+def feedback_map(request):
+    """
+    Các cụm phản ánh trong khung bản đồ dạng JSON: ?bbox=south,west,north,east
+    Mỗi cụm là một ô geohash kèm số phản ánh và tọa độ trung bình.
+    """
+    try:
+        south, west, north, east = (float(value) for value in request.GET.get('bbox', '').split(','))
+    except ValueError:
+        return JsonResponse({'error': 'invalid_bbox'}, status=400)
+    if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+        return JsonResponse({'error': 'invalid_bbox'}, status=400)
+    
+    # Ô cụm mịn hơn một bậc so với các ô phủ khung bản đồ
+    precision = min(len(next(iter(geo.cells_covering(south, west, north, east)))) + 1, MAP_MAX_PRECISION)
+    queryset = geo.within_bbox(Feedback.objects.exclude(status='rejected'), south, west, north, east)
     
-    # Lọc theo danh mục
-    category_id = request.GET.get('category')
-    if category_id:
-        feedbacks = feedbacks.filter(category_id=category_id)
+    return JsonResponse({
+        'clusters': [
+            {
+                'geohash': cluster['cell'],
+                'count': cluster['count'],
+                'latitude': float(cluster['latitude']),
+                'longitude': float(cluster['longitude']),
+            }
+            for cluster in geo.clusters(queryset, precision, min_count=MAP_MIN_CLUSTER_SIZE)
+        ],
+    })
+
+
+@csrf_exempt
+@require_POST
+def ingest_feedback(request):
+    """
+    Tiếp nhận lô phản ánh dạng JSONL từ kênh đối tác (xem feedback/ingest.py).
+    Xác thực bằng header "Authorization: Bearer <token>" (FEEDBACK_INGEST_TOKENS).
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    source = source_for_token(token.strip()) if scheme.lower() == 'bearer' else None
+    if source is None:
+        return JsonResponse({'error': 'unauthorized'}, status=401)
     
-    # Lọc theo trạng thái
-    status = request.GET.get('status')
-    if status:
-        feedbacks = feedbacks.filter(status=status)
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > MAX_REQUEST_BYTES:
+        return JsonResponse({'error': 'too_large', 'max_bytes': MAX_REQUEST_BYTES}, status=413)
     
-    # Lọc theo mức độ ưu tiên
-    priority = request.GET.get('priority')
-    if priority:
-        feedbacks = feedbacks.filter(priority=priority)
+    # Đọc từng dòng từ stream thay vì request.body (bị chặn bởi DATA_UPLOAD_MAX_MEMORY_SIZE)
+    lines = list(islice(request, MAX_REQUEST_LINES + 1))
+    if len(lines) > MAX_REQUEST_LINES:
+        return JsonResponse({'error': 'too_many_lines', 'max_lines': MAX_REQUEST_LINES}, status=413)
+    results = ingest_lines(lines, source)
     
-    return render(request, 'feedback/list.html', {
-        'feedbacks': feedbacks,
-        'categories': Category.objects.all(),
-        'status_choices': Feedback.STATUS_CHOICES,
-        'priority_choices': Feedback.PRIORITY_CHOICES,
-    })
\ No newline at end of file
+    created = sum('tracking_code' in result for result in results)
+    return JsonResponse(
+        {'created': created, 'failed': len(results) - created, 'results': results},
+        status=200 if created or not results else 400,
+    )
@@ -0,0 +1,39 @@
+"""
+Context processor cho cache fragment của các template chung (base.html, home.html)
+
+Khóa cache fragment chứa template_cache_version. Mặc định phiên bản là mã
+băm nội dung thư mục templates chung và manifest file tĩnh, nên mỗi lần
+deploy đổi template hoặc CSS/JS (tên file tĩnh có mã băm) thì các fragment
+cũ tự bị bỏ qua. Có thể đặt cố định bằng TEMPLATE_CACHE_VERSION.
+"""
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_template_cache_version():
+    version = getattr(settings, 'TEMPLATE_CACHE_VERSION', '')
+    if version:
+        return version
+
+    digest = hashlib.md5()
+    paths = [
+        path
+        for directory in settings.TEMPLATES[0]['DIRS']
+        for path in sorted(Path(directory).rglob('*.html'))
+    ]
+    paths.append(Path(settings.STATIC_ROOT) / 'staticfiles.json')
+    for path in paths:
+        if path.is_file():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def template_cache(request):
+    return {
+        'template_cache_version': get_template_cache_version(),
+        'template_cache_timeout': getattr(settings, 'TEMPLATE_CACHE_TIMEOUT', 24 * 60 * 60),
+    }
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     "feedback",  # App phản hồi
     'widget_tweaks',
      'contacts',
+    'rest_framework',
 ]
 
 MEDIA_URL = "/media/"
@@ -65,6 +66,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "public_service_project.context_processors.template_cache",
             ],
         },
     },
@@ -85,6 +87,57 @@ DATABASES = {
 }
 
 
+# Cache
+# Dùng Redis trên production (REDIS_URL), mặc định locmem khi chạy local.
+# locmem không chia sẻ giữa các worker gunicorn: việc tăng phiên bản danh mục
+# hay xóa cache ở một worker không tới các worker khác.
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'public-service-lookup',
+        }
+    }
+
+# Thời gian giữ cache danh mục dịch vụ (giây)
+SERVICES_CACHE_TIMEOUT = config('SERVICES_CACHE_TIMEOUT', default=3600, cast=int)
+
+
+# Cache fragment của base.html / home.html (xem public_service_project/context_processors.py)
+TEMPLATE_CACHE_VERSION = config('TEMPLATE_CACHE_VERSION', default='')
+TEMPLATE_CACHE_TIMEOUT = config('TEMPLATE_CACHE_TIMEOUT', default=24 * 60 * 60, cast=int)
+
+
+# Xử lý ảnh phản ánh (nén, tạo ảnh thu nhỏ) trong thread pool ngoài luồng request
+FEEDBACK_IMAGE_ASYNC = config('FEEDBACK_IMAGE_ASYNC', default=True, cast=bool)
+FEEDBACK_IMAGE_WORKERS = config('FEEDBACK_IMAGE_WORKERS', default=2, cast=int)
+
+# Số reverse proxy phía trước ứng dụng (0 = không có): giới hạn tra cứu theo IP
+# khi đó đọc IP người dân từ X-Forwarded-For thay vì IP của proxy
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
+
+# Token của các kênh đối tác gửi phản ánh theo lô, dạng "hotline:token1,zalo:token2"
+FEEDBACK_INGEST_TOKENS = config('FEEDBACK_INGEST_TOKENS', default='')
+
+
+# Django REST framework (API chỉ đọc cho đối tác và ứng dụng di động)
+REST_FRAMEWORK = {
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.AllowAny',
+    ],
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -126,6 +179,13 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # WhiteNoise configuration
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Trang chủ dựng sẵn thành file tĩnh lúc deploy (`manage.py prerender_home`);
+# khi bật, WhiteNoise trả PRERENDER_ROOT/index.html cho "/" mà không qua Django
+PRERENDER_ROOT = BASE_DIR / 'prerendered'
+if config('PRERENDERED_HOME', default=False, cast=bool):
+    WHITENOISE_ROOT = PRERENDER_ROOT
+    WHITENOISE_INDEX_FILE = True
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
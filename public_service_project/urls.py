@@ -5,14 +5,21 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
 from django.views.generic import TemplateView
+from rest_framework.routers import DefaultRouter
+
+from services.api import PublicServiceViewSet
 
 from services.views import home
 
+router = DefaultRouter()
+router.register('services', PublicServiceViewSet, basename='api-service')
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('services/', include('services.urls')),
     path("feedback/", include("feedback.urls")),
     path('contact/', include('contacts.urls')), 
+    path('api/', include(router.urls)),
     path('', TemplateView.as_view(template_name='home.html'), name='home'),
 ]
 
@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
+from .cache import bump_catalogue_version
 from .models import PublicService
 
 @admin.register(PublicService)
@@ -70,7 +73,10 @@ class PublicServiceAdmin(admin.ModelAdmin):
         """
         Action đánh dấu các dịch vụ là mức 4
         """
-        updated = queryset.update(service_level=4)
+        # updated_at cũng phải đổi để ETag/Last-Modified của API thay đổi theo
+        updated = queryset.update(service_level=4, updated_at=timezone.now())
+        # update() không phát signal nên phải tự vô hiệu hóa cache (sau khi commit)
+        transaction.on_commit(bump_catalogue_version)
         self.message_user(request, f'{updated} dịch vụ đã được cập nhật lên mức 4.')
     
     mark_as_level_4.short_description = 'Đánh dấu là Mức 4 (Giao dịch điện tử)'
\ No newline at end of file
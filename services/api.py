@@ -1,11 +1,170 @@
+"""
+API chỉ đọc cho danh mục Dịch vụ Hành chính Công
+
+- GET /api/services/       danh sách rút gọn, phân trang cursor, cùng bộ lọc với trang HTML
+- GET /api/services/<pk>/  chi tiết đầy đủ
+- ?fields=a,b              chỉ trả về các trường được chọn
+- ETag / Last-Modified lấy từ updated_at, trả 304 khi client đã có bản mới nhất
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import serializers, viewsets
-from .models import Service
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from .cache import CATALOGUE_CACHE_TIMEOUT, detail_cache_key, make_key, normalize_filters
+from .filters import filter_services, parse_filters
+from .models import PublicService
+from .pagination import KEYSET_ORDERING
+
+
+class SparseFieldsMixin:
+    """Cho phép chọn trường trả về bằng tham số ?fields=a,b"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        requested = request.query_params.get('fields')
+        if not requested:
+            return
+        allowed = {name.strip() for name in requested.split(',') if name.strip()}
+        for name in set(self.fields) - allowed:
+            self.fields.pop(name)
+
+
+class PublicServiceListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer rút gọn cho danh sách"""
+    jurisdiction_display = serializers.CharField(source='get_jurisdiction_display', read_only=True)
 
-class ServiceSerializer(serializers.ModelSerializer):
     class Meta:
-        model = Service
-        fields = "__all__"
+        model = PublicService
+        fields = [
+            'id',
+            'title',
+            'public_sector',
+            'department',
+            'jurisdiction',
+            'jurisdiction_display',
+            'service_level',
+            'processing_time',
+            'fee',
+            'created_at',
+            'updated_at',
+        ]
+
+
+class PublicServiceDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer đầy đủ cho trang chi tiết"""
+    jurisdiction_display = serializers.CharField(source='get_jurisdiction_display', read_only=True)
+    service_level_display = serializers.CharField(source='get_service_level_display', read_only=True)
+
+    class Meta:
+        model = PublicService
+        exclude = ['search_document']
+
+
+# Các cột cần đọc cho danh sách (bỏ trường tính toán)
+LIST_COLUMNS = [
+    name for name in PublicServiceListSerializer.Meta.fields
+    if name != 'jurisdiction_display'
+]
+
+
+class ServiceCursorPagination(CursorPagination):
+    ordering = KEYSET_ORDERING
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+def _conditional(request, response_factory, etag, last_modified):
+    """Trả 304 nếu client đã có bản mới nhất, ngược lại gắn ETag/Last-Modified"""
+    etag = f'"{etag}"'
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if not_modified is not None:
+        return not_modified
+
+    response = response_factory()
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+def _digest(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+class PublicServiceViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = PublicService.objects.all()
+    pagination_class = ServiceCursorPagination
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return PublicServiceListSerializer
+        return PublicServiceDetailSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Không tải các cột văn bản dài mà serializer rút gọn không dùng
+            queryset = filter_services(queryset, self.filters).only(*LIST_COLUMNS)
+        return queryset
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.filters = parse_filters(request.query_params)
+
+    def get_list_state(self):
+        """(số dòng, updated_at lớn nhất) của tập kết quả, cache theo phiên bản danh mục"""
+        key = make_key('api-list-state', normalize_filters(self.filters))
+        state = cache.get(key)
+        if state is None:
+            state = filter_services(PublicService.objects.all(), self.filters).aggregate(
+                count=Count('id'),
+                last_modified=Max('updated_at'),
+            )
+            cache.set(key, state, CATALOGUE_CACHE_TIMEOUT)
+        return state
+
+    def list(self, request, *args, **kwargs):
+        state = self.get_list_state()
+        etag = _digest(state['count'], state['last_modified'], sorted(request.query_params.lists()))
+        return _conditional(
+            request,
+            lambda: super(PublicServiceViewSet, self).list(request, *args, **kwargs),
+            etag,
+            state['last_modified'],
+        )
+
+    def get_object(self):
+        # Dùng chung cache chi tiết với ServiceDetailView
+        key = detail_cache_key(self.kwargs[self.lookup_field])
+        service = cache.get(key)
+        if service is None:
+            service = super().get_object()
+            cache.set(key, service, CATALOGUE_CACHE_TIMEOUT)
+        return service
 
-class ServiceViewSet(viewsets.ModelViewSet):
-    queryset = Service.objects.all()
-    serializer_class = ServiceSerializer
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = int(self.kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        self.kwargs[self.lookup_field] = pk
+        service = self.get_object()
+        etag = _digest(service.pk, service.updated_at, request.query_params.get('fields'))
+        return _conditional(
+            request,
+            lambda: Response(self.get_serializer(service).data),
+            etag,
+            service.updated_at,
+        )
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class ServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'services'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import install_sqlite_fts
+
+        # SQLite: dựng lại trigger FTS5 sau mỗi lần migrate
+        post_migrate.connect(install_sqlite_fts, sender=self)
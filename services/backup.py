@@ -0,0 +1,93 @@
+"""
+Tiện ích dùng chung cho lệnh backup / restore
+
+Mỗi bản backup là một thư mục gồm:
+- <app_label>.<model>.jsonl.gz : mỗi dòng là một object (định dạng serializer "python" của Django)
+- manifest.json                : số dòng, sha256 (của nội dung chưa nén) và mốc thời gian
+"""
+import json
+
+from django.apps import apps
+
+MANIFEST_NAME = 'manifest.json'
+
+# Các bảng không cần sao lưu (tự sinh lại khi migrate hoặc chỉ là dữ liệu tạm)
+EXCLUDED_MODELS = {
+    'auth.permission',
+    'contenttypes.contenttype',
+    'sessions.session',
+}
+
+# Trường dùng để lọc bản ghi thay đổi khi backup incremental, theo thứ tự ưu tiên
+CHANGE_FIELDS = ['updated_at', 'uploaded_at', 'created_at']
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def backup_filename(model):
+    return f'{model_label(model)}.jsonl.gz'
+
+
+def get_backup_models(labels=None):
+    """Danh sách model cần sao lưu, sắp theo thứ tự phụ thuộc khóa ngoại"""
+    if labels:
+        models = [apps.get_model(label) for label in labels]
+    else:
+        models = [
+            model for model in apps.get_models()
+            if model_label(model) not in EXCLUDED_MODELS
+            and not model._meta.proxy
+            and model._meta.managed
+        ]
+    return [model for level in dependency_levels(models) for model in level]
+
+
+def dependency_levels(models):
+    """
+    Chia model thành các tầng: model ở tầng sau chỉ tham chiếu tới model ở
+    tầng trước, nên các model cùng tầng có thể restore song song.
+    """
+    remaining = set(models)
+    levels = []
+    while remaining:
+        level = [
+            model for model in remaining
+            if not any(
+                dep in remaining and dep is not model
+                for dep in model_dependencies(model)
+            )
+        ]
+        if not level:
+            # Phụ thuộc vòng: restore tuần tự phần còn lại
+            level = list(remaining)
+        level.sort(key=model_label)
+        levels.append(level)
+        remaining -= set(level)
+    return levels
+
+
+def model_dependencies(model):
+    return {
+        field.related_model
+        for field in model._meta.get_fields()
+        if field.concrete and field.is_relation and field.related_model is not None
+    } | {
+        field.related_model
+        for field in model._meta.local_many_to_many
+    }
+
+
+def get_change_field(model):
+    """Trường thời gian dùng cho backup incremental, None nếu model không có"""
+    names = {field.name for field in model._meta.concrete_fields}
+    for name in CHANGE_FIELDS:
+        if name in names:
+            return name
+    return None
+
+
+def read_manifest(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,57 @@
+"""
+Cache kết quả cho danh mục dịch vụ
+
+Mọi khóa cache đều chứa "phiên bản danh mục". Khi dữ liệu thay đổi chỉ cần
+tăng phiên bản, các khóa cũ không còn được đọc tới và tự hết hạn, nên không
+bao giờ trả về trang cũ và không phải xóa từng khóa.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .search import tokenize
+
+CATALOGUE_VERSION_KEY = 'services:catalogue_version'
+CATALOGUE_CACHE_TIMEOUT = getattr(settings, 'SERVICES_CACHE_TIMEOUT', 60 * 60)
+
+
+def get_catalogue_version():
+    """Trả về phiên bản hiện tại của danh mục dịch vụ"""
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        # Khởi tạo bằng giá trị mới (không dùng 1) để khi khóa phiên bản bị
+        # đẩy khỏi cache, các trang cũ vẫn không thể bị đọc lại.
+        cache.add(CATALOGUE_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Vô hiệu hóa toàn bộ cache danh mục"""
+    try:
+        cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOGUE_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def normalize_filters(filters):
+    """Chuẩn hóa bộ lọc để các truy vấn tương đương dùng chung một khóa"""
+    normalized = dict(filters)
+    if normalized.get('title'):
+        normalized['title'] = ' '.join(tokenize(normalized['title']))
+    return tuple(sorted(normalized.items()))
+
+
+def make_key(prefix, *parts):
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'services:{prefix}:{get_catalogue_version()}:{digest}'
+
+
+def list_cache_key(filters, page=None, cursor=None):
+    return make_key('list', normalize_filters(filters), page, cursor)
+
+
+def detail_cache_key(pk):
+    return make_key('detail', pk)
@@ -0,0 +1,35 @@
+"""
+Bộ lọc dùng chung cho danh sách dịch vụ (trang HTML và API)
+"""
+from .search import search_services
+
+FILTER_PARAMS = ['title', 'public_sector', 'department', 'service_level', 'jurisdiction']
+
+
+def parse_filters(params):
+    """Đọc các tham số lọc từ request.GET / query_params"""
+    return {
+        param: params.get(param, '').strip()
+        for param in FILTER_PARAMS
+    }
+
+
+def filter_services(queryset, filters):
+    """Áp dụng các bộ lọc đã parse lên queryset"""
+    if filters['title']:
+        # Tìm kiếm toàn văn không dấu, xếp hạng theo độ liên quan
+        queryset = search_services(queryset, filters['title'])
+    
+    if filters['public_sector']:
+        queryset = queryset.filter(public_sector__icontains=filters['public_sector'])
+    
+    if filters['department']:
+        queryset = queryset.filter(department__icontains=filters['department'])
+    
+    if filters['service_level']:
+        queryset = queryset.filter(service_level=filters['service_level'])
+    
+    if filters['jurisdiction']:
+        queryset = queryset.filter(jurisdiction=filters['jurisdiction'])
+    
+    return queryset
@@ -0,0 +1,216 @@
+"""
+Import danh mục thủ tục hành chính từ file CSV / XLSX / JSONL
+
+    python manage.py import_services catalogue.csv
+    python manage.py import_services catalogue.xlsx --chunk-size 5000
+    python manage.py import_services catalogue.jsonl --dry-run
+
+File được đọc tuần tự theo từng lô nên bộ nhớ không phụ thuộc số dòng.
+Mỗi lô được upsert bằng bulk_create(update_conflicts=True) theo khóa tự
+nhiên (title, department, jurisdiction).
+"""
+import csv
+import json
+import os
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from services.cache import bump_catalogue_version
+from services.models import PublicService
+from services.search import build_search_document
+
+NATURAL_KEY = ['title', 'department', 'jurisdiction']
+
+# Các trường tính toán hoặc do hệ thống quản lý, không nhận từ file
+SYSTEM_FIELDS = {'id', 'created_at', 'updated_at', 'search_document'} | set(PublicService.LIST_FIELDS.values())
+
+IMPORT_FIELDS = [
+    field.name for field in PublicService._meta.concrete_fields
+    if field.name not in SYSTEM_FIELDS
+]
+
+UPDATE_FIELDS = [
+    name for name in IMPORT_FIELDS + sorted(SYSTEM_FIELDS - {'id', 'created_at'})
+    if name not in NATURAL_KEY
+]
+
+
+def build_header_map():
+    """Cho phép tiêu đề cột là tên trường hoặc verbose_name tiếng Việt"""
+    header_map = {}
+    for name in IMPORT_FIELDS:
+        field = PublicService._meta.get_field(name)
+        header_map[name.lower()] = name
+        header_map[str(field.verbose_name).strip().lower()] = name
+    return header_map
+
+
+def read_csv(path, encoding):
+    with open(path, newline='', encoding=encoding) as f:
+        yield from csv.DictReader(f)
+
+
+def read_jsonl(path, encoding):
+    """Dòng JSON lỗi được trả về dưới dạng ValidationError để báo lỗi theo dòng"""
+    with open(path, encoding=encoding) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield ValidationError(f'JSON không hợp lệ: {e.msg} (cột {e.colno}).')
+
+
+def read_xlsx(path, encoding):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise CommandError('Cần cài openpyxl để đọc file XLSX (pip install openpyxl).')
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell or '').strip() for cell in next(rows, [])]
+        for values in rows:
+            if any(value not in (None, '') for value in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+    'xlsx': read_xlsx,
+}
+
+
+class Command(BaseCommand):
+    help = 'Import/cập nhật hàng loạt Dịch vụ Hành chính Công từ file CSV, XLSX hoặc JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Đường dẫn file cần import')
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Định dạng file (mặc định đoán theo phần mở rộng)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Số dòng mỗi lô')
+        parser.add_argument('--encoding', default='utf-8-sig', help='Bảng mã của file CSV/JSONL')
+        parser.add_argument('--dry-run', action='store_true', help='Chỉ kiểm tra dữ liệu, không ghi vào database')
+        parser.add_argument('--max-errors', type=int, default=100, help='Số lỗi tối đa được in ra')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Không tìm thấy file: {path}')
+
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Định dạng không hỗ trợ: {file_format}')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size phải lớn hơn 0')
+
+        self.header_map = build_header_map()
+        self.max_errors = options['max_errors']
+        self.error_count = 0
+
+        rows = enumerate(READERS[file_format](path, options['encoding']), start=1)
+        valid_count = 0
+        written_count = 0
+
+        while True:
+            chunk = list(islice(rows, options['chunk_size']))
+            if not chunk:
+                break
+
+            services = self.build_services(chunk)
+            valid_count += len(services)
+            if services and not options['dry_run']:
+                written_count += self.upsert(services)
+
+        total = valid_count + self.error_count
+        if options['dry_run']:
+            summary = f'[Dry run] {total} dòng: {valid_count} hợp lệ, {self.error_count} lỗi.'
+        else:
+            summary = f'{total} dòng: {written_count} đã ghi, {self.error_count} lỗi.'
+        style = self.style.SUCCESS if not self.error_count else self.style.WARNING
+        self.stdout.write(style(summary))
+
+    def build_services(self, chunk):
+        """Chuyển một lô dòng thành PublicService đã validate, bỏ trùng khóa trong lô"""
+        services = {}
+        for line_number, row in chunk:
+            try:
+                service = self.build_service(row)
+            except ValidationError as e:
+                self.report_error(line_number, e)
+                continue
+            key = tuple(getattr(service, name) for name in NATURAL_KEY)
+            # Dòng xuất hiện sau trong file được ưu tiên
+            services.pop(key, None)
+            services[key] = service
+        return list(services.values())
+
+    def build_service(self, row):
+        if isinstance(row, ValidationError):
+            raise row
+        if not isinstance(row, dict):
+            raise ValidationError('Mỗi dòng phải là một đối tượng JSON.')
+
+        data = {}
+        for header, value in row.items():
+            name = self.header_map.get(str(header or '').strip().lower())
+            if name is None:
+                continue
+            value = '' if value is None else str(value).strip()
+            if value == '' and PublicService._meta.get_field(name).has_default():
+                # Ô trống thì dùng giá trị mặc định của model
+                continue
+            data[name] = value
+
+        service = PublicService(**data)
+        if data.get('service_level'):
+            try:
+                service.service_level = int(float(data['service_level']))
+            except (ValueError, OverflowError):
+                # "nan" -> ValueError, "inf" -> OverflowError
+                raise ValidationError({'service_level': ['Mức độ dịch vụ phải là số.']})
+
+        service.clean_fields(exclude=['id', 'created_at', 'updated_at'])
+        # bulk_create không gọi save() nên tự tính các trường dẫn xuất
+        service.search_document = build_search_document(service)
+        service.parse_list_fields()
+        return service
+
+    def upsert(self, services):
+        with transaction.atomic():
+            PublicService.objects.bulk_create(
+                services,
+                update_conflicts=True,
+                unique_fields=NATURAL_KEY,
+                update_fields=UPDATE_FIELDS,
+            )
+            # bulk_create không phát signal nên phải tự vô hiệu hóa cache (sau khi commit)
+            transaction.on_commit(bump_catalogue_version)
+        return len(services)
+
+    def report_error(self, line_number, error):
+        self.error_count += 1
+        if self.error_count > self.max_errors:
+            return
+        if hasattr(error, 'message_dict'):
+            detail = '; '.join(
+                f'{field}: {" ".join(messages)}'
+                for field, messages in error.message_dict.items()
+            )
+        else:
+            detail = ' '.join(error.messages)
+        self.stderr.write(f'Dòng {line_number}: {detail}')
+        if self.error_count == self.max_errors:
+            self.stderr.write('Đã đạt số lỗi tối đa, các lỗi tiếp theo sẽ không được in ra.')
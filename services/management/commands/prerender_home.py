@@ -0,0 +1,48 @@
+"""
+Dựng sẵn trang chủ thành file tĩnh (chạy lúc deploy, sau collectstatic)
+
+    python manage.py prerender_home
+    python manage.py prerender_home --output /srv/dvhcc/prerendered
+
+Ghi index.html (kèm index.html.gz) vào PRERENDER_ROOT. Khi đặt
+PRERENDERED_HOME=True, WhiteNoise trả file này cho "/" mà không qua Django.
+Trang dựng sẵn không có thông báo (messages) của từng người dùng; thông báo
+chưa đọc sẽ hiện ở trang động tiếp theo.
+"""
+import gzip
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+from django.urls import resolve
+
+
+def write_atomic(path, data):
+    """Ghi file tạm rồi đổi tên để WhiteNoise không bao giờ đọc file ghi dở"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class Command(BaseCommand):
+    help = 'Dựng sẵn trang chủ thành file tĩnh cho WhiteNoise'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.PRERENDER_ROOT), help='Thư mục ghi index.html')
+
+    def handle(self, *args, **options):
+        request = HttpRequest()
+        request.method = 'GET'
+        request.path = request.path_info = '/'
+        request.resolver_match = resolve('/')
+
+        html = render_to_string('home.html', request=request).encode()
+
+        os.makedirs(options['output'], exist_ok=True)
+        path = os.path.join(options['output'], 'index.html')
+        write_atomic(path, html)
+        write_atomic(f'{path}.gz', gzip.compress(html))
+        self.stdout.write(self.style.SUCCESS(f'Đã dựng trang chủ: {path} ({len(html)} bytes)'))
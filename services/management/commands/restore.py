@@ -0,0 +1,168 @@
+"""
+Khôi phục dữ liệu từ thư mục do lệnh backup tạo ra
+
+    python manage.py restore backups/20250101-020000-000000
+    python manage.py restore backups/20250101-020000-000000 --workers 4 --batch-size 2000
+
+Các model được restore theo tầng phụ thuộc khóa ngoại; model cùng tầng chạy
+song song trên các kết nối database riêng. Mỗi lô được ghi bằng bulk_create
+(upsert theo khóa chính), nên có thể áp dụng bản incremental lên trên bản full.
+Checksum trong manifest được kiểm tra; model nào sai checksum sẽ bị rollback.
+"""
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+from django.apps import apps
+from django.core import serializers
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from services.backup import MANIFEST_NAME, dependency_levels, model_label, read_manifest
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+@contextmanager
+def preserve_timestamps(model):
+    """
+    Tạm tắt auto_now/auto_now_add để bulk_create giữ nguyên created_at,
+    updated_at... đã sao lưu thay vì ghi đè bằng thời điểm hiện tại.
+    """
+    saved = []
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            saved.append((field, field.auto_now, field.auto_now_add))
+            field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Khôi phục dữ liệu từ bản backup (JSONL nén) bằng bulk_create song song'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Thư mục backup chứa manifest.json')
+        parser.add_argument('--workers', type=int, default=4, help='Số model restore song song')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Số dòng mỗi lần bulk_create')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        manifest_path = os.path.join(options['path'], MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            raise CommandError(f'Không tìm thấy {manifest_path}')
+        manifest = read_manifest(manifest_path)
+
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        self.database = options['database']
+
+        workers = options['workers']
+        if connections[self.database].vendor == 'sqlite' and workers > 1:
+            # SQLite chỉ cho một tiến trình ghi tại một thời điểm
+            workers = 1
+
+        models = {apps.get_model(label): entry for label, entry in manifest['models'].items()}
+        failures = []
+
+        for level in dependency_levels(list(models)):
+            if workers == 1:
+                results = [(model, self.run_restore(model, models[model])) for model in level]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        (model, executor.submit(self.restore_in_thread, model, models[model]))
+                        for model in level
+                    ]
+                    results = [(model, future.result()) for model, future in futures]
+
+            for model, rows in results:
+                if rows is None:
+                    failures.append(model_label(model))
+                    self.stderr.write(f'  {model_label(model)}: sai checksum, đã rollback')
+                else:
+                    self.stdout.write(f'  {model_label(model)}: {rows} dòng')
+
+        self.reset_sequences(list(models))
+        # bulk_create không phát signal: xóa cache để không phục vụ dữ liệu cũ
+        cache.clear()
+
+        if failures:
+            raise CommandError(f'Restore không hoàn tất, sai checksum: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(f'✓ Restore thành công từ {self.path}'))
+
+    def restore_in_thread(self, model, entry):
+        try:
+            return self.run_restore(model, entry)
+        finally:
+            # Mỗi luồng dùng kết nối riêng, đóng lại khi xong
+            connections[self.database].close()
+
+    def run_restore(self, model, entry):
+        """Restore một model trong một transaction, trả None nếu sai checksum"""
+        try:
+            with transaction.atomic(using=self.database), preserve_timestamps(model):
+                rows, checksum = self.load_file(model, os.path.join(self.path, entry['file']))
+                if checksum != entry['sha256'] or rows != entry['rows']:
+                    raise ChecksumMismatch(model_label(model))
+        except ChecksumMismatch:
+            return None
+        return rows
+
+    def load_file(self, model, path):
+        checksum = hashlib.sha256()
+        rows = 0
+        with gzip.open(path, 'rb') as f:
+            while True:
+                lines = list(islice(f, self.batch_size))
+                if not lines:
+                    break
+                for line in lines:
+                    checksum.update(line)
+                rows += len(lines)
+                self.save_batch(model, [json.loads(line) for line in lines])
+        return rows, checksum.hexdigest()
+
+    def save_batch(self, model, data):
+        deserialized = list(serializers.deserialize(
+            'python', data, using=self.database, ignorenonexistent=True,
+        ))
+        objects = [item.object for item in deserialized]
+        pk_name = model._meta.pk.name
+        update_fields = [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        if update_fields:
+            model._default_manager.using(self.database).bulk_create(
+                objects,
+                update_conflicts=True,
+                unique_fields=[pk_name],
+                update_fields=update_fields,
+            )
+        else:
+            model._default_manager.using(self.database).bulk_create(objects, ignore_conflicts=True)
+
+        for item in deserialized:
+            for field_name, values in (item.m2m_data or {}).items():
+                getattr(item.object, field_name).set(values)
+
+    def reset_sequences(self, models):
+        """Đồng bộ lại sequence khóa chính (PostgreSQL) sau khi chèn với id có sẵn"""
+        connection = connections[self.database]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
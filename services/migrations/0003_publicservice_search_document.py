@@ -0,0 +1,70 @@
+from django.db import migrations, models
+
+from services.search import (
+    FTS_TABLE,
+    SEARCH_CONFIG,
+    SEARCH_INDEX_NAME,
+    build_search_document,
+    sqlite_fts_statements,
+)
+
+
+def backfill_search_document(apps, schema_editor):
+    PublicService = apps.get_model('services', 'PublicService')
+    batch = []
+    for service in PublicService.objects.all().iterator(chunk_size=500):
+        service.search_document = build_search_document(service)
+        batch.append(service)
+        if len(batch) >= 500:
+            PublicService.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        PublicService.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    PublicService = apps.get_model('services', 'PublicService')
+    table = PublicService._meta.db_table
+
+    if vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        schema_editor.add_index(PublicService, GinIndex(
+            SearchVector('search_document', config=SEARCH_CONFIG),
+            name=SEARCH_INDEX_NAME,
+        ))
+
+    elif vendor == 'sqlite':
+        for statement in sqlite_fts_statements(table):
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {SEARCH_INDEX_NAME}')
+
+    elif vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_publicservice_delete_service'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicservice',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False, verbose_name='Chỉ mục tìm kiếm'),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
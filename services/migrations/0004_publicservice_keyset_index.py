@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_publicservice_search_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='publicservice',
+            index=models.Index(fields=['-created_at', 'id'], name='services_pu_created_935730_idx'),
+        ),
+    ]
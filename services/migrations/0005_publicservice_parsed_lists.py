@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:01
+
+from django.db import migrations, models
+
+from services.models import split_lines
+
+LIST_FIELDS = {
+    'legal_basis': 'legal_basis_list',
+    'procedure_steps': 'procedure_steps_list',
+    'required_documents': 'required_documents_list',
+}
+
+
+def backfill_list_fields(apps, schema_editor):
+    PublicService = apps.get_model('services', 'PublicService')
+    batch = []
+    for service in PublicService.objects.all().iterator(chunk_size=500):
+        for source, target in LIST_FIELDS.items():
+            setattr(service, target, split_lines(getattr(service, source)))
+        batch.append(service)
+        if len(batch) >= 500:
+            PublicService.objects.bulk_update(batch, list(LIST_FIELDS.values()))
+            batch = []
+    if batch:
+        PublicService.objects.bulk_update(batch, list(LIST_FIELDS.values()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_publicservice_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicservice',
+            name='legal_basis_list',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Căn cứ Pháp lý (đã tách dòng)'),
+        ),
+        migrations.AddField(
+            model_name='publicservice',
+            name='procedure_steps_list',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Trình tự Thực hiện (đã tách dòng)'),
+        ),
+        migrations.AddField(
+            model_name='publicservice',
+            name='required_documents_list',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Thành phần Hồ sơ (đã tách dòng)'),
+        ),
+        migrations.RunPython(backfill_list_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:02
+
+from django.db import migrations, models
+from django.db.models import Count
+
+NATURAL_KEY = ['title', 'department', 'jurisdiction']
+
+
+def rename_duplicates(apps, schema_editor):
+    """
+    Dữ liệu nhập tay trước đây có thể trùng khóa tự nhiên. Giữ nguyên bản ghi
+    cũ nhất, các bản còn lại được thêm hậu tố "(trùng #id)" vào tên để
+    constraint tạo được mà không mất dữ liệu; admin có thể gộp/xóa sau.
+    """
+    PublicService = apps.get_model('services', 'PublicService')
+    max_length = PublicService._meta.get_field('title').max_length
+    duplicate_keys = (
+        PublicService.objects.values(*NATURAL_KEY)
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for key in duplicate_keys.iterator():
+        key.pop('total')
+        for service in PublicService.objects.filter(**key).order_by('pk')[1:]:
+            suffix = f' (trùng #{service.pk})'
+            service.title = service.title[:max_length - len(suffix)] + suffix
+            service.save(update_fields=['title'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0005_publicservice_parsed_lists'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='publicservice',
+            constraint=models.UniqueConstraint(fields=('title', 'department', 'jurisdiction'), name='services_publicservice_natural_key'),
+        ),
+    ]
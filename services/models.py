@@ -1,5 +1,14 @@
 from django.db import models
 
+from .search import build_search_document
+
+
+def split_lines(text):
+    """Tách văn bản nhiều dòng thành danh sách, bỏ dòng trống"""
+    if not text:
+        return []
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
 class PublicService(models.Model):
     """
     Model lưu trữ thông tin Dịch vụ Hành chính Công
@@ -94,6 +103,35 @@ class PublicService(models.Model):
         blank=True
     )
     
+    # Bản đã tách dòng của các trường nhiều dòng, tính sẵn khi lưu
+    legal_basis_list = models.JSONField(
+        verbose_name='Căn cứ Pháp lý (đã tách dòng)',
+        default=list,
+        blank=True,
+        editable=False
+    )
+    
+    procedure_steps_list = models.JSONField(
+        verbose_name='Trình tự Thực hiện (đã tách dòng)',
+        default=list,
+        blank=True,
+        editable=False
+    )
+    
+    required_documents_list = models.JSONField(
+        verbose_name='Thành phần Hồ sơ (đã tách dòng)',
+        default=list,
+        blank=True,
+        editable=False
+    )
+    
+    # Văn bản đã bỏ dấu dùng cho tìm kiếm toàn văn (xem services/search.py)
+    search_document = models.TextField(
+        verbose_name='Chỉ mục tìm kiếm',
+        blank=True,
+        editable=False
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Ngày cập nhật')
     
@@ -101,10 +139,44 @@ class PublicService(models.Model):
         verbose_name = 'Dịch vụ Hành chính Công'
         verbose_name_plural = 'Dịch vụ Hành chính Công'
         ordering = ['-created_at']
+        indexes = [
+            # Phục vụ phân trang keyset theo (-created_at, id)
+            models.Index(fields=['-created_at', 'id']),
+        ]
+        constraints = [
+            # Khóa tự nhiên dùng khi import/upsert danh mục thủ tục
+            models.UniqueConstraint(
+                fields=['title', 'department', 'jurisdiction'],
+                name='services_publicservice_natural_key',
+            ),
+        ]
         
+    # Trường nhiều dòng -> trường JSON chứa bản đã tách dòng
+    LIST_FIELDS = {
+        'legal_basis': 'legal_basis_list',
+        'procedure_steps': 'procedure_steps_list',
+        'required_documents': 'required_documents_list',
+    }
+    
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        # Tính lại chỉ mục tìm kiếm và các danh sách đã tách dòng mỗi khi lưu
+        self.search_document = build_search_document(self)
+        self.parse_list_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = (
+                set(update_fields) | {'search_document'} | set(self.LIST_FIELDS.values())
+            )
+        super().save(*args, **kwargs)
+    
+    def parse_list_fields(self):
+        """Tách procedure_steps, required_documents, legal_basis thành danh sách"""
+        for source, target in self.LIST_FIELDS.items():
+            setattr(self, target, split_lines(getattr(self, source)))
+    
     def get_service_level_display_short(self):
         """Trả về mức độ dịch vụ dạng ngắn gọn"""
         return f"Mức {self.service_level}"
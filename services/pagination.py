@@ -0,0 +1,137 @@
+"""
+Phân trang keyset (cursor) cho danh sách dịch vụ
+
+Sắp xếp cố định theo (-created_at, id) và lọc theo khóa của dòng cuối trang
+trước, nên trang sâu không phải trả chi phí OFFSET và không cần COUNT(*).
+
+Kèm các Paginator tránh COUNT(*) trên bảng lớn cho phân trang theo số trang.
+"""
+import base64
+import binascii
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+KEYSET_ORDERING = ('-created_at', 'id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj):
+    """Mã hóa (created_at, id) của một dòng thành chuỗi an toàn cho URL"""
+    raw = f'{obj.created_at.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Giải mã cursor, raise InvalidCursor nếu không hợp lệ"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if created_at is None:
+        raise InvalidCursor(cursor)
+    return created_at, pk
+
+
+class KeysetPage:
+    """Trang kết quả của KeysetPaginator (chỉ hỗ trợ đi tiếp)"""
+
+    def __init__(self, object_list, next_cursor, is_first):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return not self.is_first
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset.order_by(*KEYSET_ORDERING)
+        self.per_page = per_page
+
+    def page(self, cursor):
+        queryset = self.queryset
+        if cursor:
+            created_at, pk = decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) |
+                Q(created_at=created_at, id__gt=pk)
+            )
+
+        # Lấy dư một dòng để biết còn trang sau hay không
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        next_cursor = encode_cursor(rows[-1]) if has_next else None
+        return KeysetPage(rows, next_cursor, is_first=not cursor)
+
+
+class PrecountedPaginator(Paginator):
+    """Paginator dùng số lượng đã biết trước (ví dụ từ cache) thay vì chạy COUNT"""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count
+
+
+def estimate_count(queryset):
+    """
+    Số dòng planner của PostgreSQL ước tính cho queryset (EXPLAIN, không chạy
+    truy vấn); None với backend khác.
+    """
+    if not hasattr(queryset, 'query'):
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator cho bảng lớn: dùng số dòng ước tính của planner thay vì COUNT(*)
+    khi ước tính vượt EXACT_COUNT_LIMIT; kết quả nhỏ (thường là sau khi lọc)
+    vẫn được đếm chính xác.
+    """
+    EXACT_COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < self.EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
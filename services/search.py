@@ -0,0 +1,146 @@
+"""
+Tìm kiếm toàn văn cho PublicService
+
+Mỗi dịch vụ lưu sẵn một "search_document" đã bỏ dấu tiếng Việt và chuyển
+về chữ thường, nên "giay phep lai xe" khớp với "Giấy phép lái xe".
+
+- PostgreSQL: GIN index trên to_tsvector('simple', search_document)
+- SQLite: bảng ảo FTS5 (external content) đồng bộ bằng trigger
+- Backend khác: icontains trên search_document
+"""
+import re
+import unicodedata
+
+from django.db import connection, connections
+from django.db.models.expressions import RawSQL
+
+# Các trường được đưa vào chỉ mục tìm kiếm
+SEARCH_FIELDS = ['title', 'public_sector', 'department', 'description', 'legal_basis']
+
+SEARCH_CONFIG = 'simple'
+SEARCH_INDEX_NAME = 'services_search_gin'
+FTS_TABLE = 'services_publicservice_fts'
+
+_TERM_RE = re.compile(r'\w+')
+# Dấu thanh và dấu phụ tiếng Việt sau khi tách NFD
+_COMBINING_RE = re.compile('[\u0300-\u036f]')
+
+
+def fold_diacritics(text):
+    """Bỏ dấu tiếng Việt và chuyển về chữ thường"""
+    if not text:
+        return ''
+    if text.isascii():
+        return text.lower()
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    stripped = _COMBINING_RE.sub('', unicodedata.normalize('NFD', text))
+    return unicodedata.normalize('NFC', stripped).lower()
+
+
+def build_search_document(service):
+    """Ghép các trường tìm kiếm của một dịch vụ thành văn bản đã bỏ dấu"""
+    parts = [getattr(service, field, '') or '' for field in SEARCH_FIELDS]
+    return fold_diacritics(' '.join(part for part in parts if part))
+
+
+def tokenize(query):
+    """Tách từ khóa tìm kiếm thành các term đã bỏ dấu"""
+    return _TERM_RE.findall(fold_diacritics(query))
+
+
+def sqlite_fts_statements(table):
+    """
+    DDL cho bảng FTS5 và trigger đồng bộ. Dùng IF NOT EXISTS vì SQLite
+    xóa trigger mỗi khi Django dựng lại bảng gốc trong migration.
+    """
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"search_document, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, search_document) "
+        f"VALUES (new.id, new.search_document); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+        f"VALUES ('delete', old.id, old.search_document); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+        f"VALUES ('delete', old.id, old.search_document); "
+        f"INSERT INTO {FTS_TABLE}(rowid, search_document) "
+        f"VALUES (new.id, new.search_document); END",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+
+
+def install_sqlite_fts(sender=None, using='default', **kwargs):
+    """Handler post_migrate: đảm bảo bảng FTS5 và trigger luôn tồn tại"""
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+
+    from .models import PublicService
+
+    table = PublicService._meta.db_table
+    if table not in conn.introspection.table_names():
+        return
+    with conn.cursor() as cursor:
+        for statement in sqlite_fts_statements(table):
+            cursor.execute(statement)
+
+
+def search_services(queryset, query):
+    """
+    Lọc và xếp hạng queryset theo từ khóa.
+    Mỗi term được so khớp theo tiền tố để hỗ trợ tìm kiếm khi đang gõ.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return queryset
+
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        return _search_postgresql(queryset, terms)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, terms)
+
+    for term in terms:
+        queryset = queryset.filter(search_document__icontains=term)
+    return queryset
+
+
+def _search_postgresql(queryset, terms):
+    # Import tại chỗ để môi trường không có psycopg vẫn chạy được
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    vector = SearchVector('search_document', config=SEARCH_CONFIG)
+    search_query = SearchQuery(
+        ' & '.join(f'{term}:*' for term in terms),
+        config=SEARCH_CONFIG,
+        search_type='raw',
+    )
+    return (
+        queryset
+        .annotate(search_vector=vector)
+        .filter(search_vector=search_query)
+        .annotate(search_rank=SearchRank(vector, search_query))
+        .order_by('-search_rank', '-created_at', '-id')
+    )
+
+
+def _search_sqlite(queryset, terms):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    table = queryset.model._meta.db_table
+    return (
+        queryset
+        .filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,),
+        ))
+        .annotate(search_rank=RawSQL(
+            f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+            (match,),
+        ))
+        # bm25() trả về giá trị âm, càng nhỏ càng liên quan
+        .order_by('search_rank', '-created_at', '-id')
+    )
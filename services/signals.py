@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalogue_version
+from .models import PublicService
+
+
+@receiver(post_save, sender=PublicService)
+@receiver(post_delete, sender=PublicService)
+def invalidate_catalogue_cache(sender, **kwargs):
+    """
+    Tăng phiên bản danh mục mỗi khi dịch vụ thay đổi, sau khi transaction
+    commit: tăng sớm hơn thì request khác có thể đọc dữ liệu cũ và cache nó
+    dưới phiên bản mới.
+    """
+    transaction.on_commit(bump_catalogue_version)
@@ -0,0 +1,431 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from public_service_project.context_processors import get_template_cache_version
+
+from .models import PublicService
+from .search import fold_diacritics, search_services
+
+
+def create_service(**kwargs):
+    data = {
+        'title': 'Cấp lại Giấy phép lái xe',
+        'public_sector': 'Giao thông Vận tải',
+        'department': 'Sở Giao thông Vận tải',
+    }
+    data.update(kwargs)
+    return PublicService.objects.create(**data)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SearchTests(TestCase):
+    def test_fold_diacritics(self):
+        self.assertEqual(fold_diacritics('Giấy phép lái xe'), 'giay phep lai xe')
+        self.assertEqual(fold_diacritics('Đăng ký hộ tịch'), 'dang ky ho tich')
+
+    def test_search_without_diacritics(self):
+        service = create_service()
+        create_service(title='Đăng ký khai sinh', public_sector='Tư pháp', department='UBND cấp xã')
+
+        results = list(search_services(PublicService.objects.all(), 'giay phep lai xe'))
+        self.assertEqual(results, [service])
+
+    def test_search_matches_prefix_and_other_fields(self):
+        service = create_service(title='Đăng ký khai sinh', public_sector='Tư pháp', department='UBND cấp xã')
+
+        results = list(search_services(PublicService.objects.all(), 'tu ph'))
+        self.assertEqual(results, [service])
+
+    def test_search_follows_updates(self):
+        service = create_service()
+        service.title = 'Đổi Giấy phép lái xe quốc tế'
+        service.save()
+
+        self.assertEqual(list(search_services(PublicService.objects.all(), 'quoc te')), [service])
+        service.delete()
+        self.assertFalse(search_services(PublicService.objects.all(), 'quoc te').exists())
+
+    def test_list_view_search(self):
+        create_service()
+        response = self.client.get(reverse('services:service_list'), {'title': 'lai xe'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['services']), 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ServiceListViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(25):
+            create_service(title=f'Thủ tục {i}', service_level=(i % 4) + 1)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_query_count(self):
+        # Một COUNT của paginator và một SELECT cho trang hiện tại
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('services:service_list'), {'page': 2})
+        self.assertEqual(response.context['total_services'], 25)
+        self.assertEqual(len(response.context['services']), 10)
+
+    def test_filtered_list_query_count(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('services:service_list'),
+                {'title': 'thu tuc', 'service_level': 4},
+            )
+        self.assertTrue(response.context['is_searching'])
+        self.assertEqual(response.context['total_services'], 6)
+
+    def test_cursor_pagination_walks_all_rows(self):
+        seen = []
+        cursor = ''
+        while True:
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse('services:service_list'), {'cursor': cursor})
+            page = response.context['page_obj']
+            seen.extend(service.pk for service in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+
+        expected = list(
+            PublicService.objects.order_by('-created_at', 'id').values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertIsNone(response.context['total_services'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('services:service_list'), {'cursor': 'khong-hop-le'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CatalogueCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = create_service()
+
+    def test_list_served_from_cache(self):
+        url = reverse('services:service_list')
+        self.client.get(url, {'title': 'Giấy phép'})
+        # Cùng tổ hợp bộ lọc sau khi chuẩn hóa dùng lại kết quả đã cache
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'title': '  giay PHEP '})
+        self.assertEqual(response.context['total_services'], 1)
+
+    def test_save_invalidates_list_and_detail(self):
+        list_url = reverse('services:service_list')
+        detail_url = reverse('services:service_detail', args=[self.service.pk])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        # Cache chỉ bị vô hiệu hóa khi transaction commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.title = 'Tên mới'
+            self.service.save()
+            create_service(title='Thủ tục khác')
+
+        response = self.client.get(list_url)
+        self.assertEqual(response.context['total_services'], 2)
+        response = self.client.get(detail_url)
+        self.assertEqual(response.context['service'].title, 'Tên mới')
+
+    def test_delete_invalidates_list(self):
+        url = reverse('services:service_list')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.context['total_services'], 0)
+
+    def test_bulk_action_invalidates_detail(self):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        self.service.service_level = 1
+        self.service.save()
+        detail_url = reverse('services:service_detail', args=[self.service.pk])
+        self.client.get(detail_url)
+
+        model_admin = site._registry[PublicService]
+        request = RequestFactory().post('/')
+        model_admin.message_user = lambda *args, **kwargs: None
+        with self.captureOnCommitCallbacks() as callbacks:
+            model_admin.mark_as_level_4(request, PublicService.objects.all())
+        # Trước khi commit, cache cũ vẫn được phục vụ
+        self.assertEqual(self.client.get(detail_url).context['service'].service_level, 1)
+        for callback in callbacks:
+            callback()
+
+        response = self.client.get(detail_url)
+        self.assertEqual(response.context['service'].service_level, 4)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ParsedListFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_list_fields_parsed_on_save(self):
+        service = create_service(
+            procedure_steps='Bước 1: Nộp hồ sơ\n\n  Bước 2: Nhận kết quả  \n',
+            required_documents='Tờ khai\r\nBản sao CCCD',
+        )
+        self.assertEqual(service.procedure_steps_list, ['Bước 1: Nộp hồ sơ', 'Bước 2: Nhận kết quả'])
+        self.assertEqual(service.required_documents_list, ['Tờ khai', 'Bản sao CCCD'])
+        self.assertEqual(service.legal_basis_list, [])
+
+        service.legal_basis = 'Luật Giao thông đường bộ'
+        service.save(update_fields=['legal_basis'])
+        service.refresh_from_db()
+        self.assertEqual(service.legal_basis_list, ['Luật Giao thông đường bộ'])
+
+    def test_detail_renders_parsed_lists(self):
+        service = create_service(procedure_steps='Nộp hồ sơ\nNhận kết quả')
+        response = self.client.get(reverse('services:service_detail', args=[service.pk]))
+        self.assertContains(response, 'Nhận kết quả')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ServiceAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = create_service(procedure_steps='Nộp hồ sơ\nNhận kết quả')
+        create_service(title='Đăng ký khai sinh', public_sector='Tư pháp', department='UBND cấp xã')
+
+    def test_list_uses_slim_serializer_and_filters(self):
+        response = self.client.get('/api/services/', {'title': 'giay phep'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([item['id'] for item in results], [self.service.pk])
+        self.assertNotIn('description', results[0])
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(f'/api/services/{self.service.pk}/', {'fields': 'id,procedure_steps_list'})
+        self.assertEqual(response.json(), {
+            'id': self.service.pk,
+            'procedure_steps_list': ['Nộp hồ sơ', 'Nhận kết quả'],
+        })
+
+    def test_conditional_list_returns_304(self):
+        response = self.client.get('/api/services/')
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/services/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.delete()
+        response = self.client.get('/api/services/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_detail_returns_304(self):
+        url = f'/api/services/{self.service.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.fee = 'Miễn phí'
+            self.service.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['fee'], 'Miễn phí')
+
+    def test_bulk_action_changes_etags(self):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        list_etag = self.client.get('/api/services/')['ETag']
+        detail_url = f'/api/services/{self.service.pk}/'
+        detail_etag = self.client.get(detail_url)['ETag']
+
+        model_admin = site._registry[PublicService]
+        model_admin.message_user = lambda *args, **kwargs: None
+        with self.captureOnCommitCallbacks(execute=True):
+            model_admin.mark_as_level_4(RequestFactory().post('/'), PublicService.objects.all())
+
+        self.assertEqual(self.client.get('/api/services/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['service_level'], 4)
+
+
+class ImportServicesCommandTests(TestCase):
+    def write_file(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_services', path, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_upsert_on_natural_key(self):
+        path = self.write_file('.csv', (
+            'Tên Thủ tục Hành chính,public_sector,department,jurisdiction,service_level,procedure_steps\n'
+            'Cấp lại Giấy phép lái xe,Giao thông,Sở GTVT,cap_tinh,3,"Nộp hồ sơ\nNhận kết quả"\n'
+            'Đăng ký khai sinh,Tư pháp,UBND xã,cap_xa,,\n'
+            ',Tư pháp,UBND xã,khong_ton_tai,9,\n'
+        ))
+        stdout, stderr = self.run_import(path, chunk_size=2)
+        self.assertIn('2 đã ghi, 1 lỗi', stdout)
+        self.assertIn('Dòng 3', stderr)
+
+        service = PublicService.objects.get(title='Cấp lại Giấy phép lái xe')
+        self.assertEqual(service.service_level, 3)
+        self.assertEqual(service.procedure_steps_list, ['Nộp hồ sơ', 'Nhận kết quả'])
+        self.assertEqual(PublicService.objects.get(title='Đăng ký khai sinh').service_level, 4)
+        self.assertEqual(
+            list(search_services(PublicService.objects.all(), 'giay phep')),
+            [service],
+        )
+
+        path = self.write_file('.jsonl', (
+            '{"title": "Cấp lại Giấy phép lái xe", "department": "Sở GTVT", '
+            '"jurisdiction": "cap_tinh", "public_sector": "Giao thông", "fee": "135.000 VNĐ"}\n'
+        ))
+        self.run_import(path)
+        self.assertEqual(PublicService.objects.count(), 2)
+        service.refresh_from_db()
+        self.assertEqual(service.fee, '135.000 VNĐ')
+
+    def test_xlsx_import(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Tên Thủ tục Hành chính', 'public_sector', 'department', 'jurisdiction', 'service_level'])
+        sheet.append(['Cấp lại Giấy phép lái xe', 'Giao thông', 'Sở GTVT', 'cap_tinh', 3])
+        sheet.append([None, None, None, None, None])
+        sheet.append(['Đăng ký khai sinh', 'Tư pháp', 'UBND xã', 'cap_xa', 'x'])
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        workbook.save(path)
+
+        stdout, stderr = self.run_import(path)
+        self.assertIn('1 đã ghi, 1 lỗi', stdout)
+        self.assertIn('Dòng 2', stderr)
+        self.assertEqual(PublicService.objects.get().service_level, 3)
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write_file('.csv', 'title,public_sector,department\nThủ tục A,Tư pháp,UBND xã\n')
+        stdout, _ = self.run_import(path, dry_run=True)
+        self.assertIn('1 hợp lệ', stdout)
+        self.assertFalse(PublicService.objects.exists())
+
+    def test_malformed_jsonl_lines_are_row_errors(self):
+        path = self.write_file('.jsonl', (
+            '{"title": "Thủ tục A", "public_sector": "Tư pháp", "department": "UBND xã"}\n'
+            '{"title": "Thủ tục B", \n'
+            '["không phải đối tượng"]\n'
+            '{"title": "Thủ tục C", "public_sector": "Tư pháp", "department": "UBND xã", "service_level": "inf"}\n'
+            '{"title": "Thủ tục D", "public_sector": "Tư pháp", "department": "UBND xã", "service_level": "nan"}\n'
+            '{"title": "Thủ tục E", "public_sector": "Tư pháp", "department": "UBND xã"}\n'
+        ))
+        stdout, stderr = self.run_import(path)
+        self.assertIn('2 đã ghi, 4 lỗi', stdout)
+        for line_number in (2, 3, 4, 5):
+            self.assertIn(f'Dòng {line_number}:', stderr)
+        self.assertEqual(
+            sorted(PublicService.objects.values_list('title', flat=True)), ['Thủ tục A', 'Thủ tục E']
+        )
+
+
+class BackupRestoreCommandTests(TestCase):
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+
+    def run_backup(self, *args):
+        call_command('backup', '--output', self.output, '--models', 'services.publicservice', *args, stdout=StringIO())
+        return os.path.join(self.output, sorted(os.listdir(self.output))[-1])
+
+    def test_round_trip_preserves_rows_and_timestamps(self):
+        service = create_service(procedure_steps='Nộp hồ sơ')
+        created_at = service.created_at
+        path = self.run_backup()
+
+        PublicService.objects.all().delete()
+        call_command('restore', path, stdout=StringIO())
+
+        restored = PublicService.objects.get(pk=service.pk)
+        self.assertEqual(restored.title, service.title)
+        self.assertEqual(restored.procedure_steps_list, ['Nộp hồ sơ'])
+        self.assertEqual(restored.created_at.replace(microsecond=0), created_at.replace(microsecond=0))
+        self.assertEqual(list(search_services(PublicService.objects.all(), 'giay phep')), [restored])
+
+    def test_incremental_backup_only_dumps_changed_rows(self):
+        create_service()
+        self.run_backup()
+        time.sleep(0.01)
+        create_service(title='Đăng ký khai sinh')
+
+        path = self.run_backup('--incremental')
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest['mode'], 'incremental')
+        self.assertEqual(manifest['models']['services.publicservice']['rows'], 1)
+
+    def test_checksum_mismatch_rolls_back(self):
+        create_service()
+        path = self.run_backup()
+        manifest_path = os.path.join(path, 'manifest.json')
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest['models']['services.publicservice']['sha256'] = '0' * 64
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        PublicService.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('restore', path, stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(PublicService.objects.exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TemplateFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+    
+    def test_home_and_navigation_fragments_are_cached(self):
+        response = self.client.get('/')
+        self.assertContains(response, 'Tra cứu Dịch vụ')
+        version = get_template_cache_version()
+        self.assertIsNotNone(cache.get(make_template_fragment_key('home_content', [version])))
+        self.assertIsNotNone(cache.get(make_template_fragment_key('site_footer', [version])))
+        
+        # Mục menu đang mở là một phần của khóa cache
+        response = self.client.get(reverse('contacts:contact_list'))
+        self.assertContains(response, 'nav-link active" href="%s"' % reverse('contacts:contact_list'))
+        response = self.client.get(reverse('submit_feedback'))
+        self.assertContains(response, 'nav-link active" href="%s"' % reverse('submit_feedback'))
+        self.assertNotContains(response, 'nav-link active" href="%s"' % reverse('contacts:contact_list'))
+    
+    def test_prerender_home_writes_static_index(self):
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output)
+        call_command('prerender_home', output=output, stdout=StringIO())
+        
+        with open(os.path.join(output, 'index.html'), encoding='utf-8') as f:
+            html = f.read()
+        self.assertIn('Trang chủ - Hệ thống Dịch vụ Công', html)
+        self.assertNotIn('alert-dismissible', html)
+        self.assertTrue(os.path.exists(os.path.join(output, 'index.html.gz')))
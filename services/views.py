@@ -1,52 +1,79 @@
 from django.views.generic import ListView, DetailView
-from django.db.models import Q
 from .models import PublicService
 from .forms import ServiceSearchForm
+from .cache import CATALOGUE_CACHE_TIMEOUT, detail_cache_key, list_cache_key
+from .pagination import InvalidCursor, KeysetPaginator, PrecountedPaginator
+from .filters import filter_services, parse_filters
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.http import Http404
 from django.shortcuts import render
 
 
 class ServiceListView(ListView):
     """
     View hiển thị danh sách dịch vụ hành chính công với tính năng tìm kiếm và phân trang
+    
+    Mặc định phân trang theo số trang. Khi có tham số `cursor` (có thể rỗng cho
+    trang đầu) thì chuyển sang phân trang keyset theo (-created_at, id).
     """
     model = PublicService
     template_name = 'services/service_list.html'
     context_object_name = 'services'
     paginate_by = 10  # Phân trang 10 items mỗi trang
     
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        # Đọc các tham số lọc một lần cho cả request
+        self.filters = parse_filters(request.GET)
+        self.cursor_mode = 'cursor' in request.GET
+    
     def get_queryset(self):
         """
         Lọc danh sách dịch vụ dựa trên các tham số tìm kiếm
         """
-        queryset = super().get_queryset()
-        
-        # Lấy các tham số tìm kiếm từ GET request
-        title = self.request.GET.get('title', '').strip()
-        public_sector = self.request.GET.get('public_sector', '').strip()
-        department = self.request.GET.get('department', '').strip()
-        service_level = self.request.GET.get('service_level', '').strip()
-        jurisdiction = self.request.GET.get('jurisdiction', '').strip()
-        
-        # Áp dụng các bộ lọc
-        if title:
-            queryset = queryset.filter(
-                Q(title__icontains=title) | 
-                Q(description__icontains=title)
+        return filter_services(super().get_queryset(), self.filters)
+    
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Phân trang có cache theo tổ hợp bộ lọc và trang.
+        Chế độ cursor dùng keyset, ngược lại dùng Paginator mặc định.
+        """
+        if self.cursor_mode:
+            return self.paginate_keyset(queryset, page_size)
+        
+        page_number = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg) or 1
+        key = list_cache_key(self.filters, page=page_number)
+        cached = cache.get(key)
+        
+        if cached is not None:
+            object_list, number, count = cached
+            paginator = PrecountedPaginator(
+                queryset, page_size, count,
+                orphans=self.get_paginate_orphans(),
+                allow_empty_first_page=self.get_allow_empty(),
             )
+            page = Page(object_list, number, paginator)
+            return (paginator, page, object_list, page.has_other_pages())
         
-        if public_sector:
-            queryset = queryset.filter(public_sector__icontains=public_sector)
-        
-        if department:
-            queryset = queryset.filter(department__icontains=department)
-        
-        if service_level:
-            queryset = queryset.filter(service_level=service_level)
-        
-        if jurisdiction:
-            queryset = queryset.filter(jurisdiction=jurisdiction)
-        
-        return queryset
+        paginator, page, _, is_paginated = super().paginate_queryset(queryset, page_size)
+        page.object_list = list(page.object_list)
+        cache.set(key, (page.object_list, page.number, paginator.count), CATALOGUE_CACHE_TIMEOUT)
+        return (paginator, page, page.object_list, is_paginated)
+    
+    def paginate_keyset(self, queryset, page_size):
+        cursor = self.request.GET.get('cursor', '')
+        key = list_cache_key(self.filters, cursor=cursor)
+        page = cache.get(key)
+        
+        if page is None:
+            try:
+                page = KeysetPaginator(queryset, page_size).page(cursor)
+            except InvalidCursor:
+                raise Http404('Cursor không hợp lệ.')
+            cache.set(key, page, CATALOGUE_CACHE_TIMEOUT)
+        
+        return (None, page, page.object_list, page.has_other_pages())
     
     def get_context_data(self, **kwargs):
         """
@@ -57,23 +84,21 @@ class ServiceListView(ListView):
         # Khởi tạo form với dữ liệu từ GET request
         context['search_form'] = ServiceSearchForm(self.request.GET or None)
         
-        # Thêm thông tin về số lượng kết quả
-        context['total_services'] = self.get_queryset().count()
+        # Tái sử dụng COUNT mà paginator đã chạy; chế độ cursor không đếm
+        context['cursor_mode'] = self.cursor_mode
+        if self.cursor_mode:
+            context['total_services'] = None
+        else:
+            context['total_services'] = context['page_obj'].paginator.count
         
         # Giữ các tham số tìm kiếm cho phân trang
         query_params = self.request.GET.copy()
-        if 'page' in query_params:
-            query_params.pop('page')
+        for param in ('page', 'cursor'):
+            query_params.pop(param, None)
         context['query_string'] = query_params.urlencode()
         
         # Kiểm tra xem có đang tìm kiếm không
-        context['is_searching'] = any([
-            self.request.GET.get('title'),
-            self.request.GET.get('public_sector'),
-            self.request.GET.get('department'),
-            self.request.GET.get('service_level'),
-            self.request.GET.get('jurisdiction'),
-        ])
+        context['is_searching'] = any(self.filters.values())
         
         return context
 
@@ -86,45 +111,17 @@ class ServiceDetailView(DetailView):
     template_name = 'services/service_detail.html'
     context_object_name = 'service'
     
-    def get_context_data(self, **kwargs):
+    def get_object(self, queryset=None):
         """
-        Thêm các thông tin bổ sung vào context
+        Lấy dịch vụ từ cache theo phiên bản danh mục
         """
-        context = super().get_context_data(**kwargs)
-        
-        # Chuyển đổi procedure_steps và required_documents thành list
-        service = self.object
-        
-        if service.procedure_steps:
-            context['procedure_steps_list'] = [
-                step.strip() 
-                for step in service.procedure_steps.split('\n') 
-                if step.strip()
-            ]
-        else:
-            context['procedure_steps_list'] = []
-        
-        if service.required_documents:
-            context['required_documents_list'] = [
-                doc.strip() 
-                for doc in service.required_documents.split('\n') 
-                if doc.strip()
-            ]
-        else:
-            context['required_documents_list'] = []
-        
-        if service.legal_basis:
-            context['legal_basis_list'] = [
-                legal.strip() 
-                for legal in service.legal_basis.split('\n') 
-                if legal.strip()
-            ]
-        else:
-            context['legal_basis_list'] = []
-        
-        return context
+        key = detail_cache_key(self.kwargs.get(self.pk_url_kwarg))
+        service = cache.get(key)
+        if service is None:
+            service = super().get_object(queryset)
+            cache.set(key, service, CATALOGUE_CACHE_TIMEOUT)
+        return service
     
-
     from django.shortcuts import render
 
 def home(request):